@@ -1,9 +1,89 @@
-from fastapi import FastAPI
-from engine import run_engine
-from schemas import AnalyzeRequest
+import asyncio, contextvars, functools, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from engine import run_engine, run_engine_stream
+from schemas import AnalyzeRequest, BatchAnalyzeRequest
+from batch import run_batch
 from fastapi.middleware.cors import CORSMiddleware
+from transport import pool_stats
+from snapshot import SNAPSHOTS, get_snapshot
+from singleflight import SingleFlight
+from refresher import MarketRefresher
+from config import ENGINE_WORKER_THREADS, LIVE_PRICES_ENABLED, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+from metrics import gauge, render_metrics, server_timing, span, traced
+from serialization import dumps, dumps_text
+from llm import close_llm_client
+from llm_scheduler import LLM_SCHEDULER
+from search_index import SEARCH_INDEX, search_markets
 
-app = FastAPI()
+ANALYZE_FLIGHTS = SingleFlight()
+# Blocking engine work (group event fetch, LLM call) runs on its own pool,
+# so a burst of /analyze calls cannot starve the refresher and snapshot
+# loads on the default executor
+ENGINE_EXECUTOR = ThreadPoolExecutor(max_workers=ENGINE_WORKER_THREADS, thread_name_prefix="engine")
+REFRESHER = None
+LIVE_FEED = None
+
+gauge("market_pulse_snapshot_markets", "Markets in the current snapshot", lambda: len(get_snapshot().records))
+gauge("market_pulse_snapshot_age_seconds", "Seconds since the current snapshot was built", lambda: time.time() - get_snapshot().loaded_at)
+gauge("market_pulse_analyze_inflight", "Distinct /analyze runs in flight", lambda: len(ANALYZE_FLIGHTS))
+gauge("market_pulse_llm_active", "LLM calls holding a scheduler slot", lambda: LLM_SCHEDULER.active())
+gauge("market_pulse_llm_queued", "LLM calls waiting for a scheduler slot", lambda: LLM_SCHEDULER.queued())
+
+def analyze_key(events, companies, snapshot, mode="llm"):
+    return (
+        tuple(sorted(set(events))),
+        tuple(sorted(set(companies))),
+        snapshot.cache_version,
+        mode,
+    )
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded through serialization.dumps (orjson when
+    installed).
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+async def run_in_engine_pool(fn, *args, **kwargs):
+    """
+    asyncio.to_thread on ENGINE_EXECUTOR, carrying over the context (and
+    with it the request trace).
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        ENGINE_EXECUTOR, functools.partial(context.run, fn, *args, **kwargs)
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the market snapshot once; requests read it from memory
+    await asyncio.to_thread(SNAPSHOTS.load)
+
+    # Keep it warm in the background from here on
+    global REFRESHER
+    REFRESHER = MarketRefresher(SNAPSHOTS)
+    REFRESHER.start()
+
+    # Optional: stream CLOB price updates between crawls
+    global LIVE_FEED
+    if LIVE_PRICES_ENABLED:
+        from live_prices import LivePriceFeed
+        LIVE_FEED = LivePriceFeed(REFRESHER.cache, SNAPSHOTS)
+        LIVE_FEED.start()
+
+    yield
+
+    if LIVE_FEED is not None:
+        await LIVE_FEED.stop()
+    await REFRESHER.stop()
+    close_llm_client()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,12 +95,96 @@ app.add_middleware(
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "transport": pool_stats(), "llm": LLM_SCHEDULER.stats()}
+
+@app.post("/refresh")
+async def refresh():
+    refreshed = await REFRESHER.refresh_once(force=True)
+    snapshot = get_snapshot()
+    return {
+        "refreshed": refreshed,
+        "version": snapshot.version,
+        "markets": len(snapshot.records),
+        "loaded_at": snapshot.loaded_at
+    }
+
+@app.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT)
+):
+    """
+    Typeahead over market questions and event titles in the last indexed
+    snapshot, ranked by volume and recent activity. Snapshot publishes
+    keep the index current; requests never reindex.
+    """
+    with span("search"):
+        return search_markets(SEARCH_INDEX, q, limit)
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.post("/analyze")
-def analyze(request: AnalyzeRequest):
-    output = run_engine(
-        selected_events=request.events,
-        companies=request.companies
+async def analyze(request: AnalyzeRequest):
+    with traced() as trace:
+        with span("analyze"):
+            snapshot = get_snapshot()
+
+            # Identical concurrent requests share one engine run
+            output = await ANALYZE_FLIGHTS.do(
+                analyze_key(request.events, request.companies, snapshot, request.mode),
+                lambda: run_in_engine_pool(
+                    run_engine,
+                    selected_events=request.events,
+                    companies=request.companies,
+                    snapshot=snapshot,
+                    mode=request.mode
+                )
+            )
+
+    # Stage breakdown for this request (empty for callers that joined
+    # another request's run)
+    headers = {"Server-Timing": server_timing(trace)}
+
+    # Shed by the LLM scheduler: tell the client when to come back
+    if output.get("error") == "LLM_OVERLOADED":
+        headers["Retry-After"] = str(output["retry_after"])
+        return FastJSONResponse(output, status_code=503, headers=headers)
+
+    return FastJSONResponse(output, headers=headers)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {dumps_text(data)}\n\n"
+
+@app.post("/analyze/stream")
+def analyze_stream(request: AnalyzeRequest):
+    """
+    Server-sent events: markets, company_signals and fed_signal as soon as
+    they are computed, then llm_delta chunks, then the final result.
+    """
+    def events():
+        for event, data in run_engine_stream(
+            selected_events=request.events,
+            companies=request.companies,
+            mode=request.mode
+        ):
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    return output
\ No newline at end of file
+
+@app.post("/analyze/batch")
+def analyze_batch(request: BatchAnalyzeRequest):
+    """
+    NDJSON, one {"index": i, "result": ...} line per item as it completes.
+    Items share one snapshot, shared signals and packed LLM calls.
+    """
+    def lines():
+        for item in run_batch(request.items):
+            yield dumps(item) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,286 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pydantic import ValidationError
+from config import (
+    LLM_CONTEXT_TOKENS,
+    LLM_OUTPUT_TOKENS_PER_ITEM,
+    LLM_BATCH_MAX_ITEMS,
+    BATCH_LLM_CONCURRENCY,
+)
+from engine import (
+    GROUP_EVENTS,
+    PROMPT_INTRO,
+    PROMPT_RULES,
+    compress_market_data,
+    enforce_asset_keys,
+    enforce_recession_guardrails,
+    extract_json,
+    fill_reasoning,
+    overloaded_result,
+    prompt_inputs,
+    run_engine,
+    validate_output,
+)
+from fast_engine import derive_analysis, RECESSION_EVENT, INFLATION_EVENT
+from llm import call_llm, get_llm_client
+from llm_scheduler import LLMOverloaded, set_lane
+from llm_cache import LLM_CACHE, cache_key
+from metrics import span, ERRORS, LLM_PARSE_FAILURES, PROMPT_TOKENS
+from market_data import fetch_group_event
+from price_ladder import compute_company_signals
+from prompt_compaction import compact_market_data, estimate_tokens
+from signals import compute_fed_rate_cut_signal
+from snapshot import get_snapshot
+
+# ===============================
+# BATCH ANALYSIS
+# ===============================
+# Evaluates many (events, companies) combinations against one snapshot:
+#
+# 1. identical sub-requests are deduped
+# 2. group signals are computed once, company signals once per distinct
+#    event selection (for the union of requested companies)
+# 3. fast-mode and cached items are answered immediately
+# 4. the remaining LLM items are packed into as few prompts as fit the
+#    model context and run concurrently
+#
+# Results are yielded per input item as soon as they are ready.
+
+BATCH_OUTPUT_RULES = """
+BATCH OUTPUT (OVERRIDES THE SINGLE-OBJECT FORMAT ABOVE):
+- Each PORTFOLIO above is independent; analyze each one separately
+- Return ONE JSON object mapping every portfolio id to that portfolio's
+  output object, e.g. {"p0": {...}, "p1": {...}}
+- Asset outlook entries MUST correspond to that portfolio's COMPANY SIGNALS
+"""
+
+def item_key(item):
+    return (
+        tuple(sorted(set(item.events))),
+        tuple(sorted(set(item.companies))),
+        item.mode,
+    )
+
+class BatchContext:
+    """
+    Signals shared across the batch, each computed at most once.
+    """
+
+    def __init__(self, snapshot, items):
+        self.snapshot = snapshot
+        self.companies = list(dict.fromkeys(c for item in items for c in item.companies))
+        self._fed_signal = {}
+        self._company_signals = {}
+
+    def fed_signal(self, selected_events):
+        fed_key = "fed_rate_cuts_2026"
+        if fed_key not in selected_events or fed_key not in GROUP_EVENTS:
+            return None
+
+        if fed_key not in self._fed_signal:
+            event = fetch_group_event(fed_key)
+            self._fed_signal[fed_key] = (
+                compute_fed_rate_cut_signal(event)
+                if event else None
+            )
+        return self._fed_signal[fed_key]
+
+    def company_signals(self, event_keys, companies):
+        selection = frozenset(event_keys)
+        if selection not in self._company_signals:
+            self._company_signals[selection] = compute_company_signals(
+                self.companies,
+                self.snapshot.ladder,
+                event_codes=self.snapshot.event_codes_for(selection)
+            )
+        signals = self._company_signals[selection]
+        return {c: signals[c] for c in companies}
+
+def prepare_item(context, item):
+    """
+    Same inputs run_engine_stream builds for one request.
+    """
+    event_keys = set(item.events)
+    selected_markets = context.snapshot.table_for(event_keys)
+    market_data = compress_market_data(selected_markets)
+    company_signals = context.company_signals(event_keys, item.companies)
+    fed_signal = context.fed_signal(item.events)
+
+    return {
+        "item": item,
+        "selected_markets": selected_markets,
+        "market_data": market_data,
+        "company_signals": company_signals,
+        "fed_signal": fed_signal,
+        "response_key": cache_key(
+            fed_signal=fed_signal,
+            company_signals=company_signals,
+            market_data=market_data,
+            companies=item.companies
+        ),
+    }
+
+def build_batch_prompt(prepared_by_id):
+    sections = [
+        f"=== PORTFOLIO {pid} ===\n" + prepared["prompt_inputs"]
+        for pid, prepared in prepared_by_id.items()
+    ]
+    return PROMPT_INTRO + "\n".join(sections) + PROMPT_RULES + BATCH_OUTPUT_RULES
+
+def pack_items(prepared_items):
+    """
+    Greedily groups items into prompts that fit the model context,
+    counting the expected output of every packed item.
+    """
+    fixed = estimate_tokens(PROMPT_INTRO + PROMPT_RULES + BATCH_OUTPUT_RULES)
+    packs, current, used = [], [], fixed
+
+    for prepared in prepared_items:
+        cost = LLM_OUTPUT_TOKENS_PER_ITEM + estimate_tokens(prepared["prompt_inputs"])
+
+        if current and (used + cost > LLM_CONTEXT_TOKENS or len(current) >= LLM_BATCH_MAX_ITEMS):
+            packs.append(current)
+            current, used = [], fixed
+
+        current.append(prepared)
+        used += cost
+
+    if current:
+        packs.append(current)
+    return packs
+
+def run_pack(pack, snapshot):
+    """
+    One LLM call for a pack. Items the model left out or garbled are rerun
+    on their own.
+    """
+    by_id = {f"p{i}": prepared for i, prepared in enumerate(pack)}
+    results = {}
+
+    if len(pack) > 1:
+        prompt = build_batch_prompt(by_id)
+        PROMPT_TOKENS.observe(estimate_tokens(prompt), mode="batch")
+        raw_output, parsed = None, {}
+        try:
+            raw_output = call_llm(get_llm_client(), prompt)
+            with span("batch.parse"):
+                parsed = extract_json(raw_output)
+        except LLMOverloaded as e:
+            # Rerunning items one by one would only queue more calls
+            print(f"⚠️ Packed LLM call shed: {e}")
+            return [(prepared, overloaded_result(e)) for prepared in pack]
+        except Exception as e:
+            print(f"⚠️ Packed LLM call failed, running items individually: {e}")
+            if raw_output is not None:
+                LLM_PARSE_FAILURES.inc(mode="batch", reason="syntax")
+
+        for pid, prepared in by_id.items():
+            output = parsed.get(pid)
+            if not isinstance(output, dict):
+                continue
+            output = enforce_asset_keys(output, prepared["item"].companies)
+            try:
+                output = validate_output(output)
+            except ValidationError:
+                LLM_PARSE_FAILURES.inc(mode="batch", reason="schema")
+                continue
+            output = enforce_recession_guardrails(output)
+            LLM_CACHE.put(prepared["response_key"], snapshot.cache_version, output)
+            results[pid] = output
+
+    for pid, prepared in by_id.items():
+        if pid not in results:
+            item = prepared["item"]
+            results[pid] = run_engine(item.events, item.companies, snapshot=snapshot, mode=item.mode)
+
+    return [(by_id[pid], output) for pid, output in results.items()]
+
+def run_batch(items, snapshot=None):
+    """
+    Yields {"index": i, "result": ...} for every input item, in completion
+    order.
+    """
+    snapshot = snapshot or get_snapshot()
+    context = BatchContext(snapshot, items)
+
+    # 1. Dedupe identical sub-requests
+    indices_by_key = {}
+    for index, item in enumerate(items):
+        indices_by_key.setdefault(item_key(item), []).append(index)
+
+    def emit(key, result):
+        for index in indices_by_key[key]:
+            yield {"index": index, "result": result}
+
+    pending_llm, pending_reasoning = [], []
+
+    for key, indices in indices_by_key.items():
+        item = items[indices[0]]
+        prepared = prepare_item(context, item)
+
+        # 2. Deterministic items answer immediately
+        if item.mode in ("fast", "fast_reasoning"):
+            analysis = enforce_recession_guardrails(derive_analysis(
+                prepared["fed_signal"],
+                prepared["company_signals"],
+                snapshot.markets_for([RECESSION_EVENT, INFLATION_EVENT]),
+                item.companies
+            ))
+            if item.mode == "fast":
+                yield from emit(key, analysis)
+            else:
+                pending_reasoning.append((key, analysis))
+            continue
+
+        # 3. Cached LLM answers
+        cached = LLM_CACHE.get(prepared["response_key"], snapshot.cache_version)
+        if cached is not None:
+            yield from emit(key, cached)
+            continue
+
+        prompt_market_data, _ = compact_market_data(prepared["selected_markets"])
+        prepared["prompt_inputs"] = prompt_inputs(
+            prepared["fed_signal"], prepared["company_signals"], prompt_market_data
+        )
+        prepared["key"] = key
+        pending_llm.append(prepared)
+
+    # 4. Packed LLM calls (and reasoning fills), run concurrently in the
+    #    scheduler's batch lane
+    with ThreadPoolExecutor(
+        max_workers=BATCH_LLM_CONCURRENCY,
+        initializer=set_lane,
+        initargs=("batch",)
+    ) as pool:
+        pack_futures = {
+            pool.submit(run_pack, pack, snapshot): pack
+            for pack in pack_items(pending_llm)
+        }
+        reasoning_futures = {
+            pool.submit(fill_reasoning, analysis, snapshot.cache_version): (key, analysis)
+            for key, analysis in pending_reasoning
+        }
+
+        # A failed future only fails its own items; the stream goes on
+        for future in as_completed(list(pack_futures) + list(reasoning_futures)):
+            if future in reasoning_futures:
+                key, analysis = reasoning_futures[future]
+                try:
+                    analysis = future.result()
+                except Exception as e:
+                    # Template reasoning is still a complete answer
+                    print(f"⚠️ Batch reasoning fill failed: {e}")
+                    ERRORS.inc(source="batch")
+                yield from emit(key, analysis)
+                continue
+
+            try:
+                outputs = future.result()
+            except Exception as e:
+                print(f"⚠️ Batch pack failed: {e}")
+                ERRORS.inc(source="batch")
+                outputs = [
+                    (prepared, {"error": "BATCH_ITEM_FAILED", "message": str(e)})
+                    for prepared in pack_futures[future]
+                ]
+            for prepared, output in outputs:
+                yield from emit(prepared["key"], output)
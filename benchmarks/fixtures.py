@@ -0,0 +1,211 @@
+import json, os, random, sys
+from collections import OrderedDict
+
+# ===============================
+# BENCHMARK FIXTURES
+# ===============================
+# fixtures/gamma_clob.json holds Gamma /events/{id} responses and CLOB
+# midpoints for every predefined event:
+#
+# {"events": {event_id: event}, "midpoints": {token_id: price}}
+#
+#   python -m benchmarks.fixtures record      # live Gamma + CLOB
+#   python -m benchmarks.fixtures from-cache  # rebuilt from CACHE_FILE
+#
+# synthetic_catalog(n) scales the same shapes up to any number of markets.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+GAMMA_CLOB_FIXTURE = os.path.join(FIXTURE_DIR, "gamma_clob.json")
+LLM_OUTPUT_FIXTURE = os.path.join(FIXTURE_DIR, "llm_output.txt")
+
+MARKETS_PER_EVENT = 50
+
+def load_gamma_clob():
+    with open(GAMMA_CLOB_FIXTURE, "r") as f:
+        return json.load(f)
+
+def load_llm_output():
+    with open(LLM_OUTPUT_FIXTURE, "r") as f:
+        return f.read()
+
+def save_gamma_clob(fixture):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(GAMMA_CLOB_FIXTURE, "w") as f:
+        json.dump(fixture, f, indent=1)
+
+# -------------------------------
+# RECORDING
+# -------------------------------
+def record():
+    """
+    Captures live Gamma events and their CLOB midpoints.
+    """
+    from config import PREDEFINED_EVENT_IDS
+    from market_data import get_event_by_id, _market_token_ids
+    from pricing import fetch_midpoints_batch, chunked
+
+    events, token_ids = {}, []
+    for event_id in PREDEFINED_EVENT_IDS.values():
+        event = get_event_by_id(event_id)
+        if not event:
+            continue
+        events[str(event_id)] = event
+        for market in event.get("markets", []):
+            token_ids.extend(_market_token_ids(market) or [])
+
+    midpoints = {}
+    for chunk in chunked(token_ids, 50):
+        midpoints.update(fetch_midpoints_batch(chunk) or {})
+
+    return {"events": events, "midpoints": midpoints}
+
+def _yes_no_market(market_id, question, yes, volume, end_date, **extra):
+    # Gamma sends outcomes, prices and token ids as JSON-encoded strings
+    yes = round(yes, 4)
+    return {
+        "id": str(market_id),
+        "question": question,
+        "outcomes": json.dumps(["Yes", "No"]),
+        "outcomePrices": json.dumps([str(yes), str(round(1 - yes, 4))]),
+        "clobTokenIds": json.dumps([f"{market_id}-0", f"{market_id}-1"]),
+        "volume": str(volume),
+        "endDate": end_date,
+        **extra,
+    }
+
+def fed_rate_cut_event(event_id, probs=(0.08, 0.22, 0.31, 0.24, 0.1, 0.05)):
+    """
+    Group event shaped like Gamma's "How many Fed rate cuts in 2026?".
+    """
+    markets = []
+    for n, p in enumerate(probs):
+        title = "No cuts" if n == 0 else f"{n}+ cuts" if n == len(probs) - 1 else f"{n} cuts"
+        markets.append(_yes_no_market(
+            f"{event_id}{n:02d}",
+            f"Will the Fed cut rates {title.lower()} in 2026?",
+            p,
+            1_000_000,
+            "2026-12-31T00:00:00Z",
+            groupItemTitle=title,
+        ))
+    return {
+        "id": str(event_id),
+        "title": "How many Fed rate cuts in 2026?",
+        "updatedAt": "2026-01-01T00:00:00Z",
+        "markets": markets,
+    }
+
+def from_cache(cache_path=None):
+    """
+    Rebuilds Gamma/CLOB responses from the flat snapshot. Token order
+    follows the ["No", "Yes"] fallback build_market_record applies to
+    Gamma's string-encoded outcomes, so replaying them reproduces the
+    snapshot exactly.
+    """
+    from config import CACHE_FILE, PREDEFINED_EVENT_IDS
+
+    with open(cache_path or CACHE_FILE, "r") as f:
+        records = json.load(f)
+
+    events, midpoints = OrderedDict(), {}
+    for record in records:
+        event = events.setdefault(str(record["event_id"]), {
+            "id": str(record["event_id"]),
+            "title": record["event_title"],
+            "markets": [],
+        })
+
+        labels = list(record["outcomes"])
+        token_ids = [f"{record['market_id']}-{i}" for i in range(len(labels))]
+        for token_id, label in zip(token_ids, labels):
+            midpoints[token_id] = record["outcomes"][label]
+
+        event["markets"].append({
+            "id": record["market_id"],
+            "question": record["market_question"],
+            "outcomes": json.dumps(labels),
+            "outcomePrices": json.dumps([str(record["outcomes"][l]) for l in labels]),
+            "clobTokenIds": json.dumps(token_ids),
+            "volume": record["volume"],
+            "endDate": record["end_date"],
+        })
+
+    fed_id = PREDEFINED_EVENT_IDS["fed_rate_cuts_2026"]
+    events[str(fed_id)] = fed_rate_cut_event(fed_id)
+
+    return {"events": events, "midpoints": midpoints}
+
+# -------------------------------
+# SYNTHETIC CATALOGS
+# -------------------------------
+_LADDER_NAMES = ["NVIDIA", "Apple", "Microsoft", "Tesla", "Amazon", "Meta"]
+
+def _synthetic_question(rng, i):
+    kind = i % 4
+    if kind == 0:
+        name = _LADDER_NAMES[i % len(_LADDER_NAMES)]
+        verb = "reach" if rng.random() < 0.7 else "dip to"
+        return f"Will {name} {verb} ${rng.randrange(80, 400)} in February?"
+    if kind == 1:
+        return f"Will the 10-year Treasury yield hit {rng.uniform(3.5, 6.5):.1f}% before 2027?"
+    if kind == 2:
+        return f"Will inflation reach more than {rng.randrange(2, 12)}% in 2026?"
+    return f"Will synthetic outcome #{i} resolve Yes by 2026?"
+
+def synthetic_catalog(n_markets, seed=0):
+    """
+    Gamma/CLOB fixture with `n_markets` Yes/No markets spread over events
+    of MARKETS_PER_EVENT, plus the Fed cut group event. Returns
+    (fixture, event_ids) with event_ids = {event_key: event_id}.
+    """
+    rng = random.Random(seed)
+    events, midpoints, event_ids = {}, {}, {}
+
+    for start in range(0, n_markets, MARKETS_PER_EVENT):
+        event_id = 900_000 + start // MARKETS_PER_EVENT
+        event_ids[f"synthetic_{event_id}"] = event_id
+
+        markets = []
+        for i in range(start, min(start + MARKETS_PER_EVENT, n_markets)):
+            yes = rng.random()
+            market = _yes_no_market(
+                5_000_000 + i,
+                _synthetic_question(rng, i),
+                yes,
+                rng.randrange(1_000, 5_000_000),
+                f"2026-{rng.randrange(1, 13):02d}-28T00:00:00Z",
+            )
+            token_ids = json.loads(market["clobTokenIds"])
+            midpoints[token_ids[0]] = round(yes, 4)
+            midpoints[token_ids[1]] = round(1 - yes, 4)
+            markets.append(market)
+
+        events[str(event_id)] = {
+            "id": str(event_id),
+            "slug": f"synthetic-event-{event_id}",
+            "title": f"Synthetic event {event_id}",
+            "updatedAt": f"2026-01-{1 + event_id % 28:02d}T{event_id % 24:02d}:00:00Z",
+            "markets": markets,
+        }
+
+    fed_id = 899_999
+    events[str(fed_id)] = fed_rate_cut_event(fed_id)
+    event_ids["fed_rate_cuts_2026"] = fed_id
+
+    return {"events": events, "midpoints": midpoints}, event_ids
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "from-cache"
+
+    if command == "record":
+        fixture = record()
+    elif command == "from-cache":
+        fixture = from_cache()
+    else:
+        sys.exit("usage: python -m benchmarks.fixtures [record|from-cache]")
+
+    save_gamma_clob(fixture)
+    print(
+        f"💾 {len(fixture['events'])} events, {len(fixture['midpoints'])} "
+        f"midpoints -> {GAMMA_CLOB_FIXTURE}"
+    )
@@ -0,0 +1,348 @@
+import argparse, contextlib, io, json, os, statistics, sys, tempfile, time, tracemalloc
+
+# Runs from the repo root: python -m benchmarks.run
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The stub LLM is timed, not the scheduler's rate limit
+os.environ.setdefault("LLM_RATE_PER_SEC", "0")
+
+import config
+import engine
+import market_data
+import pricing
+from benchmarks.fixtures import load_gamma_clob, load_llm_output, synthetic_catalog
+from benchmarks.stubs import ReplaySession, StubLLMClient, large_llm_output
+from llm_cache import LLM_CACHE
+from price_ladder import LadderIndex, compute_company_signals
+from prompt_compaction import compact_market_data
+from signals import compute_fed_rate_cut_signal
+from snapshot import MarketSnapshot
+from json_stream import StreamingJSONParser
+from serialization import binary_path, dumps, load_document, save_document
+from catalog import EventCatalog
+from search_index import SearchIndex
+
+# ===============================
+# BENCHMARK SUITE
+# ===============================
+# Times every hot path offline: Gamma/CLOB answered from fixtures, the LLM
+# replaced by a stub with configurable latency, catalogs scaled from the
+# recorded ~50 markets up to 100k synthetic ones.
+#
+# Per stage and catalog size it reports median and best wall time, peak
+# traced memory and net allocated blocks, and compares them with
+# benchmarks/baselines.json. Any regression beyond the tolerances below
+# exits non-zero.
+#
+#   python -m benchmarks.run
+#   python -m benchmarks.run --sizes 1000 10000 --llm-latency 0.5
+#   python -m benchmarks.run --update-baseline
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+DEFAULT_SIZES = ["recorded", 1_000, 10_000, 100_000]
+COMPANIES = ["Nvidia", "Apple", "Microsoft", "Tesla", "Amazon"]
+
+# A stage regresses when it is this much slower / heavier than baseline,
+# beyond a small absolute allowance for timer and allocator noise.
+# Shared CI runners jitter by up to ~2x on sub-10 ms stages.
+TIME_TOLERANCE = float(os.getenv("BENCH_TIME_TOLERANCE", "2.0"))
+TIME_NOISE_MS = 1.0
+MEMORY_TOLERANCE = 1.25
+MEMORY_NOISE_KB = 64
+
+# -------------------------------
+# MEASUREMENT
+# -------------------------------
+def measure(fn, repeat):
+    """
+    Median/min wall time over `repeat` runs, then one traced run for
+    memory. Returns (stats, last result).
+    """
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks_before
+
+    return {
+        "wall_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_kb": round(peak / 1024, 1),
+        "alloc_blocks": blocks,
+    }, result
+
+@contextlib.contextmanager
+def replaying(fixture, event_ids=None):
+    """
+    Points the fetch pipeline at `fixture`, optionally tracking
+    `event_ids` instead of the predefined events.
+    """
+    session = ReplaySession(fixture)
+    saved_ids = dict(config.PREDEFINED_EVENT_IDS)
+    saved_sessions = market_data.SESSION, pricing.SESSION
+
+    market_data.SESSION = pricing.SESSION = session
+    market_data._GROUP_EVENT_CACHE.clear()
+    if event_ids is not None:
+        config.PREDEFINED_EVENT_IDS.clear()
+        config.PREDEFINED_EVENT_IDS.update(event_ids)
+    try:
+        yield session
+    finally:
+        market_data.SESSION, pricing.SESSION = saved_sessions
+        market_data._GROUP_EVENT_CACHE.clear()
+        config.PREDEFINED_EVENT_IDS.clear()
+        config.PREDEFINED_EVENT_IDS.update(saved_ids)
+
+@contextlib.contextmanager
+def stub_llm(latency):
+    client = StubLLMClient(load_llm_output(), latency=latency)
+    saved = engine.get_llm_client
+    engine.get_llm_client = lambda: client
+    try:
+        yield client
+    finally:
+        engine.get_llm_client = saved
+
+# -------------------------------
+# STAGES
+# -------------------------------
+def _fetch(use_cache=False):
+    # Fresh event cache each run so every event is refetched
+    for path in (config.CACHE_FILE, config.EVENT_CACHE_FILE, binary_path(config.EVENT_CACHE_FILE)):
+        if os.path.exists(path):
+            os.remove(path)
+    return market_data.fetch_all_market_data(use_cache=use_cache)
+
+def _build_index(records):
+    index = SearchIndex()
+    index.update(records)
+    return index
+
+def run_size(size, repeat, llm_latency):
+    if size == "recorded":
+        fixture, event_ids = load_gamma_clob(), None
+    else:
+        fixture, event_ids = synthetic_catalog(size)
+
+    results = {}
+
+    def stage(name, fn, times=repeat):
+        stats, result = measure(fn, times)
+        results[name] = stats
+        return result
+
+    with replaying(fixture, event_ids) as session:
+        tracked = market_data.tracked_event_keys()
+        selection = tracked[:3]
+
+        records = stage("fetch_all_market_data", _fetch, times=max(1, repeat // 3))
+        snapshot = stage("snapshot_build", lambda: MarketSnapshot(records))
+        ladder = stage("ladder_index", lambda: LadderIndex.from_table(snapshot.table))
+        snapshot._ladder = ladder
+
+        # Live price overlay: 100 repriced markets derived from the
+        # snapshot instead of rebuilding it
+        updates = {
+            str(record["market_id"]): {label: 0.5 for label in record["outcomes"]}
+            for record in records[:100]
+        }
+        snapshot.with_outcomes({})  # builds the row index once per snapshot
+        stage("snapshot_live_update", lambda: snapshot.with_outcomes(updates))
+
+        # Snapshot persistence: stdlib JSON (the previous path) vs the
+        # serialization layer (msgpack + mmap / orjson when installed)
+        def save_stdlib():
+            with open("bench_stdlib.json", "w") as f:
+                json.dump(records, f, indent=2)
+
+        def load_stdlib():
+            with open("bench_stdlib.json", "r") as f:
+                return json.load(f)
+
+        stage("snapshot_save_stdlib", save_stdlib)
+        stage("snapshot_save", lambda: save_document("bench_snapshot.json", records))
+        stage("snapshot_load_stdlib", load_stdlib)
+        stage("snapshot_load", lambda: load_document("bench_snapshot.json"))
+        stage("encode_records_stdlib", lambda: json.dumps(records).encode())
+        stage("encode_records", lambda: dumps(records))
+
+        # Catalog: full relist from the paged /events listing into a fresh
+        # catalog, then an incremental sync that stops at the watermark
+        def catalog_sync_full():
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists("bench_catalog.sqlite" + suffix):
+                    os.remove("bench_catalog.sqlite" + suffix)
+            catalog = EventCatalog("bench_catalog.sqlite")
+            try:
+                return catalog.sync(full=True, session=session)
+            finally:
+                catalog.close()
+
+        def catalog_sync_incremental():
+            catalog = EventCatalog("bench_catalog.sqlite")
+            try:
+                return catalog.sync(session=session)
+            finally:
+                catalog.close()
+
+        stage("catalog_sync_full", catalog_sync_full)
+        stage("catalog_sync_incremental", catalog_sync_incremental)
+
+        # Search: full build, an update with 1% of prices moved, then a
+        # broad prefix and a multi-term typeahead query
+        index = stage("search_index_build", lambda: _build_index(records))
+        moved = [
+            dict(record, outcomes={label: 1 - p for label, p in record["outcomes"].items()})
+            if i % 100 == 0 else record
+            for i, record in enumerate(records)
+        ]
+        snapshots = [moved, records]
+        stage("search_index_update", lambda: index.update(snapshots.append(snapshots.pop(0)) or snapshots[0]))
+        stage("search_query_prefix", lambda: index.search("tr"))
+        stage("search_query_multi", lambda: index.search("inflation more 20"))
+        del index, moved, snapshots
+
+        stage("company_signals", lambda: compute_company_signals(COMPANIES, ladder))
+
+        selected = snapshot.table_for(selection)
+        stage("compress_market_data", lambda: engine.compress_market_data(selected))
+        stage("compact_market_data", lambda: compact_market_data(selected))
+
+        group_event = market_data.fetch_group_event("fed_rate_cuts_2026")
+        stage("fed_rate_cut_signal", lambda: compute_fed_rate_cut_signal(group_event))
+
+        llm_output = load_llm_output()
+        stage("extract_json", lambda: engine.extract_json(llm_output))
+        long_output = large_llm_output(llm_output, 500)
+        stage("extract_json_500_assets", lambda: engine.extract_json(long_output))
+        broken_output = long_output.replace('"Moderate"\n', '"Moderate",\n')
+        stage("extract_json_repair_500_assets", lambda: engine.extract_json(broken_output))
+
+        def stream_parse():
+            parser = StreamingJSONParser()
+            for i in range(0, len(long_output), 64):
+                parser.feed(long_output[i:i + 64])
+            return parser.finish()
+
+        stage("stream_parse_500_assets", stream_parse)
+
+        events = selection + ["fed_rate_cuts_2026"]
+
+        def run_llm():
+            LLM_CACHE.clear()
+            return engine.run_engine(events, COMPANIES, snapshot=snapshot)
+
+        with stub_llm(llm_latency):
+            output = stage("run_engine_llm", run_llm)
+            stage("run_engine_cached", lambda: engine.run_engine(events, COMPANIES, snapshot=snapshot))
+            stage("run_engine_fast", lambda: engine.run_engine(events, COMPANIES, snapshot=snapshot, mode="fast"))
+
+        stage("encode_response_stdlib", lambda: json.dumps(output).encode())
+        stage("encode_response", lambda: dumps(output))
+
+        if "error" in output:
+            raise RuntimeError(f"run_engine failed on the fixture: {output}")
+
+    return {f"{name}@{size}": stats for name, stats in results.items()}
+
+# -------------------------------
+# BASELINES
+# -------------------------------
+def load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, "r") as f:
+        return json.load(f)
+
+def save_baselines(meta, results):
+    with open(BASELINE_FILE, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def regressions(results, baseline):
+    failed = []
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        # Best-of-N is far steadier than the median on a busy machine
+        time_limit = base["min_ms"] * TIME_TOLERANCE + TIME_NOISE_MS
+        if stats["min_ms"] > time_limit:
+            failed.append(f"{key}: {stats['min_ms']:.2f} ms vs baseline {base['min_ms']:.2f} ms")
+
+        memory_limit = base["peak_kb"] * MEMORY_TOLERANCE + MEMORY_NOISE_KB
+        if stats["peak_kb"] > memory_limit:
+            failed.append(f"{key}: peak {stats['peak_kb']:.0f} KB vs baseline {base['peak_kb']:.0f} KB")
+    return failed
+
+def print_table(results, baseline):
+    print(f"{'stage':<42}{'median ms':>12}{'min ms':>12}{'base min':>12}{'peak KB':>12}{'blocks':>10}")
+    for key, stats in results.items():
+        base = baseline.get(key, {}).get("min_ms")
+        base = f"{base:.3f}" if base is not None else "-"
+        print(
+            f"{key:<42}{stats['wall_ms']:>12.3f}{stats['min_ms']:>12.3f}{base:>12}"
+            f"{stats['peak_kb']:>12.1f}{stats['alloc_blocks']:>10}"
+        )
+
+def parse_size(value):
+    return value if value == "recorded" else int(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub LLM delay in seconds")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    stored = load_baselines()
+    baseline = stored.get("results", {})
+    if stored and stored.get("meta", {}).get("llm_latency") != args.llm_latency:
+        print("⚠️ Stub LLM latency differs from the baseline; run_engine_llm is not comparable")
+
+    results = {}
+    # Every file the pipeline writes (snapshot, event cache, history) lands here
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                print(f"⏱️ Benchmarking catalog size {size} ...")
+                results.update(run_size(size, args.repeat, args.llm_latency))
+        finally:
+            os.chdir(cwd)
+
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        save_baselines({"llm_latency": args.llm_latency, "repeat": args.repeat}, {**baseline, **results})
+        print(f"💾 Baselines written to {BASELINE_FILE}")
+        return 0
+
+    failed = regressions(results, baseline)
+    if failed:
+        print(f"\n❌ {len(failed)} regressions against {BASELINE_FILE}:")
+        for line in failed:
+            print(f"  - {line}")
+        return 1
+
+    print("\n✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import json, time
+from types import SimpleNamespace
+
+# ===============================
+# OFFLINE STAND-INS
+# ===============================
+# ReplaySession answers Gamma and CLOB calls from a fixture, and
+# StubLLMClient answers like the Sarvam SDK after a configurable delay, so
+# the pipeline runs end to end without network access.
+
+class ReplayResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} from replay")
+
+class ReplaySession:
+    """
+    Drop-in for transport.SESSION:
+
+    - GET  {GAMMA_BASE}/events/{id}
+    - GET  {GAMMA_BASE}/events?limit=&offset=  (newest updatedAt first)
+    - GET  {CLOB_BASE}/midpoint?token_id=...
+    - POST {CLOB_BASE}/midpoints
+    """
+
+    def __init__(self, fixture):
+        self.events = fixture["events"]
+        self.midpoints = fixture["midpoints"]
+        self.requests = 0
+        self._listing = None
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+
+        if "/events/" in url:
+            event = self.events.get(url.rsplit("/", 1)[-1])
+            return ReplayResponse(event, 200) if event else ReplayResponse({}, 404)
+
+        if url.endswith("/events"):
+            params = params or {}
+            if self._listing is None:
+                self._listing = sorted(
+                    self.events.values(),
+                    key=lambda event: event.get("updatedAt") or "",
+                    reverse=True
+                )
+            offset = int(params.get("offset", 0))
+            return ReplayResponse(self._listing[offset:offset + int(params.get("limit", 100))])
+
+        if url.endswith("/midpoint"):
+            price = self.midpoints.get((params or {}).get("token_id"))
+            if price is None:
+                return ReplayResponse({}, 404)
+            return ReplayResponse({"mid": str(price), "midpoint": str(price)})
+
+        return ReplayResponse({}, 404)
+
+    def post(self, url, json=None, timeout=None):
+        self.requests += 1
+
+        if url.endswith("/midpoints"):
+            return ReplayResponse({
+                item["token_id"]: str(self.midpoints[item["token_id"]])
+                for item in json or []
+                if item["token_id"] in self.midpoints
+            })
+
+        return ReplayResponse({}, 404)
+
+def _completion(content):
+    return SimpleNamespace(choices=[
+        SimpleNamespace(message=SimpleNamespace(content=content))
+    ])
+
+def _chunk(content):
+    return SimpleNamespace(choices=[
+        SimpleNamespace(delta=SimpleNamespace(content=content))
+    ])
+
+class StubLLMClient:
+    """
+    Sarvam-shaped client returning `output` after `latency` seconds.
+    Streaming spreads the same delay over `chunks` pieces.
+    """
+
+    def __init__(self, output, latency=0.0, chunks=20):
+        self.output = output
+        self.latency = latency
+        self.n_chunks = chunks
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self._completions)
+
+    def _completions(self, messages, stream=False):
+        self.calls += 1
+        if not stream:
+            time.sleep(self.latency)
+            return _completion(self.output)
+        return self._stream()
+
+    def _stream(self):
+        size = max(1, len(self.output) // self.n_chunks)
+        for i in range(0, len(self.output), size):
+            time.sleep(self.latency / self.n_chunks)
+            yield _chunk(self.output[i:i + size])
+
+def large_llm_output(output, n_assets):
+    """
+    The fixture answer with `n_assets` asset_outlook entries, to time
+    extract_json on long completions.
+    """
+    from engine import extract_json
+
+    parsed = extract_json(output)
+    template = next(iter(parsed["asset_outlook"].values()))
+    parsed["asset_outlook"] = {
+        f"Asset {i}": dict(template) for i in range(n_assets)
+    }
+    return "```json\n" + json.dumps(parsed, indent=2) + "\n```"
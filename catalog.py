@@ -0,0 +1,463 @@
+import json, re, sqlite3, sys, threading, time
+import requests
+from config import (
+    GAMMA_BASE,
+    CATALOG_DB,
+    CATALOG_SYNC_ENABLED,
+    CATALOG_PAGE_SIZE,
+    CATALOG_MAX_PAGES,
+    CATALOG_SYNC_INTERVAL,
+    CATALOG_FULL_SYNC_INTERVAL,
+    CATALOG_CATEGORY_RULES,
+    CATALOG_TRACKED_CATEGORIES,
+    CATALOG_MIN_VOLUME,
+    CATALOG_MAX_TRACKED,
+    PREDEFINED_EVENT_IDS,
+)
+from event_cache import parse_end_date, parse_volume
+from transport import SESSION
+from metrics import ERRORS
+
+# ===============================
+# GAMMA EVENT CATALOG
+# ===============================
+# Local SQLite index of Gamma events and their markets, filled from the
+# paged GET /events listing (CATALOG_PAGE_SIZE events per request, markets
+# embedded) instead of one request per event id.
+#
+# - pages are read newest updatedAt first; an incremental sync stops at
+#   the first event older than the stored watermark, so it usually costs a
+#   single request
+# - the watermark only advances when a sync reaches it; a sync cut short
+#   saves its offset and the next one picks up where it stopped, so a
+#   listing longer than CATALOG_MAX_PAGES still completes over several runs
+# - event keys and categories come from rules: pinned ids keep their
+#   PREDEFINED_EVENT_IDS key, everything else is keyed by its slug;
+#   CATALOG_CATEGORY_RULES map title / slug / tags to a category
+#
+# The fetcher follows tracked_events(): the pinned events plus the busiest
+# open catalog events in CATALOG_TRACKED_CATEGORIES.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    event_key TEXT NOT NULL UNIQUE,
+    slug TEXT,
+    title TEXT NOT NULL,
+    category TEXT,
+    tags TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    closed INTEGER NOT NULL,
+    volume REAL NOT NULL,
+    end_date TEXT,
+    updated_at REAL NOT NULL,
+    synced_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS markets (
+    market_id TEXT PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    slug TEXT,
+    volume REAL NOT NULL,
+    end_date TEXT,
+    closed INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_events_category_volume ON events (category, volume DESC);
+CREATE INDEX IF NOT EXISTS idx_events_updated ON events (updated_at);
+CREATE INDEX IF NOT EXISTS idx_markets_event ON markets (event_id);
+"""
+
+_COMPILED_RULES = [
+    (category, re.compile(pattern, re.IGNORECASE))
+    for category, pattern in CATALOG_CATEGORY_RULES
+]
+
+# -------------------------------
+# RULES
+# -------------------------------
+def slug_key(text):
+    return re.sub(r"[^a-z0-9]+", "_", (text or "").lower()).strip("_")[:64]
+
+def event_tags(event):
+    # Gamma tags are {"id", "label", "slug"} objects
+    return [
+        tag.get("slug") or slug_key(tag.get("label"))
+        for tag in event.get("tags") or []
+        if isinstance(tag, dict)
+    ]
+
+def categorize(event):
+    """
+    First CATALOG_CATEGORY_RULES category matching the event's title, slug
+    or tag labels, or None.
+    """
+    labels = " ".join(
+        tag.get("label") or "" for tag in event.get("tags") or [] if isinstance(tag, dict)
+    )
+    text = f"{event.get('title') or ''} {event.get('slug') or ''} {labels}"
+    for category, pattern in _COMPILED_RULES:
+        if pattern.search(text):
+            return category
+    return None
+
+def _pinned_keys():
+    return {int(event_id): key for key, event_id in PREDEFINED_EVENT_IDS.items()}
+
+def _flag(value):
+    return 1 if value in (True, 1, "true", "True") else 0
+
+class EventCatalog:
+    def __init__(self, path=CATALOG_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        # {event_key: event_id} of tracked catalog events, rebuilt per sync
+        self._tracked = self._select_tracked()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------------
+    # STATE
+    # -------------------------------
+    def get_state(self, name, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM sync_state WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, name, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+            (name, value)
+        )
+
+    def sync_due(self, now=None):
+        now = now or time.time()
+        return now - self.get_state("last_sync", 0) >= CATALOG_SYNC_INTERVAL
+
+    def full_sync_due(self, now=None):
+        now = now or time.time()
+        return now - self.get_state("last_full_sync", 0) >= CATALOG_FULL_SYNC_INTERVAL
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    # -------------------------------
+    # WRITES
+    # -------------------------------
+    def _assign_key(self, event_id, event, pinned):
+        if event_id in pinned:
+            return pinned[event_id]
+
+        row = self._conn.execute(
+            "SELECT event_key FROM events WHERE event_id = ?", (event_id,)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        key = slug_key(event.get("slug") or event.get("title")) or f"event_{event_id}"
+        taken = self._conn.execute(
+            "SELECT 1 FROM events WHERE event_key = ?", (key,)
+        ).fetchone()
+        if taken or key in PREDEFINED_EVENT_IDS:
+            key = f"{key}_{event_id}"
+        return key
+
+    def upsert_events(self, events, synced_at=None):
+        """
+        Inserts or updates Gamma events and replaces their markets.
+        Returns the number of events written.
+        """
+        synced_at = int(synced_at or time.time())
+        pinned = _pinned_keys()
+        written = 0
+
+        with self._lock, self._conn:
+            for event in events:
+                try:
+                    event_id = int(event["id"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO events "
+                    "(event_id, event_key, slug, title, category, tags, active, closed, "
+                    "volume, end_date, updated_at, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        event_id,
+                        self._assign_key(event_id, event, pinned),
+                        event.get("slug"),
+                        event.get("title") or "",
+                        categorize(event),
+                        json.dumps(event_tags(event)),
+                        _flag(event.get("active", True)),
+                        _flag(event.get("closed", False)),
+                        parse_volume(event.get("volume")),
+                        event.get("endDate"),
+                        parse_end_date(event.get("updatedAt")) or 0.0,
+                        synced_at,
+                    )
+                )
+
+                self._conn.execute("DELETE FROM markets WHERE event_id = ?", (event_id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO markets "
+                    "(market_id, event_id, question, slug, volume, end_date, closed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            str(market["id"]),
+                            event_id,
+                            market.get("question") or "",
+                            market.get("slug"),
+                            parse_volume(market.get("volume")),
+                            market.get("endDate"),
+                            _flag(market.get("closed", False)),
+                        )
+                        for market in event.get("markets") or []
+                        if market.get("id") is not None
+                    ]
+                )
+                written += 1
+
+        return written
+
+    # -------------------------------
+    # SYNC
+    # -------------------------------
+    def fetch_page(self, offset, full, session=None):
+        params = {
+            "limit": CATALOG_PAGE_SIZE,
+            "offset": offset,
+            "order": "updatedAt",
+            "ascending": "false",
+        }
+        # A full sync only lists open events; incremental syncs also see
+        # events that closed since the watermark
+        if full:
+            params["closed"] = "false"
+
+        resp = (session or SESSION).get(f"{GAMMA_BASE}/events", params=params, timeout=30)
+        resp.raise_for_status()
+        page = resp.json()
+        return page if isinstance(page, list) else []
+
+    def _resume_cursor(self):
+        offset = self.get_state("resume_offset")
+        if offset is None:
+            return None
+        return {
+            "offset": int(offset),
+            "full": bool(self.get_state("resume_full", 0)),
+            "newest": self.get_state("resume_newest", 0.0),
+            "started": self.get_state("resume_started", time.time()),
+        }
+
+    def _save_cursor(self, offset, full, newest, started):
+        with self._lock, self._conn:
+            self._set_state("resume_offset", offset)
+            self._set_state("resume_full", 1 if full else 0)
+            self._set_state("resume_newest", newest)
+            self._set_state("resume_started", started)
+            self._tracked = self._select_tracked()
+
+    def sync(self, full=False, session=None, budget=None):
+        """
+        Pages through Gamma events newer than the watermark (or every open
+        event when `full`). Returns a summary dict; the catalog is left
+        unchanged past the last page read if Gamma fails.
+
+        A sync cut short (CATALOG_MAX_PAGES, a Gamma error, or `budget`
+        refusing a page request) saves its offset, and the next sync
+        continues from there instead of relisting from the top; a pending
+        full relist also absorbs incremental syncs. The watermark only
+        advances once the listing was read down to it (or to its end).
+        `budget` is anything with try_spend(requests), charged one per page.
+        """
+        cursor = self._resume_cursor()
+        if cursor is not None and (cursor["full"] or not full):
+            full = cursor["full"]
+            offset, newest, started = cursor["offset"], cursor["newest"], cursor["started"]
+        else:
+            offset, newest, started = 0, None, time.time()
+
+        watermark = None if full else self.get_state("watermark")
+        newest = newest or watermark or 0.0
+        pages = written = 0
+        summary = {"ok": False, "full": full, "resumed": cursor is not None and offset > 0}
+
+        try:
+            while True:
+                if pages >= CATALOG_MAX_PAGES:
+                    print(f"⚠️ Catalog sync stopped at {CATALOG_MAX_PAGES} pages, resuming at offset {offset} next time")
+                    ERRORS.inc(source="catalog_sync")
+                    self._save_cursor(offset, full, newest, started)
+                    return dict(summary, pages=pages, events=written, offset=offset)
+
+                if budget is not None and not budget.try_spend(1):
+                    self._save_cursor(offset, full, newest, started)
+                    return dict(summary, deferred=True, pages=pages, events=written, offset=offset)
+
+                page = self.fetch_page(offset, full, session)
+                pages += 1
+                if not page:
+                    break
+
+                stamps = [parse_end_date(e.get("updatedAt")) or 0.0 for e in page]
+                newest = max([newest] + stamps)
+                fresh = [
+                    event for event, ts in zip(page, stamps)
+                    if watermark is None or ts >= watermark
+                ]
+                written += self.upsert_events(fresh, synced_at=started)
+
+                # Reached the watermark, or the end of the listing
+                if len(fresh) < len(page) or len(page) < CATALOG_PAGE_SIZE:
+                    break
+                offset += CATALOG_PAGE_SIZE
+
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Catalog sync failed after {pages} pages: {e}")
+            ERRORS.inc(source="catalog_sync")
+            self._save_cursor(offset, full, newest, started)
+            return dict(summary, pages=pages, events=written, offset=offset)
+
+        with self._lock, self._conn:
+            self._set_state("watermark", newest)
+            self._set_state("last_sync", started)
+            if full:
+                self._set_state("last_full_sync", started)
+            self._conn.execute("DELETE FROM sync_state WHERE name LIKE 'resume_%'")
+            self._tracked = self._select_tracked()
+
+        return dict(
+            summary,
+            ok=True,
+            pages=pages,
+            events=written,
+            tracked=len(self._tracked),
+            seconds=round(time.time() - started, 3),
+        )
+
+    # -------------------------------
+    # READS
+    # -------------------------------
+    def _select_tracked(self):
+        if not CATALOG_TRACKED_CATEGORIES or CATALOG_MAX_TRACKED <= 0:
+            return {}
+        categories = sorted(CATALOG_TRACKED_CATEGORIES)
+        rows = self._conn.execute(
+            "SELECT event_key, event_id FROM events "
+            f"WHERE category IN ({','.join('?' * len(categories))}) "
+            "AND active = 1 AND closed = 0 AND volume >= ? "
+            "ORDER BY volume DESC LIMIT ?",
+            (*categories, CATALOG_MIN_VOLUME, CATALOG_MAX_TRACKED)
+        ).fetchall()
+        return dict(rows)
+
+    def tracked(self):
+        return self._tracked
+
+    def event_id(self, event_key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT event_id FROM events WHERE event_key = ?", (event_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def events(self, category=None, limit=100):
+        """
+        Catalog events, busiest first.
+        """
+        query = (
+            "SELECT event_id, event_key, title, category, volume, end_date, closed "
+            "FROM events"
+        )
+        args = []
+        if category is not None:
+            query += " WHERE category = ?"
+            args.append(category)
+        query += " ORDER BY volume DESC LIMIT ?"
+        args.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [
+            {
+                "event_id": event_id,
+                "event_key": event_key,
+                "title": title,
+                "category": category,
+                "volume": volume,
+                "end_date": end_date,
+                "closed": bool(closed),
+            }
+            for event_id, event_key, title, category, volume, end_date, closed in rows
+        ]
+
+_CATALOG = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    global _CATALOG
+    with _catalog_lock:
+        if _CATALOG is None:
+            _CATALOG = EventCatalog()
+        return _CATALOG
+
+def tracked_events():
+    """
+    {event_key: event_id} for every event the fetcher follows: pinned
+    events first, then tracked catalog events not already pinned unless
+    CATALOG_SYNC is off.
+    """
+    tracked = dict(PREDEFINED_EVENT_IDS)
+    if not CATALOG_SYNC_ENABLED:
+        return tracked
+
+    pinned_ids = {int(event_id) for event_id in tracked.values()}
+    for key, event_id in get_catalog().tracked().items():
+        if event_id not in pinned_ids and key not in tracked:
+            tracked[key] = event_id
+    return tracked
+
+def event_id_for(event_key):
+    """
+    Gamma id for a pinned or catalog event key, or None.
+    """
+    if event_key in PREDEFINED_EVENT_IDS:
+        return PREDEFINED_EVENT_IDS[event_key]
+    return get_catalog().event_id(event_key)
+
+if __name__ == "__main__":
+    #   python -m catalog sync     # incremental (full on first run)
+    #   python -m catalog full     # every open event
+    #   python -m catalog list [category]
+    command = sys.argv[1] if len(sys.argv) > 1 else "sync"
+    catalog = get_catalog()
+
+    if command in ("sync", "full"):
+        full = command == "full" or catalog.get_state("watermark") is None
+        print(catalog.sync(full=full))
+    elif command == "list":
+        category = sys.argv[2] if len(sys.argv) > 2 else None
+        for event in catalog.events(category):
+            print(f"{event['event_key']:<48} {event['category'] or '-':<14} {event['volume']:>16,.0f}  {event['title']}")
+    else:
+        sys.exit(f"Unknown command: {command}")
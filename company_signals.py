@@ -77,4 +77,45 @@ def get_relevant_event_keys(company: str):
         for key in SIGNAL_CATEGORIES.get(group, []):
             event_keys.add(key)
 
-    return list(event_keys)
\ No newline at end of file
+    return list(event_keys)
+
+# Names that identify an underlying in market questions
+TICKER_ALIASES = {
+    "nvidia": "NVDA",
+    "microsoft": "MSFT",
+    "alphabet": "GOOGL",
+    "google": "GOOGL",
+    "amazon": "AMZN",
+    "apple": "AAPL",
+    "exxon": "XOM",
+    "chevron": "CVX",
+    "procter & gamble": "PG",
+    "coca-cola": "KO",
+    "johnson & johnson": "JNJ",
+    "pfizer": "PFE",
+    "jpmorgan": "JPM",
+    "bank of america": "BAC",
+    "tesla": "TSLA",
+    "microstrategy": "MSTR",
+    "bitcoin": "BTC",
+    "ethereum": "ETH",
+}
+
+# Only "reach" strikes at or above this level count towards confidence
+UPSIDE_STRIKE_FLOOR = {
+    "NVDA": 200,
+}
+
+def resolve_ticker(company: str):
+    company = company.strip()
+    return TICKER_ALIASES.get(company.lower(), company.upper())
+
+# The only stocks top_stocks may name, by sector (mirrors the engine prompt)
+STOCK_UNIVERSE = {
+    "Technology": [("NVIDIA", "NVDA"), ("Microsoft", "MSFT"), ("Alphabet", "GOOGL"),
+                   ("Amazon", "AMZN"), ("Apple", "AAPL")],
+    "Energy": [("Exxon Mobil", "XOM"), ("Chevron", "CVX")],
+    "Consumer Staples": [("Procter & Gamble", "PG"), ("Coca-Cola", "KO")],
+    "Healthcare": [("Johnson & Johnson", "JNJ"), ("Pfizer", "PFE")],
+    "Financials": [("JPMorgan Chase", "JPM"), ("Bank of America", "BAC")],
+}
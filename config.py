@@ -8,20 +8,69 @@ load_dotenv("key.env")
 # API KEYS
 # ===============================
 
+# Checked on the first LLM call (llm.get_llm_client), so data-only paths
+# such as a refresh run without it
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
 
-if not SARVAM_API_KEY:
-    raise RuntimeError("SARVAM_API_KEY not found in key.env")
-
 # ===============================
 # POLYMARKET CONFIG
 # ===============================
 
-GAMMA_BASE = "https://gamma-api.polymarket.com"
-CLOB_BASE = "https://clob.polymarket.com"
+# Overridable so a refresh can be pointed at a local stub server
+GAMMA_BASE = os.getenv("GAMMA_BASE", "https://gamma-api.polymarket.com")
+CLOB_BASE = os.getenv("CLOB_BASE", "https://clob.polymarket.com")
+
+# CLOB market-channel websocket for live prices
+CLOB_WS_URL = os.getenv("CLOB_WS_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market")
+LIVE_PRICES_ENABLED = os.getenv("LIVE_PRICES", "0") == "1"
+# Max seconds between live updates reaching the snapshot
+LIVE_PUBLISH_INTERVAL = 2
+LIVE_RECONNECT_MAX_DELAY = 30
+
+# Opt-in: needs urllib3 >= 2.3 with the h2 package installed
+HTTP2_ENABLED = os.getenv("POLYMARKET_HTTP2", "0") == "1"
+
+# Tokens per POST /midpoints request
+CLOB_BATCH_SIZE = 50
 
 CACHE_FILE = "polymarket_cache.json"
 
+# Per-event cache with fetch timestamps; CACHE_FILE stays the merged view
+EVENT_CACHE_FILE = "polymarket_event_cache.json"
+# "auto": msgpack next to EVENT_CACHE_FILE when installed; "json" or "msgpack" to force
+SNAPSHOT_FORMAT = os.getenv("SNAPSHOT_FORMAT", "auto")
+
+# Seconds an event stays fresh; an event takes the shortest TTL of its markets
+EVENT_CACHE_TTL = {
+    "default": 15 * 60,
+    "high_volume": 5 * 60,
+    "closing_soon": 2 * 60,
+}
+
+# Append-only SQLite history of every refresh
+HISTORY_DB = "polymarket_history.sqlite"
+
+# Group events (Fed cuts) are fetched on demand and reused for this long
+GROUP_EVENT_TTL = 5 * 60
+
+CLOSING_SOON_SECONDS = 24 * 60 * 60
+HIGH_VOLUME_THRESHOLD = 1_000_000
+
+# Max HTTP requests in flight during a refresh
+FETCH_CONCURRENCY = 16
+
+# Background refresher: tick, global budget, and cadence tuning
+REFRESH_TICK_SECONDS = 5
+REFRESH_REQUEST_BUDGET_PER_MINUTE = 120
+# Halve an event's cadence while any outcome moved at least this much
+REFRESH_MOVEMENT_THRESHOLD = 0.02
+REFRESH_MIN_INTERVAL = 30
+
+# Threads for blocking engine work behind the async API
+ENGINE_WORKER_THREADS = 32
+
+# Pinned events: signal maps and the engine refer to these keys. The
+# catalog below adds every other tracked event.
 PREDEFINED_EVENT_IDS = {
     "fed_decision_march": 67284,
     "treasury_yield_high": 79104,
@@ -33,3 +82,111 @@ PREDEFINED_EVENT_IDS = {
     "nvidia_february_2026": 186955,
     "fed_rate_cuts_2026": 51456,
 }
+
+# ===============================
+# EVENT CATALOG
+# ===============================
+
+# SQLite index of Gamma events, synced from the paged /events listing.
+# Opt-in: with CATALOG_SYNC unset only the pinned events are followed
+CATALOG_DB = "polymarket_catalog.sqlite"
+CATALOG_SYNC_ENABLED = os.getenv("CATALOG_SYNC", "0") == "1"
+CATALOG_PAGE_SIZE = 500
+# Safety stop for a single sync
+CATALOG_MAX_PAGES = 100
+# Incremental sync cadence, and how often to relist every open event
+CATALOG_SYNC_INTERVAL = 15 * 60
+CATALOG_FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+# First match on title / slug / tag labels wins
+CATALOG_CATEGORY_RULES = [
+    ("rates", r"\b(fed|fomc|interest rates?|rate (cut|hike)s?|treasury|yields?|powell)\b"),
+    ("inflation", r"\b(inflation|cpi|pce)\b"),
+    ("recession", r"\b(recession|gdp|unemployment|jobs report|nonfarm)\b"),
+    ("liquidity", r"\b(liquidity|balance sheet|quantitative (easing|tightening)|repo)\b"),
+    ("crypto", r"\b(bitcoin|btc|ethereum|eth|solana|crypto|microstrategy)\b"),
+    ("ai_progress", r"\b(ai|openai|anthropic|gpt|gemini|frontiermath|agi)\b"),
+    ("equities", r"\b(s&p|nasdaq|dow jones|earnings|stocks?|ipo|market cap|nvidia|apple|microsoft|tesla|amazon|google|meta)\b"),
+    ("politics", r"\b(elections?|president|senate|congress|tariffs?)\b"),
+]
+
+# Open catalog events in these categories are fetched alongside the
+# pinned ones, busiest first
+CATALOG_TRACKED_CATEGORIES = {"rates", "inflation", "recession", "liquidity", "crypto", "ai_progress", "equities"}
+CATALOG_MIN_VOLUME = 100_000
+CATALOG_MAX_TRACKED = int(os.getenv("CATALOG_MAX_TRACKED", "50"))
+
+# ===============================
+# LLM CLIENT
+# ===============================
+
+# Keep-alive connections shared by every LLM call in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# ===============================
+# LLM SCHEDULER
+# ===============================
+
+# Calls in flight across all lanes
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Token bucket: sustained calls per second and burst size (0 = unlimited)
+LLM_RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "4"))
+LLM_BURST = int(os.getenv("LLM_BURST", "8"))
+
+# Priority order: dashboard requests before batch jobs
+LLM_LANES = ("interactive", "batch")
+# Batch never holds every slot, so interactive calls start promptly
+LLM_LANE_MAX_ACTIVE = {"batch": max(1, LLM_MAX_CONCURRENCY // 2)}
+# Callers waiting per lane before new ones are shed with a 503
+LLM_QUEUE_MAX = {"interactive": 32, "batch": 256}
+# Seconds a caller may wait for a slot before it is shed
+LLM_QUEUE_TIMEOUT = {"interactive": 20.0, "batch": 300.0}
+
+# 429 / 5xx retries; Retry-After is honoured up to LLM_BACKOFF_MAX
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 30.0
+
+# ===============================
+# LLM RESPONSE CACHE
+# ===============================
+
+LLM_CACHE_MAX_ENTRIES = 256
+LLM_CACHE_TTL = 10 * 60
+# Set to persist cached answers across restarts
+LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE")
+
+# ===============================
+# PROMPT COMPACTION
+# ===============================
+
+# Approximate tokens allowed for INPUT DATA in the engine prompt
+PROMPT_MARKET_TOKEN_BUDGET = int(os.getenv("PROMPT_MARKET_TOKEN_BUDGET", "2000"))
+# "volume" or "information" (outcome entropy)
+PROMPT_RANK_BY = "volume"
+
+# ===============================
+# BATCH ANALYSIS
+# ===============================
+
+# Model context window used to pack several portfolios into one prompt
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "16000"))
+# Tokens reserved for each packed portfolio's JSON answer
+LLM_OUTPUT_TOKENS_PER_ITEM = 700
+LLM_BATCH_MAX_ITEMS = 8
+BATCH_LLM_CONCURRENCY = 4
+
+# ===============================
+# MARKET SEARCH
+# ===============================
+
+# Query terms shorter than this only match whole words
+SEARCH_MIN_PREFIX = 2
+# Vocabulary words a single prefix may expand to
+SEARCH_MAX_EXPANSIONS = 64
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+# A market's rank weight (log volume) halves for every this many seconds
+# since its prices or volume last changed
+SEARCH_RECENCY_HALF_LIFE = 6 * 60 * 60
@@ -1,46 +1,104 @@
-import json
-import re
-from market_data import fetch_all_market_data, attach_event_keys
-from signals import compute_company_signal
-from llm import call_llm, get_llm_client
+import math
+from pydantic import ValidationError
+from market_data import attach_event_keys
+from price_ladder import compute_company_signals
+from llm import call_llm, get_llm_client, stream_llm
+from llm_scheduler import LLMOverloaded
 from company_signals import get_relevant_event_keys
 from signals import compute_fed_rate_cut_signal
 from config import PREDEFINED_EVENT_IDS
 from market_data import fetch_group_event
+from market_table import MarketTable
+from snapshot import get_snapshot
+from llm_cache import LLM_CACHE, cache_key
+from prompt_compaction import compact_market_data, estimate_tokens, MARKET_KEY_LEGEND
+from metrics import span, ERRORS, LLM_PARSE_FAILURES, PROMPT_TOKENS
+from json_stream import StreamingJSONParser, extract_json
+from schemas import AnalysisOutput, AssetOutlook, TopStock, ANALYSIS_FIELDS
+from serialization import dumps_text
+from fast_engine import (
+    derive_analysis,
+    build_reasoning_prompt,
+    merge_reasoning,
+    RECESSION_EVENT,
+    INFLATION_EVENT,
+)
 
 GROUP_EVENTS = {
     "fed_rate_cuts_2026",
 }
 
 # -------------------------------
-# JSON EXTRACTION (ROBUST)
+# OUTPUT VALIDATION
 # -------------------------------
-def extract_json(text: str) -> dict:
-    text = text.strip()
-
-    # Remove ```json fences if present
-    if text.startswith("```"):
-        text = re.sub(r"^```[a-zA-Z]*\n?", "", text)
-        text = re.sub(r"\n?```$", "", text)
+def _valid(model, entry):
+    try:
+        model.model_validate(entry)
+        return True
+    except ValidationError:
+        return False
 
-    # Extract largest JSON block
-    match = re.search(r"\{[\s\S]*\}", text)
-    if not match:
-        raise ValueError("No JSON object found")
+def drop_invalid_entries(field: str, value):
+    """
+    asset_outlook / top_stocks without the entries that fail their model,
+    so one bad asset or stock does not sink the whole response. Anything
+    else is returned as is.
+    """
+    if field == "asset_outlook" and isinstance(value, dict):
+        return {name: entry for name, entry in value.items() if _valid(AssetOutlook, entry)}
+    if field == "top_stocks" and isinstance(value, list):
+        return [entry for entry in value if _valid(TopStock, entry)]
+    return value
 
-    candidate = match.group(0)
+def validate_output(parsed_output: dict) -> dict:
+    """
+    Checks the parsed LLM output against AnalysisOutput, after dropping
+    invalid asset_outlook and top_stocks entries. Raises
+    pydantic.ValidationError; unknown fields are dropped.
+    """
+    parsed_output = {
+        field: drop_invalid_entries(field, value)
+        for field, value in parsed_output.items()
+    }
+    return AnalysisOutput.model_validate(parsed_output).model_dump()
 
-    # Fix common trailing comma issues
-    candidate = re.sub(r",\s*}", "}", candidate)
-    candidate = re.sub(r",\s*]", "]", candidate)
+def validate_field(field: str, value):
+    """
+    One top-level field checked on its own, or None if it is unknown or
+    invalid.
+    """
+    adapter = ANALYSIS_FIELDS.get(field)
+    if adapter is None:
+        return None
+    value = drop_invalid_entries(field, value)
+    try:
+        return adapter.dump_python(adapter.validate_python(value))
+    except ValidationError:
+        return None
 
-    return json.loads(candidate)
+def validation_errors(e: ValidationError) -> list:
+    return [
+        {"loc": ".".join(str(part) for part in error["loc"]), "msg": error["msg"]}
+        for error in e.errors()
+    ]
 
+def overloaded_result(e: LLMOverloaded) -> dict:
+    """
+    Result for a call the LLM scheduler shed; the API answers it with 503.
+    """
+    return {
+        "error": "LLM_OVERLOADED",
+        "message": str(e),
+        "retry_after": max(1, math.ceil(e.retry_after or 1))
+    }
 
 # -------------------------------
 # MARKET DATA COMPRESSION
 # -------------------------------
 def compress_market_data(market_data):
+    if isinstance(market_data, MarketTable):
+        return market_data.compress()
+
     return [
         {
             "event_key": m["event_key"],
@@ -69,20 +127,43 @@ def enforce_asset_keys(parsed_output: dict, companies: list) -> dict:
 # -------------------------------
 # CORE ENGINE
 # -------------------------------
-def run_engine(selected_events: list, companies: list):
-    # --- 1. Resolve GROUP events (Fed cuts etc.) ---
-    group_events = {}
-
-    for key in selected_events:
-        if key in GROUP_EVENTS:
-            event = fetch_group_event(key)
-            if event:
-                group_events[key] = event
-
-    # --- 2. Load ALL flattened market data once ---
-    all_markets = fetch_all_market_data()
+def run_engine(selected_events: list, companies: list, snapshot=None, mode="llm"):
+    """
+    Runs the full pipeline and returns the validated, guardrailed output.
+    """
+    result = None
+    for event, data in run_engine_stream(
+        selected_events, companies, snapshot, stream_llm_output=False, mode=mode
+    ):
+        if event == "result":
+            result = data
+    return result
+
+def run_engine_stream(selected_events: list, companies: list, snapshot=None, stream_llm_output=True, mode="llm"):
+    """
+    Same pipeline as run_engine, yielding (event, data) as each part is ready.
+
+    mode:
+    - "llm": the LLM produces the analysis
+    - "fast": deterministic rules only, no LLM call
+    - "fast_reasoning": rules, with the LLM rewriting only reasoning strings
+
+    Events:
+
+    - "markets": compressed markets for the selected events
+    - "company_signals"
+    - "fed_signal"
+    - "llm_delta": raw LLM text chunks (only when streaming the LLM)
+    - "partial": {field: value} for each top-level output field that
+      parsed and validated while the LLM was still generating (before
+      guardrails; "result" is authoritative)
+    - "result": the validated, guardrailed output
+    """
+    # --- 1. Use the in-memory snapshot (loaded once, hot-swapped on refresh) ---
+    with span("engine.snapshot"):
+        snapshot = snapshot or get_snapshot()
 
-    # --- 3. Decide which event_keys are allowed ---
+    # --- 2. Decide which event_keys are allowed ---
     event_keys = set(selected_events)
 
     # OPTIONAL: auto-expand only if explicitly enabled
@@ -92,30 +173,177 @@ def run_engine(selected_events: list, companies: list):
         for company in companies:
             event_keys.update(get_relevant_event_keys(company))
 
-    # --- 4. Filter flattened markets ---
-    market_data = [
-        m for m in all_markets
-        if m["event_key"] in event_keys
-    ]
+    # --- 3. Filter flattened markets ---
+    with span("engine.filter"):
+        selected_markets = snapshot.table_for(event_keys)
+
+    # --- 4. Compress data ---
+    with span("engine.compress"):
+        market_data = compress_market_data(selected_markets)
+    yield "markets", market_data
+
+    # --- 5. Compute COMPANY signals ---
+    with span("engine.company_signals"):
+        company_signals = compute_company_signals(
+            companies,
+            snapshot.ladder,
+            event_codes=snapshot.event_codes_for(event_keys)
+        )
+    yield "company_signals", company_signals
 
+    # --- 6. Resolve GROUP events (Fed cuts etc.) and their signals ---
+    group_events = {}
 
-    # --- 5. Compress data ---
-    market_data = compress_market_data(market_data)
+    with span("engine.group_events"):
+        for key in selected_events:
+            if key in GROUP_EVENTS:
+                event = fetch_group_event(key)
+                if event:
+                    group_events[key] = event
 
-    # --- 6. Compute GROUP signals ---
     fed_signal = None
     if "fed_rate_cuts_2026" in group_events:
-        fed_signal = compute_fed_rate_cut_signal(
-            group_events["fed_rate_cuts_2026"]
+        with span("engine.fed_signal"):
+            fed_signal = compute_fed_rate_cut_signal(
+                group_events["fed_rate_cuts_2026"]
+            )
+    yield "fed_signal", fed_signal
+
+    # --- 7. Deterministic fast mode ---
+    if mode in ("fast", "fast_reasoning"):
+        with span("engine.fast"):
+            analysis = derive_analysis(
+                fed_signal,
+                company_signals,
+                snapshot.markets_for([RECESSION_EVENT, INFLATION_EVENT]),
+                companies
+            )
+            analysis = enforce_recession_guardrails(analysis)
+
+        if mode == "fast_reasoning":
+            analysis = fill_reasoning(analysis, snapshot.cache_version)
+
+        yield "result", analysis
+        return
+
+    # --- 8. Reuse the answer for byte-identical prompt inputs ---
+    with span("engine.cache_lookup"):
+        response_key = cache_key(
+            fed_signal=fed_signal,
+            company_signals=company_signals,
+            market_data=market_data,
+            companies=companies
         )
+        cached = LLM_CACHE.get(response_key, snapshot.cache_version)
+    if cached is not None:
+        yield "result", cached
+        return
+
+    # --- 9. Fit market data into the prompt token budget ---
+    with span("engine.prompt_build"):
+        prompt_market_data, compaction = compact_market_data(selected_markets)
+        prompt = build_prompt(fed_signal, company_signals, prompt_market_data)
+
+    print(
+        f"🧮 Prompt market data: {compaction['tokens_before']} -> "
+        f"{compaction['tokens_after']} tokens "
+        f"({compaction['markets_after']}/{compaction['markets_before']} markets)"
+    )
+    PROMPT_TOKENS.observe(estimate_tokens(prompt), mode="llm")
+
+    # --- 10. Call LLM ---
+    try:
+        client = get_llm_client()
+    except Exception as e:
+        ERRORS.inc(source="llm_client")
+        yield "result", {"error": "LLM_UNAVAILABLE", "message": str(e)}
+        return
+    parser = None
+    try:
+        if stream_llm_output:
+            # Parsed incrementally, so the object is ready when the stream ends
+            parser = StreamingJSONParser()
+            chunks = []
+            for chunk in stream_llm(client, prompt):
+                chunks.append(chunk)
+                yield "llm_delta", chunk
+
+                for field, value in parser.feed(chunk):
+                    if field == "asset_outlook" and isinstance(value, dict):
+                        value = enforce_asset_keys({field: value}, companies)[field]
+                    value = validate_field(field, value)
+                    if value is not None:
+                        yield "partial", {field: value}
+            raw_output = "".join(chunks)
+        else:
+            raw_output = call_llm(client, prompt)
+    except LLMOverloaded as e:
+        yield "result", overloaded_result(e)
+        return
+
+    # --- 11. Parse + validate output ---
+    try:
+        with span("engine.parse"):
+            if parser is not None and parser.done:
+                parsed_output = parser.finish()
+            else:
+                parsed_output = extract_json(raw_output)
+            parsed_output = enforce_asset_keys(parsed_output, companies)
+            parsed_output = validate_output(parsed_output)
 
-    # --- 7. Compute COMPANY signals ---
-    company_signals = {
-        c: compute_company_signal(c, market_data)
-        for c in companies
-    }
-    # 5. Build prompt
-    prompt = f"""
+            # 🔒 ADD THIS LINE
+            parsed_output = enforce_recession_guardrails(parsed_output)
+
+        LLM_CACHE.put(response_key, snapshot.cache_version, parsed_output)
+
+    except ValidationError as e:
+        LLM_PARSE_FAILURES.inc(mode="llm", reason="schema")
+        parsed_output = {
+            "error": "LLM_OUTPUT_INVALID",
+            "message": f"{e.error_count()} schema violations",
+            "errors": validation_errors(e),
+            "raw_output": raw_output[:1500] if isinstance(raw_output, str) else str(raw_output)
+        }
+
+    except Exception as e:
+        LLM_PARSE_FAILURES.inc(mode="llm", reason="syntax")
+        parsed_output = {
+            "error": "LLM_OUTPUT_PARSE_FAILED",
+            "message": str(e),
+            "raw_output": raw_output[:1500] if isinstance(raw_output, str) else str(raw_output)
+        }
+
+    yield "result", parsed_output
+
+def fill_reasoning(analysis: dict, version) -> dict:
+    """
+    Lets the LLM rewrite reasoning strings only. Template reasoning is kept
+    if the call or its parse fails.
+    """
+    key = cache_key(mode="fast_reasoning", analysis=analysis)
+    cached = LLM_CACHE.get(key, version)
+    if cached is not None:
+        return cached
+
+    prompt = build_reasoning_prompt(analysis)
+    PROMPT_TOKENS.observe(estimate_tokens(prompt), mode="fast_reasoning")
+
+    raw_output = None
+    try:
+        raw_output = call_llm(get_llm_client(), prompt)
+        analysis = merge_reasoning(analysis, extract_json(raw_output))
+        LLM_CACHE.put(key, version, analysis)
+    except Exception as e:
+        print(f"⚠️ Reasoning fill failed, keeping templates: {e}")
+        if raw_output is not None:
+            LLM_PARSE_FAILURES.inc(mode="fast_reasoning", reason="syntax")
+
+    return analysis
+
+# -------------------------------
+# PROMPT
+# -------------------------------
+PROMPT_INTRO = """
 You are a deterministic macro market intelligence engine.
 You must strictly follow rules and output valid JSON only.
 
@@ -123,15 +351,10 @@ You are given probabilistic market signals derived from live market data.
 Your job is to infer the current macro regime and produce
 a regime-consistent outlook for selected assets and stocks.
 
-FED RATE CUT SIGNAL:
-{json.dumps(fed_signal, indent=2)}
-
-COMPANY SIGNALS:
-{json.dumps(company_signals, indent=2)}
+"""
 
-INPUT DATA:
-{json.dumps(market_data, indent=2)}
-STOCK SELECTION UNIVERSE:
+# Stock universe, output schema and rules shared by every prompt
+PROMPT_RULES = """STOCK SELECTION UNIVERSE:
 You may ONLY select stocks from the following list.
 t
 Technology:
@@ -160,43 +383,43 @@ Financials:
 OUTPUT REQUIREMENTS:
 Return ONE valid JSON object with the following structure:
 
-{{
-  "market_sentiment": {{
+{
+  "market_sentiment": {
     "label": "Bullish | Neutral | Bearish",
     "score": integer between 0 and 100
-  }},
-  "market_regime": {{
+  },
+  "market_regime": {
     "risk": "Risk-On | Risk-Off | Transitional",
     "liquidity": "Easing | Neutral | Tightening",
     "volatility": "Low | Normal | Elevated"
-  }},
-  "crowd_signals": {{
+  },
+  "crowd_signals": {
     "fed_policy_bias": "",
     "recession_probability": number between 0 and 1,
     "rate_cut_bias": ""
-  }},
-  "asset_outlook": {{
-    "<asset_name>": {{
+  },
+  "asset_outlook": {
+    "<asset_name>": {
       "bias": "Positive | Neutral | Negative",
       "confidence": number between 0 and 1,
       "reasoning": ""
-    }}
-  }},
+    }
+  },
   "top_stocks": [
-    {{
+    {
       "name": "",
       "ticker": "",
       "sector": "",
       "reasoning": "",
       "expected_outperformance": "Moderate | High"
-    }}
+    }
   ],
-  "risk_indicators": {{
+  "risk_indicators": {
     "bubble_risk": integer between 0 and 100,
     "market_fragility": integer between 0 and 100,
     "upside_probability": integer between 0 and 100
-  }}
-}}
+  }
+}
 STOCK SELECTION RULES(Mandatory):
 - Each selected stock MUST be explicitly justified by the inferred macro regime
 - In Risk-Off regimes, prefer defensive sectors (Healthcare, Staples, Energy)
@@ -249,26 +472,23 @@ Sentiment scoring guidance:
 Return ONLY valid JSON.
 """
 
-    # 6. Call LLM
-    client = get_llm_client()
-    raw_output = call_llm(client, prompt)
-
-    # 7. Parse + validate output
-    try:
-        parsed_output = extract_json(raw_output)
-        parsed_output = enforce_asset_keys(parsed_output, companies)
+def prompt_inputs(fed_signal, company_signals, prompt_market_data) -> str:
+    return f"""FED RATE CUT SIGNAL:
+{dumps_text(fed_signal, indent=True)}
 
-        # 🔒 ADD THIS LINE
-        parsed_output = enforce_recession_guardrails(parsed_output)
+COMPANY SIGNALS:
+{dumps_text(company_signals, indent=True)}
 
-    except Exception as e:
-        parsed_output = {
-            "error": "LLM_OUTPUT_PARSE_FAILED",
-            "message": str(e),
-            "raw_output": raw_output[:1500] if isinstance(raw_output, str) else str(raw_output)
-        }
+INPUT DATA ({MARKET_KEY_LEGEND}):
+{prompt_market_data}
+"""
 
-    return parsed_output
+def build_prompt(fed_signal, company_signals, prompt_market_data) -> str:
+    return (
+        PROMPT_INTRO
+        + prompt_inputs(fed_signal, company_signals, prompt_market_data)
+        + PROMPT_RULES
+    )
 
 def enforce_recession_guardrails(output: dict) -> dict:
     """
@@ -287,7 +507,7 @@ def enforce_recession_guardrails(output: dict) -> dict:
             sentiment["label"] = "Neutral"
 
         # Cap sentiment score
-        if "score" in sentiment:
+        if sentiment.get("score") is not None:
             sentiment["score"] = min(sentiment["score"], 60)
 
         # Risk regime cannot be Risk-On
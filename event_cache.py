@@ -0,0 +1,155 @@
+import os, time
+from datetime import datetime, timezone
+from config import (
+    CACHE_FILE,
+    EVENT_CACHE_FILE,
+    EVENT_CACHE_TTL,
+    CLOSING_SOON_SECONDS,
+    HIGH_VOLUME_THRESHOLD,
+)
+from serialization import load_document, save_document, read_json_file
+
+def parse_end_date(end_date):
+    """
+    Gamma endDate ("2026-03-18T00:00:00Z") -> epoch seconds, or None.
+    """
+    if not end_date:
+        return None
+    try:
+        dt = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def parse_volume(volume):
+    try:
+        return float(volume or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+def market_ttl(record, now=None):
+    """
+    How long one market's probabilities stay fresh:
+    - closing within CLOSING_SOON_SECONDS -> "closing_soon"
+    - volume above HIGH_VOLUME_THRESHOLD -> "high_volume"
+    - otherwise "default"
+    """
+    now = now or time.time()
+    ttl = EVENT_CACHE_TTL["default"]
+
+    end_ts = parse_end_date(record.get("end_date"))
+    if end_ts is not None and 0 <= end_ts - now <= CLOSING_SOON_SECONDS:
+        ttl = min(ttl, EVENT_CACHE_TTL["closing_soon"])
+
+    if parse_volume(record.get("volume")) >= HIGH_VOLUME_THRESHOLD:
+        ttl = min(ttl, EVENT_CACHE_TTL["high_volume"])
+
+    return ttl
+
+def event_ttl(records, now=None):
+    # An event is as short-lived as its busiest market
+    if not records:
+        return EVENT_CACHE_TTL["default"]
+    return min(market_ttl(r, now) for r in records)
+
+class EventCache:
+    """
+    Per-event slice of the market snapshot:
+
+    {event_key: {"event_id": ..., "fetched_at": epoch, "records": [...],
+                 "tokens": {token_id: [market_id, label, raw price]}}}
+    """
+
+    def __init__(self, path=EVENT_CACHE_FILE):
+        self.path = path
+        self.entries = {}
+
+    @classmethod
+    def load(cls, path=EVENT_CACHE_FILE):
+        cache = cls(path)
+
+        # msgpack or JSON, whichever was saved last
+        entries = load_document(path)
+        if entries is not None:
+            cache.entries = entries
+        elif os.path.exists(CACHE_FILE):
+            cache._seed_from_snapshot(CACHE_FILE)
+
+        return cache
+
+    def _seed_from_snapshot(self, snapshot_path):
+        # Older flat snapshots carry no timestamps; treat them as fetched
+        # when the file was last written.
+        fetched_at = os.path.getmtime(snapshot_path)
+
+        records = read_json_file(snapshot_path)
+
+        for record in records:
+            entry = self.entries.setdefault(record["event_key"], {
+                "event_id": record["event_id"],
+                "fetched_at": fetched_at,
+                "records": [],
+            })
+            entry["records"].append(record)
+
+    def is_stale(self, key, now=None):
+        now = now or time.time()
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+        age = now - entry["fetched_at"]
+        return age > event_ttl(entry["records"], now)
+
+    def stale_keys(self, keys, now=None):
+        now = now or time.time()
+        return [key for key in keys if self.is_stale(key, now)]
+
+    def update(self, key, event_id, records, fetched_at=None, tokens=None):
+        self.entries[key] = {
+            "event_id": event_id,
+            "fetched_at": fetched_at or time.time(),
+            "records": records,
+            "tokens": tokens or {},
+        }
+
+    def token_index(self, keys=None):
+        """
+        {token_id: (market_id, label)} across the cached events. Entries
+        seeded from an old flat snapshot have no tokens until refetched.
+        """
+        keys = self.entries.keys() if keys is None else keys
+        return {
+            token_id: (str(market[0]), market[1])
+            for key in keys
+            for token_id, market in self.entries.get(key, {}).get("tokens", {}).items()
+        }
+
+    def market_prices(self, keys=None):
+        """
+        {market_id: {"raw": {label: raw price}, "fetched_at": epoch}} for
+        the cached events. Token maps saved before raw prices were kept
+        are skipped until refetched.
+        """
+        keys = self.entries.keys() if keys is None else keys
+        markets = {}
+        for key in keys:
+            entry = self.entries.get(key, {})
+            for market in entry.get("tokens", {}).values():
+                if len(market) < 3:
+                    continue
+                market_id, label, price = market
+                state = markets.setdefault(str(market_id), {"raw": {}, "fetched_at": entry["fetched_at"]})
+                state["raw"][label] = price
+        return markets
+
+    def records(self, keys):
+        return [
+            record
+            for key in keys
+            for record in self.entries.get(key, {}).get("records", [])
+        ]
+
+    def save(self):
+        save_document(self.path, self.entries)
@@ -0,0 +1,261 @@
+import json
+from company_signals import STOCK_UNIVERSE, resolve_ticker
+
+# ===============================
+# DETERMINISTIC FAST MODE
+# ===============================
+# Derives the full /analyze response from the computed signals with the
+# same rules the LLM prompt spells out, and no LLM call. Reasoning strings
+# are short templates; mode "fast_reasoning" asks the LLM to rewrite only
+# those. Values without a signal behind them are emitted as null rather
+# than a made-up midpoint.
+
+RECESSION_EVENT = "us_recession_2026"
+INFLATION_EVENT = "inflation_2026"
+
+DEFENSIVE_SECTORS = ["Healthcare", "Consumer Staples", "Energy"]
+GROWTH_SECTORS = ["Technology"]
+
+def _yes(record):
+    return record["outcomes"].get("Yes")
+
+def recession_probability(markets):
+    probs = [_yes(m) for m in markets if m["event_key"] == RECESSION_EVENT and _yes(m) is not None]
+    return round(max(probs), 3) if probs else None
+
+def inflation_pressure(markets):
+    probs = [_yes(m) for m in markets if m["event_key"] == INFLATION_EVENT and _yes(m) is not None]
+    return sum(probs) / len(probs) if probs else None
+
+def policy_biases(fed_signal):
+    """
+    (fed_policy_bias, rate_cut_bias) from the FED RATE CUT SIGNAL.
+    """
+    expected = (fed_signal or {}).get("expected_cuts")
+    if expected is None:
+        return "Unknown", "Unknown"
+
+    fed_policy_bias = (
+        "Dovish" if expected >= 3
+        else "Neutral" if expected >= 1
+        else "Hawkish"
+    )
+    rate_cut_bias = (
+        "Likely" if expected >= 2
+        else "Possible" if expected >= 1
+        else "Unlikely"
+    )
+    return fed_policy_bias, rate_cut_bias
+
+def derive_regime(recession_prob, inflation, fed_policy_bias, rate_cut_bias, fed_signal):
+    rec = recession_prob
+
+    if rec is None:
+        risk = "Unknown"
+    elif rec > 0.6:
+        risk = "Risk-Off"
+    elif rec < 0.35 and fed_policy_bias != "Hawkish":
+        risk = "Risk-On"
+    else:
+        risk = "Transitional"
+
+    if fed_policy_bias == "Dovish":
+        liquidity = "Easing"
+    elif fed_policy_bias == "Hawkish":
+        liquidity = "Tightening"
+    else:
+        liquidity = "Neutral"
+
+    # Sticky inflation caps easing; hawkish + no cuts can never be easing
+    if liquidity == "Easing" and inflation is not None and inflation > 0.7:
+        liquidity = "Neutral"
+    if fed_policy_bias == "Hawkish" and rate_cut_bias == "Unlikely" and liquidity == "Easing":
+        liquidity = "Neutral"
+
+    variance = (fed_signal or {}).get("variance") or 0.0
+    if variance >= 2 or (rec is not None and 0.4 <= rec <= 0.6):
+        volatility = "Elevated"
+    elif rec is None:
+        volatility = "Unknown"
+    elif rec < 0.2 and variance < 0.5:
+        volatility = "Low"
+    else:
+        volatility = "Normal"
+
+    return {"risk": risk, "liquidity": liquidity, "volatility": volatility}
+
+def derive_sentiment(recession_prob, regime):
+    rec = recession_prob
+    if rec is None:
+        return {"label": "Unknown", "score": None}
+
+    liquidity_boost = {"Easing": 1.0, "Neutral": 0.5, "Tightening": 0.0}[regime["liquidity"]]
+
+    score = round(100 * (0.7 * (1 - rec) + 0.3 * liquidity_boost))
+    if regime["volatility"] == "Elevated":
+        score = min(score, 60)
+    score = max(0, min(100, score))
+
+    label = "Bearish" if score <= 30 else "Neutral" if score <= 60 else "Bullish"
+    return {"label": label, "score": score}
+
+def derive_asset_outlook(companies, company_signals, regime):
+    outlook = {}
+    for company in companies:
+        signal = company_signals.get(company) or {}
+        confidence = signal.get("confidence")
+        avg = signal.get("avg_probability")
+
+        if confidence is None:
+            bias = "Negative" if regime["risk"] == "Risk-Off" else "Neutral"
+            outlook[company] = {
+                "bias": bias,
+                "confidence": None,
+                "reasoning": (
+                    "No direct price signal."
+                    if regime["risk"] == "Unknown"
+                    else f"No direct price signal. Bias follows {regime['risk']} regime."
+                )
+            }
+            continue
+
+        if avg >= 0.6 and regime["risk"] != "Risk-Off":
+            bias = "Positive"
+        elif avg < 0.4:
+            bias = "Negative"
+        else:
+            bias = "Neutral"
+
+        outlook[company] = {
+            "bias": bias,
+            "confidence": confidence,
+            "reasoning": (
+                f"Upside targets average {avg:.2f} with dispersion "
+                f"{signal.get('dispersion', 0):.2f} in a {regime['risk']} regime."
+            )
+        }
+    return outlook
+
+def select_top_stocks(regime, company_signals):
+    # No regime, no basis for sector picks
+    if regime["risk"] == "Unknown":
+        return []
+
+    if regime["risk"] == "Risk-Off":
+        sectors = DEFENSIVE_SECTORS
+    elif regime["risk"] == "Risk-On":
+        sectors = GROWTH_SECTORS + ["Financials"]
+    else:
+        sectors = ["Technology", "Healthcare", "Energy"]
+
+    confidence_by_ticker = {
+        resolve_ticker(company): signal.get("confidence") or 0
+        for company, signal in company_signals.items()
+        if signal
+    }
+
+    # Round-robin across the preferred sectors, strongest signal first
+    ranked = {
+        sector: sorted(
+            STOCK_UNIVERSE[sector],
+            key=lambda stock: -confidence_by_ticker.get(stock[1], 0)
+        )
+        for sector in sectors
+    }
+
+    picks = []
+    while len(picks) < 3 and any(ranked.values()):
+        for sector in sectors:
+            if ranked[sector] and len(picks) < 3:
+                name, ticker = ranked[sector].pop(0)
+                confidence = confidence_by_ticker.get(ticker, 0)
+                picks.append({
+                    "name": name,
+                    "ticker": ticker,
+                    "sector": sector,
+                    "reasoning": f"{sector} fits a {regime['risk']} regime with {regime['liquidity'].lower()} liquidity.",
+                    "expected_outperformance": (
+                        "High" if regime["risk"] == "Risk-On" and confidence > 0.6
+                        else "Moderate"
+                    )
+                })
+    return picks
+
+def derive_risk_indicators(recession_prob, fed_signal, company_signals, sentiment):
+    rec = recession_prob
+    if rec is None:
+        return {"bubble_risk": None, "market_fragility": None, "upside_probability": None}
+
+    variance = (fed_signal or {}).get("variance") or 0.0
+
+    upside = [s["avg_probability"] for s in company_signals.values() if s and s.get("avg_probability") is not None]
+    optimism = sum(upside) / len(upside) if upside else sentiment["score"] / 100
+
+    return {
+        "bubble_risk": round(100 * optimism * (1 - rec)),
+        "market_fragility": round(100 * max(rec, min(variance / 4, 1.0))),
+        "upside_probability": round(100 * (1 - rec))
+    }
+
+def derive_analysis(fed_signal, company_signals, markets, companies):
+    """
+    Full response schema from deterministic rules.
+
+    markets are flattened records for the recession and inflation events,
+    taken from the whole snapshot so crowd signals do not depend on which
+    events were selected.
+    """
+    recession_prob = recession_probability(markets)
+    inflation = inflation_pressure(markets)
+    fed_policy_bias, rate_cut_bias = policy_biases(fed_signal)
+    regime = derive_regime(recession_prob, inflation, fed_policy_bias, rate_cut_bias, fed_signal)
+    sentiment = derive_sentiment(recession_prob, regime)
+
+    return {
+        "market_sentiment": sentiment,
+        "market_regime": regime,
+        "crowd_signals": {
+            "fed_policy_bias": fed_policy_bias,
+            "recession_probability": recession_prob,
+            "rate_cut_bias": rate_cut_bias
+        },
+        "asset_outlook": derive_asset_outlook(companies, company_signals, regime),
+        "top_stocks": select_top_stocks(regime, company_signals),
+        "risk_indicators": derive_risk_indicators(recession_prob, fed_signal, company_signals, sentiment)
+    }
+
+# -------------------------------
+# OPTIONAL LLM REASONING
+# -------------------------------
+def build_reasoning_prompt(analysis: dict) -> str:
+    return f"""
+You are a macro market intelligence engine.
+The analysis below is final. Do NOT change any label, number or stock.
+Write one reasoning string per asset and per stock.
+
+ANALYSIS:
+{json.dumps(analysis, separators=(",", ":"))}
+
+RULES:
+- Reasoning strings MUST be ≤ 25 words
+- Reference signal strength and dispersion where available
+- Do NOT mention prediction markets
+- Return ONLY valid JSON of the form:
+{{"asset_outlook": {{"<asset_name>": ""}}, "top_stocks": {{"<ticker>": ""}}}}
+"""
+
+def merge_reasoning(analysis: dict, reasoning: dict) -> dict:
+    """
+    Copies LLM reasoning strings into `analysis`, ignoring anything else.
+    """
+    for name, text in (reasoning.get("asset_outlook") or {}).items():
+        if name in analysis["asset_outlook"] and isinstance(text, str) and text:
+            analysis["asset_outlook"][name]["reasoning"] = text
+
+    by_ticker = reasoning.get("top_stocks") or {}
+    for stock in analysis["top_stocks"]:
+        text = by_ticker.get(stock["ticker"])
+        if isinstance(text, str) and text:
+            stock["reasoning"] = text
+
+    return analysis
@@ -0,0 +1,281 @@
+import json, sqlite3, struct, threading, time
+from config import HISTORY_DB
+
+# ===============================
+# HISTORICAL SNAPSHOT STORE
+# ===============================
+# Append-only SQLite time series of market outcomes.
+#
+# - outcomes are quantized to basis points and packed as uint16
+# - a point is only written when a market's quantized outcomes differ
+#   from its previous point, so the value at time T is the latest point
+#   at or before T
+# - every refresh is logged in `refreshes` even if nothing moved
+# - each point references the label set it was encoded with, so a market
+#   whose outcome labels change keeps decoding its older points correctly
+
+SCALE = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refreshes (
+    ts INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS markets (
+    market_id TEXT PRIMARY KEY,
+    event_key TEXT NOT NULL,
+    question TEXT NOT NULL,
+    labels TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS label_sets (
+    id INTEGER PRIMARY KEY,
+    labels TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS points (
+    market_id TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    event_key TEXT NOT NULL,
+    probs BLOB NOT NULL,
+    label_set INTEGER,
+    PRIMARY KEY (market_id, ts)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_markets_event ON markets (event_key);
+CREATE INDEX IF NOT EXISTS idx_points_event_ts ON points (event_key, ts);
+"""
+
+def encode_outcomes(probs):
+    quantized = [max(0, min(SCALE, round(p * SCALE))) for p in probs]
+    return struct.pack(f"<{len(quantized)}H", *quantized)
+
+def decode_outcomes(blob, labels):
+    values = struct.unpack(f"<{len(blob) // 2}H", blob)
+    return {label: v / SCALE for label, v in zip(labels, values)}
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+        # market_id -> (labels, last encoded blob), filled lazily
+        self._markets = {}
+        # json labels -> label_sets id, filled lazily
+        self._label_sets = {}
+
+    def _migrate(self):
+        # Points written before label sets existed decode with the market's
+        # current labels (label_set stays NULL)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(points)")]
+        if "label_set" not in columns:
+            self._conn.execute("ALTER TABLE points ADD COLUMN label_set INTEGER")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------------
+    # WRITES
+    # -------------------------------
+    def _known_market(self, market_id):
+        if market_id in self._markets:
+            return self._markets[market_id]
+
+        row = self._conn.execute(
+            "SELECT labels FROM markets WHERE market_id = ?", (market_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        last = self._conn.execute(
+            "SELECT probs FROM points WHERE market_id = ? "
+            "ORDER BY ts DESC LIMIT 1",
+            (market_id,)
+        ).fetchone()
+
+        known = (json.loads(row[0]), last[0] if last else None)
+        self._markets[market_id] = known
+        return known
+
+    def _label_set(self, labels):
+        key = json.dumps(labels)
+        label_set = self._label_sets.get(key)
+        if label_set is None:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO label_sets (labels) VALUES (?)", (key,)
+            )
+            label_set = self._conn.execute(
+                "SELECT id FROM label_sets WHERE labels = ?", (key,)
+            ).fetchone()[0]
+            self._label_sets[key] = label_set
+        return label_set
+
+    def append_snapshot(self, records, ts=None):
+        """
+        Logs one refresh and writes a point for every market whose outcomes
+        changed. Returns the number of points written.
+        """
+        ts = int(ts or time.time())
+        written = 0
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO refreshes (ts) VALUES (?)", (ts,)
+            )
+
+            for record in records:
+                market_id = str(record["market_id"])
+                labels = list(record["outcomes"].keys())
+                blob = encode_outcomes(record["outcomes"].values())
+
+                known = self._known_market(market_id)
+                if known is None or known[0] != labels:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO markets "
+                        "(market_id, event_key, question, labels) "
+                        "VALUES (?, ?, ?, ?)",
+                        (market_id, record["event_key"],
+                         record["market_question"], json.dumps(labels))
+                    )
+                elif known[1] == blob:
+                    continue
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO points "
+                    "(market_id, ts, event_key, probs, label_set) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (market_id, ts, record["event_key"], blob,
+                     self._label_set(labels))
+                )
+                self._markets[market_id] = (labels, blob)
+                written += 1
+
+        return written
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+    def market_history(self, market_id, start=None, end=None):
+        """
+        [(ts, outcomes)] for one market between start and end. The point in
+        force at `start` is included so the series starts with a value.
+        """
+        market_id = str(market_id)
+        end = int(end if end is not None else time.time())
+
+        with self._lock:
+            known = self._known_market(market_id)
+            if known is None:
+                return []
+
+            params = [market_id, end]
+            where = "p.market_id = ? AND p.ts <= ?"
+            if start is not None:
+                start_ts = self._conn.execute(
+                    "SELECT MAX(ts) FROM points WHERE market_id = ? AND ts <= ?",
+                    (market_id, int(start))
+                ).fetchone()[0]
+                where += " AND p.ts >= ?"
+                params.append(start_ts if start_ts is not None else int(start))
+
+            rows = self._conn.execute(
+                "SELECT p.ts, p.probs, l.labels FROM points p "
+                "LEFT JOIN label_sets l ON l.id = p.label_set "
+                f"WHERE {where} ORDER BY p.ts",
+                params
+            ).fetchall()
+
+        current = known[0]
+        return [
+            (ts, decode_outcomes(blob, json.loads(labels) if labels else current))
+            for ts, blob, labels in rows
+        ]
+
+    def event_at(self, event_key, ts):
+        """
+        Every market of an event as it stood at `ts`, one index seek per
+        market.
+        """
+        ts = int(ts)
+
+        with self._lock:
+            markets = self._conn.execute(
+                "SELECT market_id, question, labels FROM markets "
+                "WHERE event_key = ?",
+                (event_key,)
+            ).fetchall()
+
+            results = []
+            for market_id, question, labels in markets:
+                row = self._conn.execute(
+                    "SELECT p.ts, p.probs, l.labels FROM points p "
+                    "LEFT JOIN label_sets l ON l.id = p.label_set "
+                    "WHERE p.market_id = ? AND p.ts <= ? "
+                    "ORDER BY p.ts DESC LIMIT 1",
+                    (market_id, ts)
+                ).fetchone()
+                if row is None:
+                    continue
+
+                results.append({
+                    "event_key": event_key,
+                    "market_id": market_id,
+                    "market_question": question,
+                    "outcomes": decode_outcomes(row[1], json.loads(row[2] or labels)),
+                    "as_of": row[0],
+                })
+
+        return results
+
+    def event_history(self, event_key, start, end=None):
+        """
+        Every change recorded for an event's markets in [start, end].
+        """
+        end = int(end if end is not None else time.time())
+
+        with self._lock:
+            labels = {
+                market_id: json.loads(raw)
+                for market_id, raw in self._conn.execute(
+                    "SELECT market_id, labels FROM markets WHERE event_key = ?",
+                    (event_key,)
+                )
+            }
+            rows = self._conn.execute(
+                "SELECT p.ts, p.market_id, p.probs, l.labels FROM points p "
+                "LEFT JOIN label_sets l ON l.id = p.label_set "
+                "WHERE p.event_key = ? AND p.ts BETWEEN ? AND ? ORDER BY p.ts",
+                (event_key, int(start), end)
+            ).fetchall()
+
+        return [
+            (ts, market_id, decode_outcomes(
+                blob, json.loads(point_labels) if point_labels else labels[market_id]
+            ))
+            for ts, market_id, blob, point_labels in rows
+        ]
+
+    def refresh_times(self, start=None, end=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts FROM refreshes WHERE ts BETWEEN ? AND ? ORDER BY ts",
+                (int(start or 0), int(end if end is not None else time.time()))
+            ).fetchall()
+        return [ts for (ts,) in rows]
+
+_STORE = None
+_store_lock = threading.Lock()
+
+def get_history_store():
+    global _STORE
+    with _store_lock:
+        if _STORE is None:
+            _STORE = HistoryStore()
+        return _STORE
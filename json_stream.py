@@ -0,0 +1,220 @@
+import json, re
+
+# ===============================
+# INCREMENTAL JSON EXTRACTION
+# ===============================
+# Parses the first JSON object out of LLM output as it streams in.
+#
+# Every character is looked at once, and ordinary text is copied in bulk
+# between the characters that matter, so parse time grows linearly with
+# the output. While copying it repairs the usual LLM defects:
+#
+# - prose or ``` fences before / after the object
+# - trailing commas before } or ]
+# - raw newlines and tabs inside strings
+# - mismatched closing brackets
+# - output cut off mid-object (see finish)
+#
+# Top-level fields are parsed as soon as they close, so callers can use
+# them before generation finishes.
+
+# Characters that change parser state, outside and inside strings
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_IN_STRING = re.compile(r'["\\\n\r\t]')
+_CLOSERS = {"{": "}", "[": "]"}
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+class StreamingJSONParser:
+    def __init__(self):
+        self.fields = {}
+        self.started = False
+        self.done = False
+        self.truncated = False
+
+        self._parts = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._pending_comma = False
+
+        # Top-level object: "key" until ':', then "value" until ',' or '}'
+        self._phase = "key"
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    # -------------------------------
+    # TOP-LEVEL FIELDS
+    # -------------------------------
+    def _complete_value(self, completed):
+        text = "".join(self._parts[self._value_start:]).strip()
+        self._phase = "key"
+        if not text or self._key is None:
+            return
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+
+    def _flush_comma(self):
+        if self._pending_comma:
+            self._parts.append(",")
+            self._pending_comma = False
+
+    # -------------------------------
+    # FEEDING
+    # -------------------------------
+    def feed(self, chunk):
+        """
+        Consumes the next piece of output. Returns [(field, value)] for
+        top-level fields completed by this chunk.
+        """
+        completed = []
+        if self.done or not chunk:
+            return completed
+
+        pos = 0
+        if not self.started:
+            pos = chunk.find("{")
+            if pos < 0:
+                return completed
+
+        while True:
+            pattern = _IN_STRING if self._in_string else _STRUCTURAL
+            match = pattern.search(chunk, pos)
+            if match is None:
+                break
+
+            start = match.start()
+            if start > pos:
+                self._text(chunk[pos:start])
+            pos = match.end()
+
+            self._special(match.group(), completed)
+            if self.done:
+                return completed
+
+        if pos < len(chunk):
+            self._text(chunk[pos:])
+        return completed
+
+    def _text(self, text):
+        if self._in_string:
+            # The first character after a backslash is the escaped one
+            self._escape = False
+            self._parts.append(text)
+            return
+
+        if text.strip():
+            self._flush_comma()
+        self._parts.append(text)
+
+    def _special(self, char, completed):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                self._parts.append(_STRING_ESCAPES.get(char, char))
+            elif char == '"':
+                self._in_string = False
+                self._parts.append(char)
+                if self._key_start is not None:
+                    self._key = json.loads("".join(self._parts[self._key_start:]))
+                    self._key_start = None
+            elif char == "\\":
+                self._escape = True
+                self._parts.append(char)
+            else:
+                self._parts.append(_STRING_ESCAPES.get(char, char))
+            return
+
+        if char == '"':
+            self._flush_comma()
+            self._in_string = True
+            if len(self._stack) == 1 and self._phase == "key":
+                self._key_start = len(self._parts)
+            self._parts.append(char)
+
+        elif char in "{[":
+            if not self.started:
+                if char != "{":
+                    return
+                self.started = True
+            self._flush_comma()
+            self._stack.append(char)
+            self._parts.append(char)
+
+        elif char in "}]":
+            # A comma right before a closer is dropped
+            self._pending_comma = False
+            if not self._stack:
+                return
+            if len(self._stack) == 1 and self._phase == "value":
+                self._complete_value(completed)
+            self._parts.append(_CLOSERS[self._stack.pop()])
+            if not self._stack:
+                self.done = True
+
+        elif char == ",":
+            if len(self._stack) == 1 and self._phase == "value":
+                self._complete_value(completed)
+            self._flush_comma()
+            self._pending_comma = True
+
+        elif char == ":":
+            self._parts.append(char)
+            if len(self._stack) == 1 and self._phase == "key":
+                self._phase = "value"
+                self._value_start = len(self._parts)
+
+    # -------------------------------
+    # RESULT
+    # -------------------------------
+    def text(self):
+        """
+        The repaired object text consumed so far.
+        """
+        return "".join(self._parts)
+
+    def finish(self):
+        """
+        The parsed top-level object. Output that stopped mid-object keeps
+        every complete field plus the last one if closing its open strings
+        and brackets makes it valid; `truncated` is set in that case.
+        """
+        if not self.started:
+            raise ValueError("No JSON object found")
+
+        if not self.done:
+            self.truncated = True
+            if len(self._stack) >= 1 and self._phase == "value":
+                tail = "".join(self._parts[self._value_start:])
+                if self._in_string:
+                    tail = tail[:-1] if self._escape else tail
+                    tail += '"'
+                tail += "".join(_CLOSERS[c] for c in reversed(self._stack[1:]))
+                try:
+                    self.fields[self._key] = json.loads(tail)
+                except ValueError:
+                    pass
+
+        return self.fields
+
+def extract_json(text: str) -> dict:
+    """
+    Well-formed output (fences and surrounding prose aside) goes straight
+    to json.loads; anything else is repaired in a single pass.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end:
+        try:
+            parsed = json.loads(text[start:end + 1])
+            if isinstance(parsed, dict):
+                return parsed
+        except ValueError:
+            pass
+
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.finish()
@@ -0,0 +1,274 @@
+import asyncio, json, time
+import websockets
+from config import CLOB_WS_URL, LIVE_PUBLISH_INTERVAL, LIVE_RECONNECT_MAX_DELAY
+from market_data import tracked_event_keys
+from snapshot import SNAPSHOTS
+from metrics import ERRORS
+
+# ===============================
+# LIVE CLOB PRICE INGESTION
+# ===============================
+# Subscribes to the CLOB market channel for every token in the snapshot
+# and keeps outcome probabilities current between crawls.
+#
+# Each book / price_change message gives a token's best bid and ask; their
+# midpoint replaces that outcome's raw price and the market is
+# renormalised exactly like fetch_all_market_data does, starting from the
+# raw prices the event cache kept from the last crawl. Markets quoted since
+# their event was last fetched are overlaid onto the current snapshot (only
+# those markets, see MarketSnapshot.with_outcomes) at most every
+# LIVE_PUBLISH_INTERVAL seconds. Disconnects reconnect with backoff and
+# resubscribe, and a changed token set forces a resubscribe.
+
+def _best(levels, pick):
+    prices = []
+    for level in levels or []:
+        try:
+            prices.append(float(level["price"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return pick(prices) if prices else None
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_quotes(message):
+    """
+    One market-channel message -> [(token_id, midpoint)].
+    """
+    event_type = message.get("event_type")
+    quotes = []
+
+    if event_type == "book":
+        bid = _best(message.get("bids") or message.get("buys"), max)
+        ask = _best(message.get("asks") or message.get("sells"), min)
+        if bid is not None and ask is not None:
+            quotes.append((message.get("asset_id"), (bid + ask) / 2))
+
+    elif event_type == "price_change":
+        for change in message.get("price_changes", []):
+            bid = _float(change.get("best_bid"))
+            ask = _float(change.get("best_ask"))
+            if bid is not None and ask is not None:
+                quotes.append((change.get("asset_id"), (bid + ask) / 2))
+
+    elif event_type == "best_bid_ask":
+        bid = _float(message.get("best_bid"))
+        ask = _float(message.get("best_ask"))
+        if bid is not None and ask is not None:
+            quotes.append((message.get("asset_id"), (bid + ask) / 2))
+
+    return [(token_id, mid) for token_id, mid in quotes if token_id]
+
+def renormalise(raw_prices):
+    total = sum(raw_prices.values())
+    if total == 0:
+        return None
+    return {label: round(p / total, 4) for label, p in raw_prices.items()}
+
+class LivePriceFeed:
+    def __init__(self, cache, snapshots=SNAPSHOTS, url=CLOB_WS_URL):
+        self.cache = cache
+        self.snapshots = snapshots
+        self.url = url
+
+        # market_id -> {"raw": {label: price}, "outcomes": {...}, "updated_at": ts}
+        self.markets = {}
+        # market_id -> {"raw": {label: price}, "fetched_at": ts} from the cache
+        self.baselines = {}
+        self.tokens = {}
+        self.messages = 0
+        self.reconnects = 0
+
+        self._dirty = False
+        self._published = None
+        self._ws = None
+        self._task = None
+        self._publisher = None
+
+    # -------------------------------
+    # UPDATES
+    # -------------------------------
+    def _live(self, market_id, state):
+        # Quoted since the event was last fetched
+        base = self.baselines.get(market_id)
+        return base is not None and state["updated_at"] > base["fetched_at"]
+
+    def _baseline(self, market_id):
+        state = self.markets.get(market_id)
+        if state and self._live(market_id, state):
+            return dict(state["raw"])
+
+        base = self.baselines.get(market_id)
+        if base is None:
+            return None
+        return dict(base["raw"])
+
+    def apply_message(self, message):
+        """
+        Applies one decoded message (dict or list of dicts). Returns the
+        number of outcomes updated.
+        """
+        if isinstance(message, list):
+            return sum(self.apply_message(m) for m in message if isinstance(m, dict))
+
+        updated = 0
+        for token_id, mid in parse_quotes(message):
+            target = self.tokens.get(token_id)
+            if target is None:
+                continue
+
+            market_id, label = target
+            raw = self._baseline(market_id)
+            if raw is None or label not in raw:
+                continue
+
+            raw[label] = mid
+            outcomes = renormalise(raw)
+            if outcomes is None:
+                continue
+
+            self.markets[market_id] = {
+                "raw": raw,
+                "outcomes": outcomes,
+                "updated_at": time.time(),
+            }
+            updated += 1
+
+        if updated:
+            self._dirty = True
+        return updated
+
+    def publish(self):
+        """
+        Overlays markets quoted since their event was last fetched onto the
+        current snapshot and hot-swaps the result in.
+        """
+        self._dirty = False
+        states = {
+            market_id: state
+            for market_id, state in list(self.markets.items())
+            if self._live(market_id, state)
+        }
+
+        def overlay(snapshot):
+            updates = {}
+            for market_id, state in states.items():
+                record = snapshot.by_market_id.get(market_id)
+                if record is not None and record["outcomes"] != state["outcomes"]:
+                    updates[market_id] = state["outcomes"]
+            return updates
+
+        self._published = self.snapshots.update_outcomes(overlay)
+        return self._published
+
+    # -------------------------------
+    # CONNECTION
+    # -------------------------------
+    def _load_markets(self):
+        """
+        Token map and raw-price baselines from the event cache. Drops live
+        state that a newer fetch superseded or whose market is no longer
+        tracked. Returns the token map.
+        """
+        keys = tracked_event_keys()
+        self.baselines = self.cache.market_prices(keys)
+        for market_id, state in list(self.markets.items()):
+            if not self._live(market_id, state):
+                del self.markets[market_id]
+        return self.cache.token_index(keys)
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(10)
+            await ws.send("PING")
+
+    async def _publish_loop(self):
+        while True:
+            await asyncio.sleep(LIVE_PUBLISH_INTERVAL)
+            try:
+                tokens = self._load_markets()
+
+                # New quotes, or a refresh swapped in a snapshot without them
+                if self._dirty or self.snapshots.current() is not self._published:
+                    await asyncio.to_thread(self.publish)
+
+                # Snapshot refreshed with different tokens -> resubscribe
+                if set(tokens) != set(self.tokens) and self._ws is not None:
+                    await self._ws.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Live price publish failed: {e}")
+                ERRORS.inc(source="live_publish")
+
+    async def _session(self):
+        self.tokens = self._load_markets()
+        if not self.tokens:
+            return
+
+        async with websockets.connect(self.url) as ws:
+            self._ws = ws
+            await ws.send(json.dumps({
+                "assets_ids": list(self.tokens),
+                "type": "market"
+            }))
+            print(f"📡 Subscribed to {len(self.tokens)} tokens at {self.url}")
+
+            pinger = asyncio.create_task(self._ping(ws))
+            try:
+                async for raw in ws:
+                    if raw == "PONG":
+                        continue
+                    try:
+                        message = json.loads(raw)
+                    except ValueError:
+                        continue
+                    self.messages += 1
+                    self.apply_message(message)
+            finally:
+                pinger.cancel()
+                self._ws = None
+
+    async def run(self):
+        self._publisher = asyncio.create_task(self._publish_loop())
+        delay = 1
+
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    await self._session()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Live price feed disconnected: {e}")
+                    ERRORS.inc(source="live_feed")
+
+                # Reset the backoff after a connection that stayed up
+                if time.monotonic() - started > 30:
+                    delay = 1
+
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LIVE_RECONNECT_MAX_DELAY)
+        finally:
+            self._publisher.cancel()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -1,14 +1,121 @@
-from sarvamai import SarvamAI
-from config import SARVAM_API_KEY
+import threading
+from config import SARVAM_API_KEY, LLM_MAX_CONNECTIONS, LLM_TIMEOUT
+from metrics import span, LLM_CALLS
+from llm_scheduler import LLM_SCHEDULER, start_call
+
+# ===============================
+# LLM CLIENT
+# ===============================
+# One SarvamAI client per process, built on the first LLM call. The SDK
+# import, the API key check and the connection pool are only paid by code
+# paths that actually call the model.
+#
+# The client sits on a single httpx.Client, which keeps connections alive
+# and is safe to share between the engine worker threads and batch packs.
+
+_CLIENT = None
+_HTTP_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def _create_client():
+    if not SARVAM_API_KEY:
+        raise RuntimeError("SARVAM_API_KEY not found in key.env")
+
+    import httpx
+    from sarvamai import SarvamAI
+
+    http_client = httpx.Client(
+        timeout=LLM_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS
+        )
+    )
+    client = SarvamAI(
+        api_subscription_key=SARVAM_API_KEY,
+        timeout=LLM_TIMEOUT,
+        httpx_client=http_client
+    )
+    return client, http_client
 
 def get_llm_client():
-    return SarvamAI(api_subscription_key=SARVAM_API_KEY)
+    global _CLIENT, _HTTP_CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT, _HTTP_CLIENT = _create_client()
+    return _CLIENT
+
+def close_llm_client():
+    """
+    Releases pooled connections; the next call builds a fresh client.
+    """
+    global _CLIENT, _HTTP_CLIENT
+    with _CLIENT_LOCK:
+        if _HTTP_CLIENT is not None:
+            _HTTP_CLIENT.close()
+        _CLIENT = _HTTP_CLIENT = None
+
+def _messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": "You are a macro market intelligence engine."},
+        {"role": "user", "content": prompt}
+    ]
 
 def call_llm(client, prompt: str) -> str:
-    response = client.chat.completions(
-        messages=[
-            {"role": "system", "content": "You are a macro market intelligence engine."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
\ No newline at end of file
+    with span("llm.call"):
+        try:
+            response, lane = start_call(
+                LLM_SCHEDULER,
+                lambda: client.chat.completions(messages=_messages(prompt)),
+                kind="blocking"
+            )
+        except Exception:
+            LLM_CALLS.inc(kind="blocking", outcome="error")
+            raise
+        LLM_SCHEDULER.release(lane)
+    LLM_CALLS.inc(kind="blocking", outcome="ok")
+    return response.choices[0].message.content
+
+def stream_llm(client, prompt: str):
+    """
+    Yields the completion as text chunks. Falls back to a single chunk
+    when the SDK cannot stream. The scheduler slot is held until the
+    stream ends.
+    """
+    try:
+        stream, lane = start_call(
+            LLM_SCHEDULER,
+            lambda: client.chat.completions(messages=_messages(prompt), stream=True),
+            kind="stream"
+        )
+    except TypeError:
+        yield call_llm(client, prompt)
+        return
+    except Exception:
+        LLM_CALLS.inc(kind="stream", outcome="error")
+        raise
+
+    # Non-streaming response object
+    if hasattr(stream, "choices"):
+        LLM_SCHEDULER.release(lane)
+        LLM_CALLS.inc(kind="stream", outcome="ok")
+        yield stream.choices[0].message.content
+        return
+
+    # Spans the whole stream, including time the consumer spends per chunk
+    with span("llm.stream"):
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = getattr(chunk.choices[0], "delta", None)
+                content = getattr(delta, "content", None)
+                if content:
+                    yield content
+        except Exception:
+            LLM_CALLS.inc(kind="stream", outcome="error")
+            raise
+        finally:
+            LLM_SCHEDULER.release(lane)
+    LLM_CALLS.inc(kind="stream", outcome="ok")
@@ -0,0 +1,125 @@
+import copy, hashlib, json, os, threading, time
+from collections import OrderedDict
+from config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_FILE
+from metrics import CACHE_LOOKUPS
+from serialization import dumps, read_json_file, write_atomic
+
+# ===============================
+# LLM RESPONSE CACHE
+# ===============================
+# Content-addressed: the key is a hash of the canonical JSON of everything
+# that goes into the prompt, so byte-identical inputs reuse the last
+# answer. Entries expire after LLM_CACHE_TTL, the least recently used one
+# is evicted past LLM_CACHE_MAX_ENTRIES, and the whole cache is dropped
+# when the snapshot cache_version changes, i.e. on a full publish. Live
+# price overlays keep the version; the prices they change are part of the
+# key.
+#
+# Requests still running on a snapshot that has since been replaced
+# neither read nor write (nor clear) the cache, so around a swap the
+# cache does not flip back and forth between two versions.
+
+# Replaced snapshot versions remembered, to tell late callers from new ones
+_RETIRED_VERSIONS = 256
+
+def cache_key(**prompt_inputs):
+    canonical = json.dumps(
+        prompt_inputs,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class LLMResponseCache:
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL, path=LLM_CACHE_FILE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.version = None
+        self._retired = OrderedDict()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            data = read_json_file(self.path)
+        except (OSError, ValueError):
+            return
+
+        self.version = data.get("version")
+        now = time.time()
+        for key, (stored_at, value) in data.get("entries", {}).items():
+            if now - stored_at <= self.ttl:
+                self._entries[key] = (stored_at, value)
+
+    def _persist(self):
+        if not self.path:
+            return
+
+        write_atomic(self.path, dumps({"version": self.version, "entries": self._entries}))
+
+    def _check_version(self, version):
+        """
+        True if `version` is the current one (a version never seen before
+        becomes current). Caller holds the lock.
+        """
+        if version == self.version:
+            return True
+        if version in self._retired:
+            return False
+
+        if self.version is not None:
+            self._retired[self.version] = None
+            while len(self._retired) > _RETIRED_VERSIONS:
+                self._retired.popitem(last=False)
+        self._entries.clear()
+        self.version = version
+        self._persist()
+        return True
+
+    def get(self, key, version):
+        with self._lock:
+            if not self._check_version(version):
+                CACHE_LOOKUPS.inc(cache="llm", result="stale")
+                return None
+
+            entry = self._entries.get(key)
+            if entry is None:
+                CACHE_LOOKUPS.inc(cache="llm", result="miss")
+                return None
+
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                CACHE_LOOKUPS.inc(cache="llm", result="miss")
+                return None
+
+            self._entries.move_to_end(key)
+            CACHE_LOOKUPS.inc(cache="llm", result="hit")
+            return copy.deepcopy(value)
+
+    def put(self, key, version, value):
+        with self._lock:
+            if not self._check_version(version):
+                return
+
+            self._entries[key] = (time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            self._persist()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._persist()
+
+    def __len__(self):
+        return len(self._entries)
+
+LLM_CACHE = LLMResponseCache()
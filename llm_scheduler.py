@@ -0,0 +1,311 @@
+import email.utils, random, threading, time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_RATE_PER_SEC,
+    LLM_BURST,
+    LLM_LANES,
+    LLM_LANE_MAX_ACTIVE,
+    LLM_QUEUE_MAX,
+    LLM_QUEUE_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+)
+from metrics import span, LLM_RETRIES, LLM_SHED
+
+# ===============================
+# LLM SCHEDULER
+# ===============================
+# Every Sarvam call waits here for a slot:
+#
+# - at most LLM_MAX_CONCURRENCY calls in flight
+# - a token bucket caps the call rate (LLM_RATE_PER_SEC, LLM_BURST)
+# - lanes are served in priority order (interactive before batch), and a
+#   lane can be capped below the global limit so batch jobs never take
+#   every slot
+# - a 429 pauses the whole scheduler for Retry-After, so queued callers
+#   back off together instead of each hitting the throttle
+#
+# A lane whose queue is full, or whose caller waited past the lane's
+# timeout, sheds the call with LLMOverloaded; the API turns that into a
+# 503 with Retry-After.
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# The lane for calls made in this context (see lane / set_lane)
+_LANE = ContextVar("llm_lane", default=LLM_LANES[0])
+
+class LLMOverloaded(RuntimeError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    `rate` tokens per second up to `burst`; rate <= 0 disables the limit.
+    Not locked: the scheduler calls it under its own lock.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        """
+        Seconds until a token is available.
+        """
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        rate=LLM_RATE_PER_SEC,
+        burst=LLM_BURST,
+        lanes=LLM_LANES,
+        lane_max_active=LLM_LANE_MAX_ACTIVE,
+        queue_max=LLM_QUEUE_MAX,
+        queue_timeout=LLM_QUEUE_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.lanes = tuple(lanes)
+        self.lane_max_active = dict(lane_max_active)
+        self.queue_max = dict(queue_max)
+        self.queue_timeout = dict(queue_timeout)
+
+        self.paused_until = 0.0
+        self._waiting = {name: deque() for name in self.lanes}
+        self._active = {name: 0 for name in self.lanes}
+        self._cond = threading.Condition()
+
+    # -------------------------------
+    # STATE
+    # -------------------------------
+    def active(self):
+        return sum(self._active.values())
+
+    def queued(self):
+        return sum(len(queue) for queue in self._waiting.values())
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": dict(self._active),
+                "queued": {name: len(queue) for name, queue in self._waiting.items()},
+                "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 3),
+            }
+
+    def _next_ticket(self):
+        """
+        Head of the highest-priority lane that may start another call.
+        """
+        for name in self.lanes:
+            queue = self._waiting[name]
+            limit = self.lane_max_active.get(name, self.max_concurrency)
+            if queue and self._active[name] < limit:
+                return queue[0]
+        return None
+
+    def _retry_hint(self, now):
+        # Rough time until the queue moves: a throttle pause, else one
+        # token interval
+        if self.paused_until > now:
+            return self.paused_until - now
+        if self.bucket.rate > 0:
+            return 1 / self.bucket.rate
+        return 1.0
+
+    # -------------------------------
+    # SLOTS
+    # -------------------------------
+    def acquire(self, lane=None):
+        name = lane or _LANE.get()
+        ticket = object()
+
+        with self._cond:
+            now = time.monotonic()
+            queue = self._waiting[name]
+            if len(queue) >= self.queue_max.get(name, 0):
+                LLM_SHED.inc(lane=name, reason="queue_full")
+                raise LLMOverloaded(
+                    f"LLM queue full ({name} lane, {len(queue)} waiting)",
+                    retry_after=self._retry_hint(now)
+                )
+
+            queue.append(ticket)
+            deadline = now + self.queue_timeout.get(name, 0)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._next_ticket() is ticket and self.active() < self.max_concurrency:
+                        wait = max(self.paused_until - now, self.bucket.wait_time(now))
+                        if wait <= 0:
+                            self.bucket.take()
+                            self._active[name] += 1
+                            return name
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        LLM_SHED.inc(lane=name, reason="timeout")
+                        raise LLMOverloaded(
+                            f"Timed out waiting for an LLM slot ({name} lane)",
+                            retry_after=self._retry_hint(now)
+                        )
+                    self._cond.wait(remaining if wait is None else min(wait, remaining))
+            finally:
+                queue.remove(ticket)
+                # The next head may be able to start now
+                self._cond.notify_all()
+
+    def release(self, lane):
+        with self._cond:
+            self._active[lane] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, lane=None):
+        with span("llm.queue"):
+            name = self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def pause(self, seconds):
+        """
+        Holds every queued call for `seconds` (provider throttling).
+        """
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+# -------------------------------
+# LANES
+# -------------------------------
+def set_lane(name):
+    """
+    Sets the lane for the current context. Usable as a thread pool
+    initializer, so every task on that pool runs in the lane.
+    """
+    _LANE.set(name)
+
+@contextmanager
+def lane(name):
+    token = _LANE.set(name)
+    try:
+        yield
+    finally:
+        _LANE.reset(token)
+
+# -------------------------------
+# RETRIES
+# -------------------------------
+def _status_and_headers(exc):
+    # Sarvam SDK errors carry status_code / headers; httpx errors carry a
+    # response
+    status = getattr(exc, "status_code", None)
+    headers = getattr(exc, "headers", None)
+    response = getattr(exc, "response", None)
+    if response is not None:
+        status = status or getattr(response, "status_code", None)
+        headers = headers or getattr(response, "headers", None)
+    return status, headers or {}
+
+def parse_retry_after(headers):
+    """
+    Retry-After in seconds (delta-seconds or HTTP-date), or None.
+    """
+    value = None
+    for key, header in dict(headers).items():
+        if str(key).lower() == "retry-after":
+            value = str(header).strip()
+            break
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _is_transient(exc):
+    # Connect / read failures and timeouts; the SDK's httpx raises its own
+    # TransportError family rather than the builtins
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(exc, httpx.TransportError)
+
+def retry_delay(exc, attempt):
+    """
+    (seconds, throttled) before retrying `exc`, or None if it is not
+    retryable.
+    """
+    status, headers = _status_and_headers(exc)
+    if status not in RETRYABLE_STATUS and not _is_transient(exc):
+        return None
+
+    retry_after = parse_retry_after(headers)
+    if retry_after is None:
+        backoff = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt)
+        retry_after = backoff * random.uniform(0.5, 1.0)
+    return retry_after, status == 429
+
+def start_call(scheduler, fn, kind):
+    """
+    Runs `fn` in a scheduler slot, retrying throttling and transient
+    errors. Returns (result, lane) with the slot still held; the caller
+    releases it once the response is consumed.
+    """
+    attempt = 0
+    while True:
+        name = scheduler.acquire()
+        try:
+            return fn(), name
+        except Exception as e:
+            scheduler.release(name)
+
+            delay = retry_delay(e, attempt)
+            if delay is None or attempt >= LLM_MAX_RETRIES:
+                raise
+            seconds, throttled = delay
+            if seconds > LLM_BACKOFF_MAX:
+                # Longer than any caller should wait: shed now
+                if throttled:
+                    scheduler.pause(seconds)
+                LLM_SHED.inc(lane=name, reason="throttled")
+                raise LLMOverloaded(f"LLM provider throttled for {seconds:.0f}s", retry_after=seconds) from e
+
+            LLM_RETRIES.inc(kind=kind, reason="throttled" if throttled else "transient")
+            print(f"⚠️ LLM call failed ({e}), retrying in {seconds:.1f}s")
+            if throttled:
+                # Everyone waits, not just this caller
+                scheduler.pause(seconds)
+            else:
+                time.sleep(seconds)
+            attempt += 1
+
+LLM_SCHEDULER = LLMScheduler()
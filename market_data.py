@@ -1,31 +1,18 @@
-import json, time, requests
-from config import GAMMA_BASE, CLOB_BASE, CACHE_FILE, PREDEFINED_EVENT_IDS
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import asyncio, json, time, requests
+from config import GAMMA_BASE, CACHE_FILE, FETCH_CONCURRENCY, GROUP_EVENT_TTL
 import os
-from config import PREDEFINED_EVENT_IDS
+from pricing import fetch_token_midpoint, resolve_token_prices, run_blocking
+from transport import SESSION
+from event_cache import EventCache
+from history_store import get_history_store
+from metrics import CACHE_LOOKUPS, PRICE_SOURCE, ERRORS
+from serialization import dumps, write_atomic
+from catalog import event_id_for, tracked_events
 
 GROUP_EVENTS = {
     "fed_rate_cuts_2026",
 }
 
-def make_session():
-    session = requests.Session()
-
-    retries = Retry(
-        total=5,
-        backoff_factor=1.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("https://", adapter)
-
-    return session
-
-SESSION = make_session()
-
 def get_event_by_id(event_id):
     try:
         resp = SESSION.get(
@@ -37,33 +24,9 @@ def get_event_by_id(event_id):
 
     except requests.exceptions.RequestException as e:
         print(f"⚠️ Failed to fetch event {event_id}: {e}")
-        return None
-    
-def fetch_token_midpoint(token_id):
-    try:
-        resp = requests.get(
-            f"{CLOB_BASE}/midpoint",
-            params={"token_id": token_id},
-            timeout=10
-        )
-
-        if resp.status_code != 200:
-            return None
-
-        data = resp.json()
-
-        # Handle all real-world cases
-        if "midpoint" in data and data["midpoint"] is not None:
-            return float(data["midpoint"])
-
-        if "price" in data and data["price"] is not None:
-            return float(data["price"])
-
+        ERRORS.inc(source="gamma_event")
         return None
 
-    except (requests.exceptions.RequestException, ValueError, TypeError):
-        return None
-    
 def parse_outcome_prices(outcome_prices):
     """
     outcomePrices can be:
@@ -93,79 +56,218 @@ def get_safe_outcome_labels(market, token_ids):
 
     return [f"Outcome_{i}" for i in range(len(token_ids))]
 
-def fetch_all_market_data(use_cache=True):
-    if use_cache and os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    results = []
+def resolve_raw_prices(market, token_ids, clob_prices):
+    """
+    {token_id: raw price} for one market: its CLOB midpoints, or Gamma
+    outcomePrices when CLOB is illiquid. None when it cannot be priced.
+    """
+    if len(clob_prices) >= 2:
+        PRICE_SOURCE.inc(source="clob")
+        return clob_prices
+
+    # If CLOB is illiquid, fall back to Gamma outcomePrices
+    outcome_prices = market.get("outcomePrices")
+    if not outcome_prices:
+        return None
+
+    # outcomePrices are strings like ["0.32", "0.68"]
+    parsed_prices = parse_outcome_prices(outcome_prices)
+    if not parsed_prices or len(parsed_prices) != len(token_ids):
+        return None
+
+    PRICE_SOURCE.inc(source="gamma")
+    return {
+        token_id: price
+        for token_id, price in zip(token_ids, parsed_prices)
+    }
+
+def build_market_record(key, event_id, event, market, raw_prices):
+    """
+    Turns one Gamma market plus its resolved raw prices into a flattened
+    record. Returns None when the market cannot be priced.
+    """
+    if not raw_prices:
+        return None
+    token_ids = json.loads(market["clobTokenIds"])
+
+    total = sum(raw_prices.values())
+    if total == 0:
+        return None
+
+    labels = get_safe_outcome_labels(market, token_ids)
+
+    outcomes = {
+        label: round(raw_prices[token_id] / total, 4)
+        for label, token_id in zip(labels, token_ids)
+    }
+
+    return {
+        "event_key": key,
+        "event_id": event_id,
+        "event_title": event["title"],
+        "market_id": market["id"],
+        "market_question": market["question"],
+        "outcomes": outcomes,
+        "volume": market.get("volume", 0),
+        "end_date": market.get("endDate")
+    }
+
+# -------------------------------
+# ASYNC FETCH PIPELINE
+# -------------------------------
+async def _fetch_event(semaphore, key, event_id):
+    event = await run_blocking(semaphore, get_event_by_id, event_id)
+    return key, event_id, event
+
+def _market_token_ids(market):
+    if "clobTokenIds" not in market:
+        return None
+    return json.loads(market["clobTokenIds"])
+
+def tracked_event_keys():
+    return [key for key in tracked_events() if key not in GROUP_EVENTS]
+
+async def fetch_event_records_async(event_keys, concurrency=FETCH_CONCURRENCY, token_maps=None):
+    """
+    Fetches the given events concurrently, then prices all of their tokens
+    through batched CLOB requests, with at most `concurrency` HTTP requests
+    in flight.
+
+    Returns {event_key: records}, with None for events Gamma failed to
+    return so callers can keep whatever they had before. If `token_maps`
+    is given it is filled with
+    {event_key: {token_id: [market_id, label, raw price]}}
+    for every record built.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    event_ids = tracked_events()
+
+    events = await asyncio.gather(*(
+        _fetch_event(semaphore, key, event_ids.get(key) or event_id_for(key))
+        for key in event_keys
+    ))
 
-    for key, event_id in PREDEFINED_EVENT_IDS.items():
-        if key in GROUP_EVENTS:
+    # Collect every token of the refresh so they can be priced together
+    all_token_ids = []
+    for _, _, event in events:
+        if not event:
             continue
+        for market in event.get("markets", []):
+            all_token_ids.extend(_market_token_ids(market) or [])
+
+    prices = await resolve_token_prices(semaphore, all_token_ids)
 
-        time.sleep(0.3)
-        event = get_event_by_id(event_id)
+    results = {}
+    for key, event_id, event in events:
         if not event:
+            results[key] = None
             continue
 
+        records = []
+        tokens = {}
         for market in event.get("markets", []):
-            if "clobTokenIds" not in market:
+            token_ids = _market_token_ids(market)
+            if token_ids is None:
                 continue
 
-            token_ids = json.loads(market["clobTokenIds"])
+            # Try CLOB first
+            raw_prices = resolve_raw_prices(market, token_ids, {
+                token_id: prices[token_id]
+                for token_id in token_ids
+                if token_id in prices
+            })
 
-            raw_prices = {}
+            record = build_market_record(key, event_id, event, market, raw_prices)
+            if record:
+                records.append(record)
+                # Raw prices too, so live quotes renormalise against
+                # prices rather than the rounded probabilities
+                for label, token_id in zip(record["outcomes"], token_ids):
+                    tokens[token_id] = [record["market_id"], label, raw_prices[token_id]]
 
-            # Try CLOB first
-            for token_id in token_ids:
-                price = fetch_token_midpoint(token_id)
-                if price is not None:
-                    raw_prices[token_id] = price
-
-            # If CLOB is illiquid, fall back to Gamma outcomePrices
-            if len(raw_prices) < 2:
-                outcome_prices = market.get("outcomePrices")
-                if not outcome_prices:
-                    continue
-
-                # outcomePrices are strings like ["0.32", "0.68"]
-                parsed_prices = parse_outcome_prices(market.get("outcomePrices"))
-                if not parsed_prices or len(parsed_prices) != len(token_ids):
-                    continue
-
-                raw_prices = {
-                    token_id: price
-                    for token_id, price in zip(token_ids, parsed_prices)
-                }
-
-            total = sum(raw_prices.values())
-            if total == 0:
-                continue
+        results[key] = records
+        if token_maps is not None:
+            token_maps[key] = tokens
 
-            labels = get_safe_outcome_labels(market, token_ids)
-
-            outcomes = {
-                label: round(raw_prices[token_id] / total, 4)
-                for label, token_id in zip(labels, token_ids)
-            }
-
-            results.append({
-                "event_key": key,
-                "event_id": event_id,
-                "event_title": event["title"],
-                "market_id": market["id"],
-                "market_question": market["question"],
-                "outcomes": outcomes,
-                "volume": market.get("volume", 0),
-                "end_date": market.get("endDate")
-            })
-    with open(CACHE_FILE, "w") as f:
-        json.dump(results, f, indent=2)
+    return results
+
+async def fetch_all_market_data_async(concurrency=FETCH_CONCURRENCY):
+    """
+    Full crawl of every predefined event. Records come back in the same
+    order as the sequential crawl.
+    """
+    per_event = await fetch_event_records_async(tracked_event_keys(), concurrency)
+    return [
+        record
+        for records in per_event.values()
+        if records
+        for record in records
+    ]
+
+async def refresh_event_cache_async(cache, event_keys, concurrency=FETCH_CONCURRENCY):
+    """
+    Refetches `event_keys` and merges them into `cache` (in memory only).
+    Events that fail to fetch keep their previous records.
+    """
+    if not event_keys:
+        return []
+
+    fetched_at = time.time()
+    token_maps = {}
+    fetched = await fetch_event_records_async(event_keys, concurrency, token_maps)
+
+    event_ids = tracked_events()
+    refreshed = []
+    for key, records in fetched.items():
+        if records is None:
+            continue
+        cache.update(key, event_ids.get(key) or event_id_for(key), records, fetched_at, token_maps.get(key))
+        refreshed.append(key)
+
+    return refreshed
+
+def refresh_event_cache(cache, event_keys):
+    refreshed = asyncio.run(refresh_event_cache_async(cache, event_keys)) if event_keys else []
+    if refreshed:
+        cache.save()
+    return refreshed
+
+def save_market_snapshot(results):
+    """
+    Writes the merged flat snapshot and appends it to the history store.
+    """
+    write_atomic(CACHE_FILE, dumps(results, indent=True))
+
+    get_history_store().append_snapshot(results)
+
+def load_cached_market_data():
+    """
+    The flattened snapshot as currently on disk. Never touches the network.
+    """
+    return EventCache.load().records(tracked_event_keys())
+
+def fetch_all_market_data(use_cache=True):
+    """
+    Returns the flattened market snapshot, refetching only the events whose
+    per-event TTL has expired (or every event when use_cache is False).
+    """
+    cache = EventCache.load()
+    keys = tracked_event_keys()
+
+    stale = cache.stale_keys(keys) if use_cache else keys
+    CACHE_LOOKUPS.inc(len(keys) - len(stale), cache="event", result="hit")
+    CACHE_LOOKUPS.inc(len(stale), cache="event", result="miss")
+    refreshed = refresh_event_cache(cache, stale)
+
+    results = cache.records(keys)
+
+    if refreshed or not os.path.exists(CACHE_FILE):
+        save_market_snapshot(results)
 
     return results
 
 def attach_event_keys(events: list) -> list:
-    id_to_key = {str(v): k for k, v in PREDEFINED_EVENT_IDS.items()}
+    id_to_key = {str(v): k for k, v in tracked_events().items()}
 
     for event in events:
         event_id = str(event.get("id"))
@@ -174,10 +276,23 @@ def attach_event_keys(events: list) -> list:
 
     return events
 
-def fetch_group_event(event_key):
-    event_id = PREDEFINED_EVENT_IDS.get(event_key)
+# event_key -> (fetched_at, event)
+_GROUP_EVENT_CACHE = {}
+
+def fetch_group_event(event_key, max_age=GROUP_EVENT_TTL):
+    event_id = event_id_for(event_key)
     if not event_id:
         return None
-    return get_event_by_id(event_id)
+
+    cached = _GROUP_EVENT_CACHE.get(event_key)
+    if cached and time.time() - cached[0] <= max_age:
+        CACHE_LOOKUPS.inc(cache="group_event", result="hit")
+        return cached[1]
+    CACHE_LOOKUPS.inc(cache="group_event", result="miss")
+
+    event = get_event_by_id(event_id)
+    if event:
+        _GROUP_EVENT_CACHE[event_key] = (time.time(), event)
+    return event
 
 
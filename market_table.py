@@ -0,0 +1,175 @@
+import numpy as np
+from event_cache import parse_end_date, parse_volume
+
+# ===============================
+# COLUMNAR MARKET TABLE
+# ===============================
+# The flattened market records as NumPy columns:
+#
+# - event_key is categorical: `event_keys` holds the categories and
+#   `event_codes` an int32 code per market
+# - `probs` is a (markets x outcome labels) float matrix, NaN where a
+#   market has no such outcome
+# - volume and end_ts are float columns, NaN when missing
+#
+# Filtering returns a new table over the same categories, so masks and
+# group-bys stay vectorized no matter how many markets are loaded.
+
+class MarketTable:
+    def __init__(self, event_keys, event_codes, market_ids, questions,
+                 outcome_labels, probs, volume, end_ts, records):
+        self.event_keys = event_keys
+        self.event_codes = event_codes
+        self.market_ids = market_ids
+        self.questions = questions
+        self.outcome_labels = outcome_labels
+        self.probs = probs
+        self.volume = volume
+        self.end_ts = end_ts
+        self.records = records
+
+        self._label_index = {label: i for i, label in enumerate(outcome_labels)}
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Accepts full flattened records or compressed ones
+        ({"event_key", "question", "outcomes"}).
+        """
+        event_keys = list(dict.fromkeys(r["event_key"] for r in records))
+        key_index = {key: i for i, key in enumerate(event_keys)}
+
+        outcome_labels = list(dict.fromkeys(
+            label for r in records for label in r["outcomes"]
+        ))
+        label_index = {label: i for i, label in enumerate(outcome_labels)}
+
+        n = len(records)
+        probs = np.full((n, len(outcome_labels)), np.nan)
+        for row, r in enumerate(records):
+            for label, p in r["outcomes"].items():
+                probs[row, label_index[label]] = p
+
+        questions = [r.get("market_question", r.get("question", "")) for r in records]
+
+        record_col = np.empty(n, dtype=object)
+        record_col[:] = records
+
+        return cls(
+            event_keys=event_keys,
+            event_codes=np.fromiter(
+                (key_index[r["event_key"]] for r in records), np.int32, n
+            ),
+            market_ids=np.array([str(r.get("market_id", "")) for r in records], dtype=object),
+            questions=np.array(questions, dtype=object),
+            outcome_labels=outcome_labels,
+            probs=probs,
+            volume=np.fromiter((parse_volume(r.get("volume")) for r in records), np.float64, n),
+            end_ts=np.fromiter(
+                (parse_end_date(r.get("end_date")) or np.nan for r in records),
+                np.float64, n
+            ),
+            records=record_col,
+        )
+
+    def __len__(self):
+        return len(self.event_codes)
+
+    # -------------------------------
+    # COLUMNS
+    # -------------------------------
+    def outcome(self, label):
+        """
+        Probability column for one outcome label, NaN where absent.
+        """
+        i = self._label_index.get(label)
+        if i is None:
+            return np.full(len(self), np.nan)
+        return self.probs[:, i]
+
+    # -------------------------------
+    # FILTERING / GROUPING
+    # -------------------------------
+    def event_mask(self, keys):
+        keys = set(keys)
+        codes = [i for i, key in enumerate(self.event_keys) if key in keys]
+        return np.isin(self.event_codes, codes)
+
+    def take(self, selector):
+        return MarketTable(
+            event_keys=self.event_keys,
+            event_codes=self.event_codes[selector],
+            market_ids=self.market_ids[selector],
+            questions=self.questions[selector],
+            outcome_labels=self.outcome_labels,
+            probs=self.probs[selector],
+            volume=self.volume[selector],
+            end_ts=self.end_ts[selector],
+            records=self.records[selector],
+        )
+
+    def with_rows(self, rows, records):
+        """
+        A table with `rows` replaced by `records` (same markets, new
+        outcomes), sharing every other column with this one.
+        """
+        probs = self.probs.copy()
+        record_col = self.records.copy()
+        for row, record in zip(rows, records):
+            probs[row] = np.nan
+            for label, p in record["outcomes"].items():
+                probs[row, self._label_index[label]] = p
+            record_col[row] = record
+
+        return MarketTable(
+            event_keys=self.event_keys,
+            event_codes=self.event_codes,
+            market_ids=self.market_ids,
+            questions=self.questions,
+            outcome_labels=self.outcome_labels,
+            probs=probs,
+            volume=self.volume,
+            end_ts=self.end_ts,
+            records=record_col,
+        )
+
+    def filter_events(self, keys):
+        return self.take(self.event_mask(keys))
+
+    def event_groups(self):
+        """
+        {event_key: row indices}, in category order.
+        """
+        order = np.argsort(self.event_codes, kind="stable")
+        codes, starts = np.unique(self.event_codes[order], return_index=True)
+        groups = np.split(order, starts[1:])
+        return {self.event_keys[c]: rows for c, rows in zip(codes, groups)}
+
+    def event_stats(self):
+        """
+        Market count and total volume per event via bincount.
+        """
+        n_events = len(self.event_keys)
+        counts = np.bincount(self.event_codes, minlength=n_events)
+        volume = np.bincount(self.event_codes, weights=self.volume, minlength=n_events)
+        return {
+            key: {"markets": int(counts[i]), "volume": float(volume[i])}
+            for i, key in enumerate(self.event_keys)
+            if counts[i]
+        }
+
+    # -------------------------------
+    # EXPORT
+    # -------------------------------
+    def to_records(self):
+        return list(self.records)
+
+    def compress(self):
+        return [
+            {
+                "event_key": self.event_keys[code],
+                "question": question,
+                "outcomes": record["outcomes"]
+            }
+            for code, question, record in zip(self.event_codes, self.questions, self.records)
+        ]
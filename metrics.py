@@ -0,0 +1,238 @@
+import threading, time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ===============================
+# TRACING + PROMETHEUS METRICS
+# ===============================
+# Dependency-free counters and histograms rendered in the Prometheus text
+# format on GET /metrics.
+#
+# span(name) times one pipeline stage or outbound call: the duration goes
+# into the span_seconds histogram and, when a request is being traced,
+# into that request's trace (returned as a Server-Timing header).
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [bucket counts..., sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                labels = _format_labels(self.labels, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_value(values[-2])}"
+            yield f"{self.name}_count{labels} {values[-1]}"
+
+class Gauge:
+    """
+    Read at scrape time from `fn` (no labels).
+    """
+
+    def __init__(self, name, help, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return
+        if value is None:
+            return
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_format_value(value)}"
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def counter(name, help, labels=()):
+    return REGISTRY.register(Counter(name, help, labels))
+
+def histogram(name, help, labels=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+def gauge(name, help, fn):
+    return REGISTRY.register(Gauge(name, help, fn))
+
+# -------------------------------
+# METRICS
+# -------------------------------
+SPAN_SECONDS = histogram(
+    "market_pulse_span_seconds",
+    "Wall time per pipeline stage and outbound call",
+    ["span"]
+)
+HTTP_REQUESTS = counter(
+    "market_pulse_http_requests_total",
+    "Outbound Gamma/CLOB requests by host and status",
+    ["host", "status"]
+)
+CACHE_LOOKUPS = counter(
+    "market_pulse_cache_lookups_total",
+    "Cache lookups by cache and result (hit/miss, stale for a replaced snapshot)",
+    ["cache", "result"]
+)
+PRICE_SOURCE = counter(
+    "market_pulse_price_source_total",
+    "Markets priced from CLOB midpoints vs Gamma outcomePrices fallback",
+    ["source"]
+)
+LLM_CALLS = counter(
+    "market_pulse_llm_calls_total",
+    "LLM calls by kind (blocking/stream) and outcome",
+    ["kind", "outcome"]
+)
+LLM_PARSE_FAILURES = counter(
+    "market_pulse_llm_parse_failures_total",
+    "LLM completions that could not be parsed (syntax) or validated (schema)",
+    ["mode", "reason"]
+)
+PROMPT_TOKENS = histogram(
+    "market_pulse_prompt_tokens",
+    "Estimated prompt tokens per LLM call",
+    ["mode"],
+    buckets=TOKEN_BUCKETS
+)
+LLM_RETRIES = counter(
+    "market_pulse_llm_retries_total",
+    "LLM calls retried by kind and reason (throttled/transient)",
+    ["kind", "reason"]
+)
+LLM_SHED = counter(
+    "market_pulse_llm_shed_total",
+    "LLM calls refused by the scheduler by lane and reason",
+    ["lane", "reason"]
+)
+ERRORS = counter(
+    "market_pulse_errors_total",
+    "Handled failures by source",
+    ["source"]
+)
+
+# -------------------------------
+# SPANS
+# -------------------------------
+# The active request trace: [(span name, seconds)], or None
+_TRACE = ContextVar("market_pulse_trace", default=None)
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.observe(elapsed, span=name)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.append((name, elapsed))
+
+@contextmanager
+def traced():
+    """
+    Collects every span finished in this context (including work handed
+    to asyncio.to_thread, which copies the context) into a list.
+    """
+    trace = []
+    token = _TRACE.set(trace)
+    try:
+        yield trace
+    finally:
+        _TRACE.reset(token)
+
+def server_timing(trace):
+    """
+    Server-Timing header value; repeated spans are summed.
+    """
+    totals = {}
+    for name, seconds in trace:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}"
+        for name, seconds in totals.items()
+    )
+
+def render_metrics():
+    return REGISTRY.render()
@@ -22,7 +22,7 @@ export function AssetOutlookSection({
       string,
       {
         bias: "Positive" | "Negative" | "Neutral"
-        confidence: number
+        confidence: number | null
         reasoning: string
       }
     >
@@ -65,7 +65,9 @@ export function AssetOutlookSection({
             <div className="pt-2 border-t border-border text-sm">
               <span className="text-muted-foreground">Confidence</span>
               <span className="float-right font-semibold">
-                {Math.round(outlook.confidence * 100)}%
+                {outlook.confidence === null
+                  ? "n/a"
+                  : `${Math.round(outlook.confidence * 100)}%`}
               </span>
             </div>
           </Card>
@@ -30,10 +30,16 @@ export function CrowdSentimentSection() {
         <Card className="p-5 space-y-2">
           <div className="text-sm text-muted-foreground">Recession Risk</div>
           <div className="text-lg font-semibold">
-            {Math.round(crowd.recession_probability * 100)}%
-            <span className="ml-2 text-sm text-muted-foreground">
-              ({getProbabilityLabel(crowd.recession_probability)})
-            </span>
+            {crowd.recession_probability === null ? (
+              "n/a"
+            ) : (
+              <>
+                {Math.round(crowd.recession_probability * 100)}%
+                <span className="ml-2 text-sm text-muted-foreground">
+                  ({getProbabilityLabel(crowd.recession_probability)})
+                </span>
+              </>
+            )}
           </div>
         </Card>
 
@@ -14,7 +14,8 @@ function colorByLevel(level: string) {
   }
 }
 
-function badgeColor(value: number) {
+function badgeColor(value: number | null) {
+  if (value === null) return "bg-secondary text-muted-foreground"
   if (value >= 70) return "bg-red-500/20 text-red-500"
   if (value >= 40) return "bg-yellow-500/20 text-yellow-500"
   return "bg-green-500/20 text-green-500"
@@ -71,7 +72,7 @@ export function MarketRegimeSection() {
             </div>
           </div>
           <div className="text-3xl font-bold">
-            {market_sentiment.score}
+            {market_sentiment.score ?? "n/a"}
           </div>
         </div>
       </Card>
@@ -85,7 +86,9 @@ export function MarketRegimeSection() {
               risk_indicators.bubble_risk
             )}`}
           >
-            {risk_indicators.bubble_risk} / 100
+            {risk_indicators.bubble_risk === null
+              ? "n/a"
+              : `${risk_indicators.bubble_risk} / 100`}
           </div>
         </Card>
 
@@ -98,7 +101,9 @@ export function MarketRegimeSection() {
               risk_indicators.market_fragility
             )}`}
           >
-            {risk_indicators.market_fragility} / 100
+            {risk_indicators.market_fragility === null
+              ? "n/a"
+              : `${risk_indicators.market_fragility} / 100`}
           </div>
         </Card>
 
@@ -108,10 +113,14 @@ export function MarketRegimeSection() {
           </div>
           <div
             className={`inline-block px-3 py-1 rounded text-sm ${badgeColor(
-              100 - risk_indicators.upside_probability
+              risk_indicators.upside_probability === null
+                ? null
+                : 100 - risk_indicators.upside_probability
             )}`}
           >
-            {risk_indicators.upside_probability}%
+            {risk_indicators.upside_probability === null
+              ? "n/a"
+              : `${risk_indicators.upside_probability}%`}
           </div>
         </Card>
       </div>
@@ -3,13 +3,19 @@
 import { Card } from "@/components/ui/card"
 import { AlertTriangle, TrendingDown, TrendingUp } from "lucide-react"
 
-function severityColor(value: number) {
+function severityColor(value: number | null) {
+  if (value === null) return "text-muted-foreground"
   if (value >= 70) return "text-red-500"
   if (value >= 40) return "text-yellow-500"
   return "text-green-500"
 }
 
-function barColor(value: number) {
+function formatScore(value: number | null, suffix = "") {
+  return value === null ? "n/a" : `${value}${suffix}`
+}
+
+function barColor(value: number | null) {
+  if (value === null) return "bg-muted"
   if (value >= 70) return "bg-red-500"
   if (value >= 40) return "bg-yellow-500"
   return "bg-green-500"
@@ -19,16 +25,17 @@ export function RiskStressSection({
   risk_indicators,
 }: {
   risk_indicators: {
-    bubble_risk: number
-    market_fragility: number
-    upside_probability: number
+    bubble_risk: number | null
+    market_fragility: number | null
+    upside_probability: number | null
   }
 }) {
   const { bubble_risk, market_fragility, upside_probability } =
     risk_indicators
 
 
-  const downside_probability = 100 - upside_probability
+  const downside_probability =
+    upside_probability === null ? null : 100 - upside_probability
 
   return (
     <div className="space-y-4">
@@ -42,13 +49,13 @@ export function RiskStressSection({
             <h3 className="font-semibold">Bubble Risk</h3>
           </div>
 
-          <div className="text-3xl font-bold">{bubble_risk}</div>
+          <div className="text-3xl font-bold">{formatScore(bubble_risk)}</div>
           <div className="text-sm text-muted-foreground">0–100 systemic scale</div>
 
           <div className="h-2 bg-secondary rounded overflow-hidden">
             <div
               className={`h-full ${barColor(bubble_risk)}`}
-              style={{ width: `${bubble_risk}%` }}
+              style={{ width: `${bubble_risk ?? 0}%` }}
             />
           </div>
         </Card>
@@ -60,7 +67,7 @@ export function RiskStressSection({
             <h3 className="font-semibold">Market Fragility</h3>
           </div>
 
-          <div className="text-3xl font-bold">{market_fragility}</div>
+          <div className="text-3xl font-bold">{formatScore(market_fragility)}</div>
           <div className="text-sm text-muted-foreground">
             Sensitivity to shocks
           </div>
@@ -68,7 +75,7 @@ export function RiskStressSection({
           <div className="h-2 bg-secondary rounded overflow-hidden">
             <div
               className={`h-full ${barColor(market_fragility)}`}
-              style={{ width: `${market_fragility}%` }}
+              style={{ width: `${market_fragility ?? 0}%` }}
             />
           </div>
         </Card>
@@ -83,12 +90,12 @@ export function RiskStressSection({
                 <TrendingUp className="h-4 w-4 text-green-500" />
                 Upside
               </span>
-              <span className="font-semibold">{upside_probability}%</span>
+              <span className="font-semibold">{formatScore(upside_probability, "%")}</span>
             </div>
             <div className="h-2 bg-secondary rounded overflow-hidden">
               <div
                 className="h-full bg-green-500"
-                style={{ width: `${upside_probability}%` }}
+                style={{ width: `${upside_probability ?? 0}%` }}
               />
             </div>
           </div>
@@ -99,12 +106,12 @@ export function RiskStressSection({
                 <TrendingDown className="h-4 w-4 text-red-500" />
                 Downside
               </span>
-              <span className="font-semibold">{downside_probability}%</span>
+              <span className="font-semibold">{formatScore(downside_probability, "%")}</span>
             </div>
             <div className="h-2 bg-secondary rounded overflow-hidden">
               <div
                 className="h-full bg-red-500"
-                style={{ width: `${downside_probability}%` }}
+                style={{ width: `${downside_probability ?? 0}%` }}
               />
             </div>
           </div>
@@ -1,19 +1,21 @@
 "use client"
 
 export type SentimentGaugeProps = {
-  value: number // 0–100
+  value: number | null // 0–100, null without a signal
 }
 
 export function SentimentGauge({ value }: SentimentGaugeProps) {
-  const rotation = (value / 100) * 180 - 90
+  const rotation = value === null ? 0 : (value / 100) * 180 - 90
 
-  const getSentimentLabel = (val: number) => {
+  const getSentimentLabel = (val: number | null) => {
+    if (val === null) return "Unknown"
     if (val < 35) return "Bearish"
     if (val < 65) return "Neutral"
     return "Bullish"
   }
 
-  const getSentimentColor = (val: number) => {
+  const getSentimentColor = (val: number | null) => {
+    if (val === null) return "text-muted-foreground"
     if (val < 35) return "text-red-500"
     if (val < 65) return "text-yellow-500"
     return "text-green-500"
@@ -60,7 +62,7 @@ export function SentimentGauge({ value }: SentimentGaugeProps) {
           {getSentimentLabel(value)}
         </div>
         <div className="text-xs text-muted-foreground">
-          Score: {value}/100
+          Score: {value === null ? "n/a" : `${value}/100`}
         </div>
       </div>
     </div>
@@ -7,9 +7,9 @@ export function StatusBadges({
   liquidity,
   volatility,
 }: {
-  risk: "Risk-On" | "Risk-Off" | "Transitional"
+  risk: "Risk-On" | "Risk-Off" | "Transitional" | "Unknown"
   liquidity: "Easing" | "Neutral" | "Tightening"
-  volatility: "Low" | "Normal" | "Elevated"
+  volatility: "Low" | "Normal" | "Elevated" | "Unknown"
 }) 
 {
   const badges = [
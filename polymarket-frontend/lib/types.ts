@@ -23,19 +23,19 @@ export type AnalyzeRequest = {
 // --------------------
 
 export type MarketSentiment = {
-  label: "Bullish" | "Neutral" | "Bearish"
-  score: number
+  label: "Bullish" | "Neutral" | "Bearish" | "Unknown"
+  score: number | null
 }
 
 export type MarketRegime = {
-  risk: "Risk-On" | "Risk-Off" | "Transitional"
+  risk: "Risk-On" | "Risk-Off" | "Transitional" | "Unknown"
   liquidity: "Easing" | "Neutral" | "Tightening"
-  volatility: "Low" | "Normal" | "Elevated"
+  volatility: "Low" | "Normal" | "Elevated" | "Unknown"
 }
 
 export type AssetOutlook = {
   bias: "Positive" | "Neutral" | "Negative"
-  confidence: number
+  confidence: number | null
   reasoning: string
 }
 
@@ -52,14 +52,14 @@ export type AnalyzeResponse = {
   market_regime: MarketRegime
   crowd_signals: {
     fed_policy_bias: string
-    recession_probability: number
+    recession_probability: number | null
     rate_cut_bias: string
   }
   asset_outlook: Record<string, AssetOutlook>
   top_stocks: TopStock[]
   risk_indicators: {
-    bubble_risk: number
-    market_fragility: number
-    upside_probability: number
+    bubble_risk: number | null
+    market_fragility: number | null
+    upside_probability: number | null
   }
 }
\ No newline at end of file
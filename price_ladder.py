@@ -0,0 +1,247 @@
+import copy, re
+import numpy as np
+from company_signals import (
+    COMPANY_SIGNAL_MAP,
+    STOCK_UNIVERSE,
+    TICKER_ALIASES,
+    UPSIDE_STRIKE_FLOOR,
+    resolve_ticker,
+)
+
+# ===============================
+# PRICE LADDER INDEX
+# ===============================
+# "Will NVIDIA reach $272 in February?" / "Will NVIDIA dip to $184 ...?"
+#
+# Every ladder-style market in the snapshot is parsed once into
+# (ticker, direction, strike, Yes probability) rows, sorted by ticker,
+# direction and strike. Company signals for any number of tickers are then
+# computed in one vectorized pass over those rows.
+#
+# Every ladder direction feeds the implied distribution and the tails, but
+# confidence / avg_probability / dispersion / num_targets keep their
+# original definition: "reach $X" markets at or above the ticker's
+# UPSIDE_STRIKE_FLOOR.
+
+UP, DOWN = 1, -1
+
+_LADDER_RE = re.compile(
+    r"\b(?P<direction>reach|hit|rise to|above|dip to|fall to|drop to|below)"
+    r"\s+\$(?P<strike>\d[\d,]*(?:\.\d+)?)"
+    # "$5T market cap" is not a share price
+    r"(?!\d|[.,]\d|\s*(?:[kmbt]|thousand|million|billion|trillion)\b)",
+    re.IGNORECASE
+)
+# "(NVDA)" for symbols we know, "($XYZ)" for any other; never "(ET)"
+_EXPLICIT_TICKER_RE = re.compile(r"\((?:\$(?P<symbol>[A-Z]{1,5})|(?P<ticker>[A-Z]{1,5}))\)")
+_KNOWN_TICKERS = (
+    set(TICKER_ALIASES.values())
+    | set(COMPANY_SIGNAL_MAP)
+    | {ticker for stocks in STOCK_UNIVERSE.values() for _, ticker in stocks}
+)
+_ALIAS_RE = re.compile(
+    r"\b(?P<alias>" + "|".join(
+        re.escape(alias) for alias in sorted(TICKER_ALIASES, key=len, reverse=True)
+    ) + r")\b",
+    re.IGNORECASE
+)
+_DOWN_WORDS = {"dip to", "fall to", "drop to", "below"}
+
+def parse_ladder_question(question: str):
+    """
+    question -> (ticker, direction, strike, reach), or None if it is not
+    a price-ladder market. `reach` is True for "reach $X" markets.
+    """
+    match = _LADDER_RE.search(question)
+    if not match:
+        return None
+
+    ticker = _explicit_ticker(question)
+    if ticker is None:
+        alias = _ALIAS_RE.search(question)
+        if not alias:
+            return None
+        ticker = TICKER_ALIASES[alias.group("alias").lower()]
+
+    word = match.group("direction").lower()
+    direction = DOWN if word in _DOWN_WORDS else UP
+    strike = float(match.group("strike").replace(",", ""))
+    return ticker, direction, strike, word == "reach"
+
+def _explicit_ticker(question):
+    for explicit in _EXPLICIT_TICKER_RE.finditer(question):
+        if explicit.group("symbol"):
+            return explicit.group("symbol")
+        if explicit.group("ticker") in _KNOWN_TICKERS:
+            return explicit.group("ticker")
+    return None
+
+class LadderIndex:
+    def __init__(self, tickers, ticker_codes, directions, strikes, probs, event_codes, reach, rows=None):
+        self.tickers = tickers
+        self.ticker_codes = ticker_codes
+        self.directions = directions
+        self.strikes = strikes
+        self.probs = probs
+        self.event_codes = event_codes
+        # "reach $X" rows, the ones confidence is computed over
+        self.reach = reach
+        # Source table row of each ladder row
+        self.rows = rows
+        self._ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+
+        # (ticker code, direction) -> contiguous [start, end) of sorted rows
+        self.slices = {}
+        for row in range(len(strikes)):
+            key = (int(ticker_codes[row]), int(directions[row]))
+            start, _ = self.slices.get(key, (row, row))
+            self.slices[key] = (start, row + 1)
+
+    @classmethod
+    def from_table(cls, table):
+        rows, parsed = [], []
+        for row, question in enumerate(table.questions):
+            result = parse_ladder_question(question)
+            if result:
+                rows.append(row)
+                parsed.append(result)
+
+        tickers = sorted({ticker for ticker, _, _, _ in parsed})
+        ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+        rows = np.array(rows, dtype=np.intp)
+
+        ticker_codes = np.array([ticker_index[t] for t, _, _, _ in parsed], dtype=np.int32)
+        directions = np.array([d for _, d, _, _ in parsed], dtype=np.int8)
+        strikes = np.array([k for _, _, k, _ in parsed], dtype=np.float64)
+        reach = np.array([r for _, _, _, r in parsed], dtype=bool)
+        probs = _yes_probs(table, rows)
+        event_codes = table.event_codes[rows] if len(rows) else np.zeros(0, dtype=np.int32)
+
+        order = np.lexsort((strikes, directions, ticker_codes))
+        return cls(
+            tickers,
+            ticker_codes[order],
+            directions[order],
+            strikes[order],
+            probs[order],
+            event_codes[order],
+            reach[order],
+            rows[order],
+        )
+
+    def with_table(self, table):
+        """
+        This ladder repriced from `table`, a table over the same markets,
+        without parsing any question again.
+        """
+        index = copy.copy(self)
+        index.probs = _yes_probs(table, self.rows)
+        return index
+
+    def __len__(self):
+        return len(self.strikes)
+
+    def code_for(self, ticker):
+        return self._ticker_index.get(ticker)
+
+def _yes_probs(table, rows):
+    if not len(rows):
+        return np.zeros(0)
+    return np.nan_to_num(table.outcome("Yes")[rows], nan=0.0)
+
+def _empty_signal(num_targets=0):
+    return {
+        "confidence": None,
+        "avg_probability": None,
+        "dispersion": None,
+        "num_targets": num_targets
+    }
+
+def _ladder(strikes, probs, direction):
+    """
+    Touch probabilities made monotone: strikes further from the money are
+    never more likely than nearer ones.
+    """
+    if direction == UP:
+        probs = np.minimum.accumulate(probs)
+    else:
+        probs = np.minimum.accumulate(probs[::-1])[::-1]
+    return strikes, probs
+
+def _distribution(up_strikes, up_probs):
+    # P(high lands in [K_i, K_i+1)) from P(reach K_i) - P(reach K_i+1)
+    mass = up_probs - np.append(up_probs[1:], 0.0)
+    buckets = [{"to": float(up_strikes[0]), "probability": round(float(1 - up_probs[0]), 3)}]
+    buckets.extend(
+        {"from": float(k), "probability": round(float(p), 3)}
+        for k, p in zip(up_strikes, mass)
+    )
+    return buckets
+
+def compute_company_signals(companies, index, event_codes=None):
+    """
+    Signals for every requested company from one pass over `index`,
+    optionally restricted to markets in `event_codes`.
+    """
+    n_tickers = len(index.tickers)
+    mask = np.ones(len(index), dtype=bool)
+    if event_codes is not None:
+        mask &= np.isin(index.event_codes, list(event_codes))
+
+    # "reach $X" rows at or above the ticker's upside floor
+    floors = np.array(
+        [UPSIDE_STRIKE_FLOOR.get(t, 0) for t in index.tickers], dtype=np.float64
+    )
+    if n_tickers:
+        counted = mask & index.reach & (index.strikes >= floors[index.ticker_codes])
+    else:
+        counted = mask
+
+    codes = index.ticker_codes[counted]
+    probs = index.probs[counted]
+    counts = np.bincount(codes, minlength=n_tickers)
+    sums = np.bincount(codes, weights=probs, minlength=n_tickers)
+    sumsq = np.bincount(codes, weights=probs ** 2, minlength=n_tickers)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(sumsq / counts - means ** 2, 0.0))
+
+    signals = {}
+    for company in companies:
+        code = index.code_for(resolve_ticker(company))
+        if code is None:
+            signals[company] = _empty_signal()
+            continue
+
+        count = int(counts[code])
+        if count < 2:
+            signals[company] = _empty_signal(count)
+            continue
+
+        avg = float(means[code])
+        std = float(stds[code])
+        signal = {
+            "confidence": round(avg * (1 - std), 3),
+            "avg_probability": round(avg, 3),
+            "dispersion": round(std, 3),
+            "num_targets": count
+        }
+
+        for direction in (UP, DOWN):
+            start, end = index.slices.get((code, direction), (0, 0))
+            rows = np.arange(start, end)[mask[start:end]]
+            if not len(rows):
+                continue
+
+            strikes, probs = _ladder(index.strikes[rows], index.probs[rows], direction)
+
+            if direction == UP:
+                signal["upside_tail"] = {"strike": float(strikes[-1]), "probability": round(float(probs[-1]), 3)}
+                signal["implied_distribution"] = _distribution(strikes, probs)
+            else:
+                signal["downside_tail"] = {"strike": float(strikes[0]), "probability": round(float(probs[0]), 3)}
+
+        signals[company] = signal
+
+    return signals
@@ -0,0 +1,132 @@
+import asyncio, requests
+from config import CLOB_BASE, CLOB_BATCH_SIZE
+from transport import SESSION
+
+# Round-trip accounting for the most recent refresh
+LAST_PRICING_STATS = {}
+
+async def run_blocking(semaphore, fn, *args):
+    # requests is blocking, so each call runs on a worker thread;
+    # the semaphore caps how many are in flight at once.
+    async with semaphore:
+        return await asyncio.to_thread(fn, *args)
+
+def _parse_price(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+def fetch_token_midpoint(token_id):
+    try:
+        resp = SESSION.get(
+            f"{CLOB_BASE}/midpoint",
+            params={"token_id": token_id},
+            timeout=10
+        )
+
+        if resp.status_code != 200:
+            return None
+
+        data = resp.json()
+
+        # Handle all real-world cases
+        if "midpoint" in data and data["midpoint"] is not None:
+            return float(data["midpoint"])
+
+        if "price" in data and data["price"] is not None:
+            return float(data["price"])
+
+        return None
+
+    except (requests.exceptions.RequestException, ValueError, TypeError):
+        return None
+
+def fetch_midpoints_batch(token_ids):
+    """
+    Resolves many tokens in one POST /midpoints call.
+    Returns {token_id: price} for the tokens CLOB could price,
+    or None if the whole request failed.
+    """
+    try:
+        resp = SESSION.post(
+            f"{CLOB_BASE}/midpoints",
+            json=[{"token_id": token_id} for token_id in token_ids],
+            timeout=10
+        )
+
+        if resp.status_code != 200:
+            return None
+
+        data = resp.json()
+        if not isinstance(data, dict):
+            return None
+
+        prices = {}
+        for token_id in token_ids:
+            price = _parse_price(data.get(token_id))
+            if price is not None:
+                prices[token_id] = price
+
+        return prices
+
+    except (requests.exceptions.RequestException, ValueError, TypeError):
+        return None
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+async def resolve_token_prices(semaphore, token_ids, batch_size=CLOB_BATCH_SIZE):
+    """
+    Prices every token of a refresh in as few CLOB round trips as possible.
+
+    1. Chunked POST /midpoints requests
+    2. GET /midpoint for tokens a failed chunk left unpriced
+
+    Tokens still missing afterwards are left out; callers fall back to
+    Gamma outcomePrices for those markets.
+    """
+    token_ids = list(dict.fromkeys(token_ids))
+    chunks = list(chunked(token_ids, batch_size))
+
+    batches = await asyncio.gather(*(
+        run_blocking(semaphore, fetch_midpoints_batch, chunk)
+        for chunk in chunks
+    ))
+
+    prices = {}
+    retry_ids = []
+    for chunk, batch in zip(chunks, batches):
+        if batch is None:
+            retry_ids.extend(chunk)
+        else:
+            prices.update(batch)
+
+    singles = await asyncio.gather(*(
+        run_blocking(semaphore, fetch_token_midpoint, token_id)
+        for token_id in retry_ids
+    ))
+
+    for token_id, price in zip(retry_ids, singles):
+        if price is not None:
+            prices[token_id] = price
+
+    round_trips = len(chunks) + len(retry_ids)
+
+    LAST_PRICING_STATS.clear()
+    LAST_PRICING_STATS.update({
+        "tokens": len(token_ids),
+        "priced": len(prices),
+        "batch_requests": len(chunks),
+        "single_requests": len(retry_ids),
+        "round_trips": round_trips,
+        "round_trips_saved": len(token_ids) - round_trips,
+    })
+
+    print(
+        f"💱 Priced {len(prices)}/{len(token_ids)} tokens in {round_trips} "
+        f"CLOB round trips (saved {len(token_ids) - round_trips})"
+    )
+
+    return prices
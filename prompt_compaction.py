@@ -0,0 +1,76 @@
+import numpy as np
+from config import PROMPT_MARKET_TOKEN_BUDGET, PROMPT_RANK_BY
+from serialization import dumps_text
+
+# ===============================
+# PROMPT COMPACTION
+# ===============================
+# Market data goes into the prompt as minified JSON with short keys:
+#
+#   k = event_key, q = question, o = outcome probabilities
+#
+# When that still exceeds the token budget, markets are ranked by volume
+# (or by outcome entropy) and the lowest-ranked ones are dropped. Kept
+# markets stay in snapshot order.
+
+MARKET_KEY_LEGEND = "k=event_key, q=question, o=outcome probabilities"
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English/JSON; no tokenizer for Sarvam
+    return (len(text) + 3) // 4
+
+def _compact_item(event_key, question, outcomes):
+    return dumps_text({"k": event_key, "q": question, "o": outcomes})
+
+def _entropy(probs):
+    p = np.nan_to_num(probs, nan=0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, -p * np.log2(p), 0.0)
+    return terms.sum(axis=1)
+
+def rank_markets(table, rank_by=PROMPT_RANK_BY):
+    """
+    Row indices of `table`, most valuable first.
+    """
+    if rank_by == "information":
+        score = _entropy(table.probs)
+    else:
+        score = table.volume
+    return np.argsort(-score, kind="stable")
+
+def compact_market_data(table, token_budget=PROMPT_MARKET_TOKEN_BUDGET, rank_by=PROMPT_RANK_BY):
+    """
+    Returns (minified JSON array, stats) for the markets in `table`,
+    trimmed to fit `token_budget`.
+    """
+    compressed = table.compress()
+    tokens_before = estimate_tokens(dumps_text(compressed, indent=True))
+
+    items = [
+        _compact_item(m["event_key"], m["question"], m["outcomes"])
+        for m in compressed
+    ]
+
+    # Greedily keep the best-ranked markets while they fit
+    keep = np.zeros(len(items), dtype=bool)
+    used_chars = 2  # "[" and "]"
+    budget_chars = token_budget * 4
+    for row in rank_markets(table, rank_by):
+        cost = len(items[row]) + 1  # item + ","
+        if used_chars + cost > budget_chars:
+            continue
+        keep[row] = True
+        used_chars += cost
+
+    text = "[" + ",".join(item for item, kept in zip(items, keep) if kept) + "]"
+
+    stats = {
+        "markets_before": len(items),
+        "markets_after": int(keep.sum()),
+        "tokens_before": tokens_before,
+        "tokens_after": estimate_tokens(text),
+        "token_budget": token_budget,
+        "rank_by": rank_by,
+    }
+
+    return text, stats
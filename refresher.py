@@ -0,0 +1,213 @@
+import asyncio, math, time
+from config import (
+    CLOB_BATCH_SIZE,
+    REFRESH_TICK_SECONDS,
+    REFRESH_REQUEST_BUDGET_PER_MINUTE,
+    REFRESH_MOVEMENT_THRESHOLD,
+    REFRESH_MIN_INTERVAL,
+    CATALOG_SYNC_ENABLED,
+    CATALOG_SYNC_INTERVAL,
+)
+from catalog import get_catalog
+from event_cache import EventCache, event_ttl, parse_volume
+from market_data import tracked_event_keys, refresh_event_cache_async, save_market_snapshot
+from snapshot import SNAPSHOTS
+from metrics import span, ERRORS
+
+# ===============================
+# BACKGROUND MARKET REFRESHER
+# ===============================
+# Keeps the in-memory snapshot warm so no request ever pays for a crawl.
+#
+# Each event has its own cadence: its TTL (shorter near end_date and for
+# high-volume markets), halved while its probabilities are moving. Every
+# tick the most overdue events are refreshed first, as long as the global
+# request budget (a token bucket in HTTP requests per minute) allows.
+#
+# The Gamma event catalog is synced on its own, slower cadence, with its
+# page requests charged to the same budget; events it starts tracking are
+# simply overdue on the next tick.
+
+class RequestBudget:
+    def __init__(self, per_minute=REFRESH_REQUEST_BUDGET_PER_MINUTE):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_spend(self, cost):
+        self._refill()
+        if cost > self.tokens:
+            return False
+        self.tokens -= cost
+        return True
+
+def estimate_requests(records):
+    # One Gamma call plus this event's share of batched CLOB calls
+    tokens = sum(len(r["outcomes"]) for r in records)
+    return 1 + math.ceil(tokens / CLOB_BATCH_SIZE)
+
+def max_movement(old_records, new_records):
+    old = {r["market_id"]: r["outcomes"] for r in old_records}
+    movement = 0.0
+    for record in new_records:
+        previous = old.get(record["market_id"])
+        if not previous:
+            continue
+        for label, p in record["outcomes"].items():
+            movement = max(movement, abs(p - previous.get(label, p)))
+    return movement
+
+class MarketRefresher:
+    def __init__(self, snapshots=SNAPSHOTS, budget=None):
+        self.snapshots = snapshots
+        self.budget = budget or RequestBudget()
+        self.cache = EventCache.load()
+        self.movement = {}
+        self.catalog_attempted_at = 0.0
+        self.catalog_deferred = False
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    # -------------------------------
+    # SCHEDULING
+    # -------------------------------
+    def cadence(self, key, now=None):
+        records = self.cache.entries.get(key, {}).get("records", [])
+        interval = event_ttl(records, now)
+        if self.movement.get(key, 0.0) >= REFRESH_MOVEMENT_THRESHOLD:
+            interval /= 2
+        return max(REFRESH_MIN_INTERVAL, interval)
+
+    def due_at(self, key, now=None):
+        entry = self.cache.entries.get(key)
+        if entry is None:
+            return 0.0
+        return entry["fetched_at"] + self.cadence(key, now)
+
+    def _volume(self, key):
+        records = self.cache.entries.get(key, {}).get("records", [])
+        return sum(parse_volume(r.get("volume")) for r in records)
+
+    def due_events(self, now=None, force=False):
+        """
+        Events to refresh now, most overdue first (busier events break ties).
+        """
+        now = now or time.time()
+        keys = tracked_event_keys()
+        if not force:
+            keys = [key for key in keys if self.due_at(key, now) <= now]
+        return sorted(keys, key=lambda key: (self.due_at(key, now), -self._volume(key)))
+
+    def _within_budget(self, keys):
+        selected = []
+        for key in keys:
+            records = self.cache.entries.get(key, {}).get("records", [])
+            if not self.budget.try_spend(estimate_requests(records)):
+                break
+            selected.append(key)
+        return selected
+
+    # -------------------------------
+    # REFRESH
+    # -------------------------------
+    async def refresh_once(self, force=False):
+        """
+        Refreshes whatever is due (or everything when forced) within the
+        request budget. Returns the refreshed event keys.
+        """
+        async with self._lock:
+            keys = self._within_budget(self.due_events(force=force))
+            if not keys:
+                return []
+
+            previous = {
+                key: self.cache.entries.get(key, {}).get("records", [])
+                for key in keys
+            }
+            with span("refresh.fetch"):
+                refreshed = await refresh_event_cache_async(self.cache, keys)
+            if not refreshed:
+                return []
+
+            for key in refreshed:
+                self.movement[key] = max_movement(
+                    previous[key], self.cache.entries[key]["records"]
+                )
+
+            results = self.cache.records(tracked_event_keys())
+            await asyncio.to_thread(self.cache.save)
+            await asyncio.to_thread(save_market_snapshot, results)
+            with span("refresh.publish"):
+                await asyncio.to_thread(self.snapshots.publish, results)
+
+            print(f"🔄 Refreshed {len(refreshed)} events: {', '.join(refreshed)}")
+            return refreshed
+
+    async def sync_catalog(self, full=None):
+        """
+        Syncs the event catalog in a worker thread (a full relist when one
+        is due), spending the request budget. Returns the sync summary.
+        """
+        catalog = get_catalog()
+        if full is None:
+            full = catalog.full_sync_due()
+
+        self.catalog_attempted_at = time.time()
+        with span("catalog.sync"):
+            result = await asyncio.to_thread(catalog.sync, full, None, self.budget)
+
+        # Out of budget: carry on from the saved offset once it refills
+        self.catalog_deferred = bool(result.get("deferred"))
+        if result["ok"]:
+            print(
+                f"📚 Catalog synced: {result['events']} events in {result['pages']} pages, "
+                f"{result['tracked']} tracked"
+            )
+        return result
+
+    def catalog_due(self, now=None):
+        # Failed syncs are retried on the sync cadence, not every tick;
+        # syncs deferred by the budget continue on the next tick
+        now = now or time.time()
+        if not CATALOG_SYNC_ENABLED:
+            return False
+        if self.catalog_deferred:
+            return True
+        return (
+            now - self.catalog_attempted_at >= CATALOG_SYNC_INTERVAL
+            and get_catalog().sync_due(now)
+        )
+
+    async def run(self):
+        while True:
+            try:
+                if self.catalog_due():
+                    await self.sync_catalog()
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Background refresh failed: {e}")
+                ERRORS.inc(source="refresher")
+            await asyncio.sleep(REFRESH_TICK_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
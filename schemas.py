@@ -1,9 +1,63 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Dict, Any, Literal, Optional
 
 class AnalyzeRequest(BaseModel):
     events: List[str]
     companies: List[str]
+    # "fast": rules only, no LLM; "fast_reasoning": LLM writes reasoning only
+    mode: Literal["llm", "fast", "fast_reasoning"] = "llm"
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[AnalyzeRequest]
 
 class AnalyzeResponse(BaseModel):
-    result: Dict[str, Any]
\ No newline at end of file
+    result: Dict[str, Any]
+
+# -------------------------------
+# ENGINE OUTPUT (LLM response schema)
+# -------------------------------
+# "Unknown" / null where there is no signal behind the value
+class MarketSentiment(BaseModel):
+    label: Literal["Bullish", "Neutral", "Bearish", "Unknown"]
+    score: Optional[int] = Field(default=None, ge=0, le=100)
+
+class MarketRegime(BaseModel):
+    risk: Literal["Risk-On", "Risk-Off", "Transitional", "Unknown"]
+    liquidity: Literal["Easing", "Neutral", "Tightening"]
+    volatility: Literal["Low", "Normal", "Elevated", "Unknown"]
+
+class CrowdSignals(BaseModel):
+    fed_policy_bias: str
+    recession_probability: Optional[float] = Field(default=None, ge=0, le=1)
+    rate_cut_bias: str
+
+class AssetOutlook(BaseModel):
+    bias: Literal["Positive", "Neutral", "Negative"]
+    confidence: Optional[float] = Field(default=None, ge=0, le=1)
+    reasoning: str = ""
+
+class TopStock(BaseModel):
+    name: str
+    ticker: str
+    sector: str
+    reasoning: str = ""
+    expected_outperformance: Literal["Moderate", "High"]
+
+class RiskIndicators(BaseModel):
+    bubble_risk: Optional[int] = Field(default=None, ge=0, le=100)
+    market_fragility: Optional[int] = Field(default=None, ge=0, le=100)
+    upside_probability: Optional[int] = Field(default=None, ge=0, le=100)
+
+class AnalysisOutput(BaseModel):
+    market_sentiment: MarketSentiment
+    market_regime: MarketRegime
+    crowd_signals: CrowdSignals
+    asset_outlook: Dict[str, AssetOutlook] = {}
+    top_stocks: List[TopStock] = []
+    risk_indicators: RiskIndicators
+
+# Top-level field -> validator, for partial results as they stream
+ANALYSIS_FIELDS = {
+    name: TypeAdapter(field.annotation)
+    for name, field in AnalysisOutput.model_fields.items()
+}
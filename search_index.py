@@ -0,0 +1,318 @@
+import bisect, heapq, math, re, threading, time
+from config import (
+    SEARCH_MIN_PREFIX,
+    SEARCH_MAX_EXPANSIONS,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_RECENCY_HALF_LIFE,
+)
+from event_cache import parse_volume
+
+# ===============================
+# MARKET SEARCH INDEX
+# ===============================
+# In-process inverted index over market questions and event titles, for
+# typeahead event selection.
+#
+# - every query term matches as a word prefix (terms shorter than
+#   SEARCH_MIN_PREFIX only as whole words) via bisect over the sorted
+#   vocabulary; all terms must match
+# - results are ranked by log volume, halved for every
+#   SEARCH_RECENCY_HALF_LIFE since the market's prices or volume last
+#   changed. As a sort key that is log(weight) + changed_at * ln2 /
+#   half-life, which never needs recomputing as time passes, so markets
+#   are kept in one sorted list and broad queries stop after `limit` hits
+# - update() diffs a new snapshot against the indexed one by market_id and
+#   only touches markets that were added, removed or changed; a snapshot
+#   derived from the indexed one only passes its changed records
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "any", "at", "be", "by", "for", "how", "in", "is",
+    "of", "on", "or", "the", "to", "what", "when", "which", "who", "will",
+})
+
+# Candidate sets larger than this are ranked by walking the sorted market
+# list instead of sorting the candidates; a walk gives up after _SCAN_MAX
+_SCAN_THRESHOLD = 2000
+_SCAN_MAX = 20000
+# Sorted-list changes applied one by one up to this many
+_BISECT_MAX = 1000
+
+_DECAY = math.log(2) / SEARCH_RECENCY_HALF_LIFE
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall((text or "").lower()) if token not in STOPWORDS]
+
+def _record_tokens(record):
+    text = f"{record.get('market_question')} {record.get('event_title')}".lower()
+    return frozenset(_TOKEN.findall(text)) - STOPWORDS
+
+def _text(record):
+    return record.get("market_question"), record.get("event_title")
+
+def rank_key(volume, changed_at):
+    return math.log1p(math.log1p(parse_volume(volume))) + changed_at * _DECAY
+
+class SearchIndex:
+    def __init__(self):
+        # market_id -> {"record", "tokens", "key"}
+        self._docs = {}
+        # token -> {market_id}
+        self._postings = {}
+        self._vocab = []
+        # [(-rank key, market_id)], best first
+        self._ranked = []
+
+        self.version = None
+        self._lock = threading.Lock()
+        # Serializes update(); queries only wait while changes are applied
+        self._update_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    # -------------------------------
+    # UPDATES
+    # -------------------------------
+    def _add_postings(self, market_id, tokens, new_words):
+        postings = self._postings
+        for token in tokens:
+            posting = postings.get(token)
+            if posting is None:
+                postings[token] = {market_id}
+                new_words.append(token)
+            else:
+                posting.add(market_id)
+
+    def _remove_postings(self, market_id, tokens, dropped_words):
+        for token in tokens:
+            posting = self._postings[token]
+            posting.discard(market_id)
+            if not posting:
+                del self._postings[token]
+                dropped_words.append(token)
+
+    def update(self, records, version=None, now=None, partial=False):
+        """
+        Brings the index in line with `records`, or with just those
+        markets if `partial`. Returns the number of markets added, changed
+        or removed.
+        """
+        now = now or time.time()
+
+        with self._update_lock:
+            # Diff outside the query lock; unchanged records are usually
+            # the very same dicts as last time
+            docs = self._docs
+            changes, seen, added = [], set(), 0
+            for record in records:
+                market_id = str(record["market_id"])
+                seen.add(market_id)
+                doc = docs.get(market_id)
+                if doc is not None and doc["record"] is record:
+                    continue
+
+                if doc is None:
+                    added += 1
+                    changes.append((market_id, record, _record_tokens(record), rank_key(record.get("volume"), now)))
+                    continue
+
+                old = doc["record"]
+                tokens = doc["tokens"] if _text(old) == _text(record) else _record_tokens(record)
+                moved = old.get("outcomes") != record.get("outcomes") or old.get("volume") != record.get("volume")
+                key = rank_key(record.get("volume"), now) if moved else doc["key"]
+                changes.append((market_id, record, tokens, key))
+
+            removed = []
+            if not partial and len(docs) + added > len(seen):
+                removed = [market_id for market_id in docs if market_id not in seen]
+
+            with self._lock:
+                new_words, dropped_words = [], []
+                new_ranks, dropped_ranks = [], []
+
+                for market_id in removed:
+                    doc = docs.pop(market_id)
+                    self._remove_postings(market_id, doc["tokens"], dropped_words)
+                    dropped_ranks.append((-doc["key"], market_id))
+
+                for market_id, record, tokens, key in changes:
+                    doc = docs.get(market_id)
+                    if doc is None:
+                        self._add_postings(market_id, tokens, new_words)
+                        new_ranks.append((-key, market_id))
+                        docs[market_id] = {"record": record, "tokens": tokens, "key": key}
+                        continue
+
+                    if tokens is not doc["tokens"]:
+                        self._remove_postings(market_id, doc["tokens"] - tokens, dropped_words)
+                        self._add_postings(market_id, tokens - doc["tokens"], new_words)
+                    if key != doc["key"]:
+                        dropped_ranks.append((-doc["key"], market_id))
+                        new_ranks.append((-key, market_id))
+                    doc.update(record=record, tokens=tokens, key=key)
+
+                # A word can be dropped and re-added within one update
+                _apply_sorted(self._vocab, new_words, dropped_words)
+                _apply_sorted(self._ranked, new_ranks, dropped_ranks)
+                self.version = version
+
+        return len(changes) + len(removed)
+
+    def sync(self, snapshot):
+        """
+        Updates the index to `snapshot` unless it already reflects it.
+        """
+        if self.version == snapshot.version:
+            return
+        if snapshot.base_version is not None and self.version == snapshot.base_version:
+            self.update(snapshot.changed, version=snapshot.version, partial=True)
+        else:
+            self.update(snapshot.records, version=snapshot.version)
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+    def _expand(self, term):
+        if len(term) < SEARCH_MIN_PREFIX:
+            return [term] if term in self._postings else []
+
+        words = []
+        start = bisect.bisect_left(self._vocab, term)
+        for word in self._vocab[start:start + SEARCH_MAX_EXPANSIONS]:
+            if not word.startswith(term):
+                break
+            words.append(word)
+        return words
+
+    def _scan(self, groups, limit):
+        """
+        Walks markets best-first, keeping those that match every group.
+        Returns None if too many markets were checked to fill `limit`.
+        """
+        wordsets = [words for _, words, _ in groups]
+        docs = self._docs
+        top = []
+        for checked, (_, market_id) in enumerate(self._ranked):
+            if checked >= _SCAN_MAX:
+                return None
+            tokens = docs[market_id]["tokens"]
+            if all(not words.isdisjoint(tokens) for words in wordsets):
+                top.append(market_id)
+                if len(top) == limit:
+                    break
+        return top
+
+    def _intersect(self, groups, limit):
+        # Start from the most selective term; a few candidates are checked
+        # against their own tokens, otherwise later terms are intersected
+        # as sets
+        _, _, postings = groups[0]
+        candidates = postings[0] if len(postings) == 1 else set().union(*postings)
+        for size, words, postings in groups[1:]:
+            if len(candidates) * 16 >= size:
+                other = postings[0] if len(postings) == 1 else set().union(*postings)
+                candidates = candidates & other
+            else:
+                candidates = {
+                    market_id for market_id in candidates
+                    if not words.isdisjoint(self._docs[market_id]["tokens"])
+                }
+            if not candidates:
+                return []
+
+        if len(candidates) > _SCAN_THRESHOLD:
+            top = []
+            for _, market_id in self._ranked:
+                if market_id in candidates:
+                    top.append(market_id)
+                    if len(top) == limit:
+                        break
+            return top
+        return heapq.nlargest(limit, candidates, key=lambda market_id: self._docs[market_id]["key"])
+
+    def search(self, query, limit=SEARCH_DEFAULT_LIMIT):
+        """
+        Best `limit` records matching every term of `query`.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            # Per term: estimated matches, the words it expands to and
+            # their postings
+            groups = []
+            for term in terms:
+                words = self._expand(term)
+                if not words:
+                    return []
+                postings = [self._postings[word] for word in words]
+                groups.append((sum(len(p) for p in postings), frozenset(words), postings))
+            groups.sort(key=lambda group: group[0])
+
+            # Only common terms: the best markets match early, so walking
+            # them beats building large candidate sets
+            top = None
+            if groups[0][0] > _SCAN_THRESHOLD:
+                top = self._scan(groups, limit)
+            if top is None:
+                top = self._intersect(groups, limit)
+
+            return [self._docs[market_id]["record"] for market_id in top]
+
+def _apply_sorted(items, added, removed):
+    """
+    Removes then inserts into the sorted list `items` in place: bisect for
+    a few changes, one filter and sort for many.
+    """
+    if len(added) + len(removed) <= _BISECT_MAX:
+        for item in removed:
+            del items[bisect.bisect_left(items, item)]
+        for item in added:
+            bisect.insort(items, item)
+        return
+
+    if removed:
+        removed = set(removed)
+        items[:] = [item for item in items if item not in removed]
+    items.extend(added)
+    items.sort()
+
+def search_markets(index, query, limit=SEARCH_DEFAULT_LIMIT):
+    """
+    API shape: matching markets plus the distinct events they belong to,
+    in rank order, for event selection.
+    """
+    start = time.perf_counter()
+    records = index.search(query, limit)
+
+    events = {}
+    for record in records:
+        event = events.setdefault(record["event_key"], {
+            "event_key": record["event_key"],
+            "event_title": record.get("event_title"),
+            "matches": 0,
+        })
+        event["matches"] += 1
+
+    return {
+        "query": query,
+        "events": list(events.values()),
+        "markets": [
+            {
+                "market_id": record["market_id"],
+                "market_question": record.get("market_question"),
+                "event_key": record["event_key"],
+                "event_title": record.get("event_title"),
+                "outcomes": record.get("outcomes"),
+                "volume": record.get("volume"),
+                "end_date": record.get("end_date"),
+            }
+            for record in records
+        ],
+        "took_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+SEARCH_INDEX = SearchIndex()
@@ -0,0 +1,118 @@
+import json, mmap, os
+from config import SNAPSHOT_FORMAT
+
+# ===============================
+# SERIALIZATION
+# ===============================
+# One place for every encode/decode on the hot path:
+#
+# - JSON text (API responses, SSE, prompts, the flat CACHE_FILE) goes
+#   through orjson when installed, else the stdlib encoder
+# - the per-event snapshot cache is stored as msgpack when installed,
+#   read back through mmap so the OS page cache is the only copy of the
+#   file until it is decoded
+#
+# Both libraries are optional; without them everything stays plain JSON.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+HAS_ORJSON = orjson is not None
+HAS_MSGPACK = msgpack is not None
+
+def binary_snapshots():
+    if SNAPSHOT_FORMAT == "json":
+        return False
+    if SNAPSHOT_FORMAT == "msgpack" and not HAS_MSGPACK:
+        print("⚠️ SNAPSHOT_FORMAT=msgpack but msgpack is not installed, using JSON")
+    return HAS_MSGPACK
+
+# -------------------------------
+# JSON
+# -------------------------------
+def dumps(obj, indent=False, sort_keys=False) -> bytes:
+    """
+    UTF-8 JSON. indent=True matches json.dumps(indent=2) layout.
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option, default=str)
+
+    if indent:
+        text = json.dumps(obj, indent=2, sort_keys=sort_keys, ensure_ascii=False, default=str)
+    else:
+        text = json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False, default=str)
+    return text.encode()
+
+def dumps_text(obj, indent=False, sort_keys=False) -> str:
+    return dumps(obj, indent=indent, sort_keys=sort_keys).decode()
+
+def loads(data):
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# -------------------------------
+# FILES
+# -------------------------------
+def write_atomic(path, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def read_json_file(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+def binary_path(json_path):
+    return os.path.splitext(json_path)[0] + ".msgpack"
+
+def _read_msgpack(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return msgpack.unpackb(view, raw=False, strict_map_key=False)
+
+def save_document(json_path, obj):
+    """
+    Writes `obj` as msgpack next to `json_path` when binary snapshots are
+    on, else as compact JSON at `json_path`. Returns the path written.
+    """
+    if binary_snapshots():
+        path = binary_path(json_path)
+        write_atomic(path, msgpack.packb(obj, use_bin_type=True))
+        return path
+
+    write_atomic(json_path, dumps(obj))
+    return json_path
+
+def load_document(json_path):
+    """
+    Reads whichever of the msgpack / JSON copies was written last, or
+    None if neither exists.
+    """
+    candidates = [json_path]
+    if HAS_MSGPACK:
+        candidates.append(binary_path(json_path))
+
+    existing = [p for p in candidates if os.path.exists(p)]
+    if not existing:
+        return None
+
+    path = max(existing, key=os.path.getmtime)
+    if path.endswith(".msgpack"):
+        return _read_msgpack(path)
+    return read_json_file(path)
@@ -1,63 +1,130 @@
-import statistics
+import numpy as np
 from typing import Dict, Any
 import json
+import re
+from market_table import MarketTable
+from price_ladder import LadderIndex, compute_company_signals
 
-def compute_company_signal(company: str, market_data: list):
+def compute_company_signal(company: str, market_data):
     """
     Derives company signal ONLY from Polymarket-derived probabilities.
     No hardcoded numbers. No hallucinated confidence.
+
+    market_data is a MarketTable (or a list of records, converted once).
+    For many companies use price_ladder.compute_company_signals with a
+    prebuilt LadderIndex instead.
+    """
+    if not isinstance(market_data, MarketTable):
+        market_data = MarketTable.from_records(market_data)
+
+    index = LadderIndex.from_table(market_data)
+    return compute_company_signals([company], index)[company]
+
+
+# -------------------------------
+# FED RATE CUT DISTRIBUTION
+# -------------------------------
+_CUT_COUNT_RE = re.compile(r"\b(\d{1,2})\b\+?")
+_NO_CUT_RE = re.compile(r"\b(no|zero|none)\b")
+_YES_NO = {"yes", "no"}
+
+# (event id, updatedAt) -> [(cuts, prob)]; the group event is refetched on
+# its own TTL, independently of the market snapshot
+_PARSED_GROUP_EVENTS = {}
+_PARSED_CACHE_MAX = 64
+
+def _parse_json_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, list) else None
+
+def _parse_cut_count(text):
+    if not text:
+        return None
+    text = text.lower()
+    if _NO_CUT_RE.search(text):
+        return 0
+    match = _CUT_COUNT_RE.search(text)
+    return int(match.group(1)) if match else None
+
+def parse_rate_cut_event(event: dict):
     """
+    [(number_of_cuts, probability)] from a rate-cut group event.
 
-    company = company.upper()
+    - Yes/No markets ("Will 3 Fed rate cuts happen in 2026?") contribute
+      their Yes price at the count in groupItemTitle or the question
+    - Multi-outcome markets contribute every outcome whose label names
+      a count
+    """
+    cuts = []
 
-    # Currently only NVIDIA has structured price-target markets
-    if company not in ["NVDA", "NVIDIA"]:
-        return {
-            "confidence": None,
-            "avg_probability": None,
-            "dispersion": None,
-            "num_targets": 0
-        }
+    for market in event.get("markets", []):
+        labels = _parse_json_list(market.get("outcomes"))
+        prices = _parse_json_list(market.get("outcomePrices"))
+
+        if not labels or not prices or len(labels) != len(prices):
+            continue
 
-    probs = []
+        try:
+            prices = [float(p) for p in prices]
+        except (TypeError, ValueError):
+            continue
 
-    for m in market_data:
-        # m is COMPRESSED
-        question = m["question"].lower()
-        outcomes = m["outcomes"]
+        lowered = [str(label).lower() for label in labels]
 
-        if "nvidia" in question and "reach $" in question:
-            try:
-                price = int(question.split("$")[1].split()[0])
-            except Exception:
-                continue
+        if set(lowered) == _YES_NO:
+            n = _parse_cut_count(market.get("groupItemTitle"))
+            if n is None:
+                n = _parse_cut_count(market.get("question"))
+            if n is not None:
+                cuts.append((n, prices[lowered.index("yes")]))
+            continue
 
-            # Focus on meaningful upside levels
-            if price >= 200:
-                probs.append(outcomes.get("Yes", 0))
+        for label, prob in zip(lowered, prices):
+            n = _parse_cut_count(label)
+            if n is not None:
+                cuts.append((n, prob))
 
-    if len(probs) < 2:
-        return {
-            "confidence": None,
-            "avg_probability": None,
-            "dispersion": None,
-            "num_targets": len(probs)
-        }
+    return cuts
 
-    avg = statistics.mean(probs)
-    std = statistics.pstdev(probs)
+def _parsed_rate_cut_event(event: dict):
+    key = (event.get("id"), event.get("updatedAt"))
+    if None in key:
+        return parse_rate_cut_event(event)
 
-    return {
-        "confidence": round(avg * (1 - std), 3),
-        "avg_probability": round(avg, 3),
-        "dispersion": round(std, 3),
-        "num_targets": len(probs)
-    }
+    cuts = _PARSED_GROUP_EVENTS.get(key)
+    if cuts is None:
+        if len(_PARSED_GROUP_EVENTS) >= _PARSED_CACHE_MAX:
+            _PARSED_GROUP_EVENTS.clear()
+        cuts = parse_rate_cut_event(event)
+        _PARSED_GROUP_EVENTS[key] = cuts
+    return cuts
+
+def rate_cut_distribution(cuts):
+    """
+    Normalised probability vector indexed by number of cuts, or None.
+    """
+    if not cuts:
+        return None
+
+    counts = np.fromiter((n for n, _ in cuts), np.intp, len(cuts))
+    probs = np.fromiter((p for _, p in cuts), np.float64, len(cuts))
+
+    vector = np.zeros(counts.max() + 1)
+    np.add.at(vector, counts, probs)
 
+    total = vector.sum()
+    if total <= 0:
+        return None
+    return vector / total
 
 def compute_fed_rate_cut_signal(event: dict):
     """
-    Computes expected Fed rate cuts from multi-outcome Polymarket event
+    Distribution of Fed rate cuts implied by a multi-market Polymarket
+    event. Parsed markets are cached per event revision (id, updatedAt).
     """
 
     if not event or "markets" not in event:
@@ -66,50 +133,22 @@ def compute_fed_rate_cut_signal(event: dict):
             "cut_bias": "Unknown"
         }
 
-    cuts = []
-
-    for market in event.get("markets", []):
-        labels = market.get("outcomes")
-        prices = market.get("outcomePrices")
-
-        if not labels or not prices:
-            continue
-
-        # Parse if stringified
-        if isinstance(labels, str):
-            try:
-                labels = json.loads(labels)
-            except:
-                continue
+    vector = rate_cut_distribution(_parsed_rate_cut_event(event))
 
-        if isinstance(prices, str):
-            try:
-                prices = json.loads(prices)
-            except:
-                continue
-
-        if len(labels) != len(prices):
-            continue
-
-        for label, prob in zip(labels, prices):
-            label = label.lower()
-
-            # Extract number of cuts
-            if "no" in label:
-                cuts.append((0, float(prob)))
-            else:
-                import re
-                match = re.search(r"(\d+)", label)
-                if match:
-                    cuts.append((int(match.group(1)), float(prob)))
-
-    if not cuts:
+    if vector is None:
         return {
             "expected_cuts": None,
             "cut_bias": "Unknown"
         }
 
-    expected = sum(n * p for n, p in cuts)
+    n = np.arange(len(vector))
+    expected = float(n @ vector)
+    variance = float((n ** 2) @ vector - expected ** 2)
+    cdf = np.cumsum(vector)
+    modal = int(vector.argmax())
+
+    def quantile(q):
+        return int(np.searchsorted(cdf, q - 1e-12))
 
     return {
         "expected_cuts": round(expected, 2),
@@ -117,5 +156,18 @@ def compute_fed_rate_cut_signal(event: dict):
             "Aggressive" if expected >= 3
             else "Moderate" if expected >= 1
             else "Restrictive"
-        )
-    }
\ No newline at end of file
+        ),
+        "variance": round(max(variance, 0.0), 3),
+        "quantiles": {
+            "p10": quantile(0.1),
+            "p50": quantile(0.5),
+            "p90": quantile(0.9)
+        },
+        "modal_cuts": modal,
+        "modal_probability": round(float(vector[modal]), 3),
+        "distribution": {
+            str(i): round(float(p), 3)
+            for i, p in enumerate(vector)
+            if p > 0
+        }
+    }
@@ -0,0 +1,29 @@
+import asyncio
+
+# ===============================
+# SINGLE-FLIGHT COALESCING
+# ===============================
+# Concurrent callers asking for the same key share one in-flight task
+# instead of each starting their own. The task is shielded, so a client
+# that disconnects does not cancel the work other callers are waiting on.
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, make_coro):
+        """
+        Awaits the in-flight task for `key`, starting `make_coro()` if
+        there is none.
+        """
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(make_coro())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(task)
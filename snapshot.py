@@ -0,0 +1,190 @@
+import hashlib, threading, time
+import numpy as np
+from market_data import fetch_all_market_data, load_cached_market_data
+from market_table import MarketTable
+from price_ladder import LadderIndex
+from serialization import dumps
+from search_index import SEARCH_INDEX
+
+# ===============================
+# IN-MEMORY MARKET SNAPSHOT
+# ===============================
+# The app loads the snapshot once and serves every request from memory.
+# A refresh builds a complete new MarketSnapshot off to the side and
+# swaps it in with a single reference assignment, so readers always see
+# either the old or the new snapshot, never a mix.
+#
+# Live price updates instead derive a snapshot from the current one
+# (with_outcomes): only the changed markets are copied, the table shares
+# every column but probs and the search index only sees the changed
+# records. A derived snapshot keeps the cache_version of the snapshot it
+# came from, so the LLM cache and /analyze coalescing only turn over on a
+# full publish; their keys hash the prices that went into the prompt.
+
+def snapshot_version(records):
+    return hashlib.sha1(dumps(records, sort_keys=True)).hexdigest()[:12]
+
+def derived_version(base_version, updates):
+    # Chained from the base, so no pass over every record
+    digest = hashlib.sha1(base_version.encode())
+    digest.update(dumps(updates, sort_keys=True))
+    return digest.hexdigest()[:12]
+
+class MarketSnapshot:
+    def __init__(self, records, loaded_at=None):
+        self.records = records
+        self.version = snapshot_version(records)
+        self.cache_version = self.version
+        self.loaded_at = loaded_at or time.time()
+
+        self.by_event = {}
+        self.by_market_id = {}
+        for record in records:
+            self.by_event.setdefault(record["event_key"], []).append(record)
+            self.by_market_id[str(record["market_id"])] = record
+
+        self.table = MarketTable.from_records(records)
+        self.event_rows = self.table.event_groups()
+        self._ladder = None
+        self._rows = None
+
+        # Set on derived snapshots: the base version and the records that
+        # differ from it
+        self.base_version = None
+        self.changed = None
+
+    def with_outcomes(self, updates):
+        """
+        A new snapshot with `updates` ({market_id: outcomes}) applied to
+        this one. Unknown markets are ignored.
+        """
+        if self._rows is None:
+            self._rows = {market_id: row for row, market_id in enumerate(self.table.market_ids)}
+
+        changed = {}
+        for market_id, outcomes in updates.items():
+            record = self.by_market_id.get(market_id)
+            if record is not None:
+                changed[market_id] = dict(record, outcomes=outcomes)
+
+        snapshot = MarketSnapshot.__new__(MarketSnapshot)
+        snapshot.version = derived_version(self.version, {
+            market_id: record["outcomes"] for market_id, record in changed.items()
+        })
+        snapshot.loaded_at = time.time()
+        snapshot.base_version = self.version
+        snapshot.cache_version = self.cache_version
+        snapshot.changed = list(changed.values())
+
+        rows = [self._rows[market_id] for market_id in changed]
+        snapshot.records = list(self.records)
+        for row, record in zip(rows, snapshot.changed):
+            snapshot.records[row] = record
+
+        snapshot.by_market_id = dict(self.by_market_id)
+        snapshot.by_market_id.update(changed)
+        snapshot.by_event = dict(self.by_event)
+        for key in {record["event_key"] for record in snapshot.changed}:
+            snapshot.by_event[key] = [
+                changed.get(str(record["market_id"]), record)
+                for record in self.by_event[key]
+            ]
+
+        # Rows stay put, so the row indexes carry over
+        snapshot.table = self.table.with_rows(rows, snapshot.changed)
+        snapshot.event_rows = self.event_rows
+        snapshot._rows = self._rows
+        snapshot._ladder = None if self._ladder is None else self._ladder.with_table(snapshot.table)
+        return snapshot
+
+    def markets_for(self, event_keys):
+        return [
+            record
+            for key in event_keys
+            for record in self.by_event.get(key, [])
+        ]
+
+    @property
+    def ladder(self):
+        # Built on first use, once per snapshot
+        if self._ladder is None:
+            self._ladder = LadderIndex.from_table(self.table)
+        return self._ladder
+
+    def event_codes_for(self, event_keys):
+        keys = set(event_keys)
+        return [i for i, key in enumerate(self.table.event_keys) if key in keys]
+
+    def table_for(self, event_keys):
+        """
+        Sub-table for the given events via the event_key index, so the
+        cost follows the selection rather than the snapshot size.
+        """
+        rows = [self.event_rows[key] for key in event_keys if key in self.event_rows]
+        if not rows:
+            return self.table.take(np.zeros(0, dtype=np.intp))
+        return self.table.take(np.sort(np.concatenate(rows)))
+
+class SnapshotStore:
+    def __init__(self):
+        self._current = None
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+
+    def current(self):
+        snapshot = self._current
+        if snapshot is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = MarketSnapshot(load_cached_market_data())
+                snapshot = self._current
+        return snapshot
+
+    def _reindex(self):
+        # Off the request path: searches never pay for reindexing. Always
+        # towards the latest snapshot, whichever publisher gets here first
+        with self._index_lock:
+            SEARCH_INDEX.sync(self._current)
+
+    def publish(self, records):
+        snapshot = MarketSnapshot(records)
+        with self._lock:
+            self._current = snapshot
+        self._reindex()
+        return snapshot
+
+    def update_outcomes(self, overlay):
+        """
+        Applies `overlay(snapshot) -> {market_id: outcomes}` to the current
+        snapshot and swaps the result in. Runs under the store lock, so the
+        overlay always sees the latest snapshot and never overwrites one
+        published while it was being applied.
+        """
+        self.current()
+        with self._lock:
+            base = self._current
+            updates = overlay(base)
+            if not updates:
+                return base
+            snapshot = base.with_outcomes(updates)
+            self._current = snapshot
+        self._reindex()
+        return snapshot
+
+    def load(self):
+        """
+        Startup path: the on-disk cache, or a full crawl if there is none.
+        """
+        records = load_cached_market_data() or fetch_all_market_data()
+        return self.publish(records)
+
+    def refresh(self, use_cache=True):
+        """
+        Refetches stale events and hot-swaps the result in.
+        """
+        return self.publish(fetch_all_market_data(use_cache=use_cache))
+
+SNAPSHOTS = SnapshotStore()
+
+def get_snapshot():
+    return SNAPSHOTS.current()
@@ -0,0 +1,102 @@
+import json
+import pytest
+from json_stream import StreamingJSONParser, extract_json
+
+OUTPUT = {
+    "market_sentiment": {"label": "Neutral", "score": 55},
+    "asset_outlook": {"NVDA": {"bias": "Positive", "confidence": 0.7, "reasoning": "Targets hold, {brackets} \"quoted\"."}},
+    "top_stocks": [{"name": "NVIDIA", "ticker": "NVDA"}],
+}
+
+def feed_in_chunks(text, size):
+    parser = StreamingJSONParser()
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return parser, completed
+
+# -------------------------------
+# WELL-FORMED OUTPUT
+# -------------------------------
+def test_extract_json_plain():
+    assert extract_json(json.dumps(OUTPUT)) == OUTPUT
+
+def test_extract_json_strips_fences_and_prose():
+    text = "Here is the analysis:\n```json\n" + json.dumps(OUTPUT, indent=2) + "\n```\nDone."
+    assert extract_json(text) == OUTPUT
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_chunked_feed_matches_whole(size):
+    parser, completed = feed_in_chunks("noise " + json.dumps(OUTPUT) + " trailing", size)
+    assert parser.done
+    assert parser.finish() == OUTPUT
+    assert [field for field, _ in completed] == list(OUTPUT)
+
+def test_fields_complete_before_the_object_closes():
+    parser = StreamingJSONParser()
+    completed = parser.feed('{"market_sentiment": {"label": "Neutral", "score": 55}, "top_')
+    assert completed == [("market_sentiment", {"label": "Neutral", "score": 55})]
+    assert not parser.done
+
+def test_no_object():
+    with pytest.raises(ValueError):
+        extract_json("The model declined to answer.")
+
+# -------------------------------
+# REPAIR
+# -------------------------------
+def test_trailing_commas():
+    text = '{"a": [1, 2, 3,], "b": {"c": 1,},}'
+    assert extract_json(text) == {"a": [1, 2, 3], "b": {"c": 1}}
+
+def test_raw_control_characters_in_strings():
+    text = '{"reasoning": "line one\nline two\tend"}'
+    assert extract_json(text) == {"reasoning": "line one\nline two\tend"}
+
+def test_escaped_quotes_and_backslashes_survive_chunking():
+    text = '{"reasoning": "say \\"hi\\" \\\\ done"}'
+    parser, _ = feed_in_chunks(text, 1)
+    assert parser.finish() == {"reasoning": 'say "hi" \\ done'}
+
+def test_mismatched_closer():
+    assert extract_json('{"a": [1, 2}, "b": 3}') == {"a": [1, 2], "b": 3}
+
+def test_stops_at_end_of_first_object():
+    assert extract_json('{"a": 1} {"b": 2}') == {"a": 1}
+
+# -------------------------------
+# TRUNCATION
+# -------------------------------
+def test_truncated_between_fields_keeps_complete_ones():
+    parser = StreamingJSONParser()
+    parser.feed('{"a": 1, "b": {"c": 2}, ')
+    assert parser.finish() == {"a": 1, "b": {"c": 2}}
+    assert parser.truncated
+
+def test_truncated_inside_nested_value_closes_brackets():
+    parser = StreamingJSONParser()
+    parser.feed('{"a": 1, "b": [{"c": 2}, {"d": 3')
+    assert parser.finish() == {"a": 1, "b": [{"c": 2}, {"d": 3}]}
+    assert parser.truncated
+
+def test_truncated_inside_string_closes_it():
+    parser = StreamingJSONParser()
+    parser.feed('{"a": 1, "b": {"reasoning": "cut of')
+    assert parser.finish() == {"a": 1, "b": {"reasoning": "cut of"}}
+
+def test_truncated_after_backslash_drops_it():
+    parser = StreamingJSONParser()
+    parser.feed('{"b": "ends with \\')
+    assert parser.finish() == {"b": "ends with "}
+
+def test_truncated_unrecoverable_value_is_dropped():
+    parser = StreamingJSONParser()
+    parser.feed('{"a": 1, "b": {"c": ')
+    assert parser.finish() == {"a": 1}
+    assert parser.truncated
+
+def test_complete_object_is_not_truncated():
+    parser = StreamingJSONParser()
+    parser.feed('{"a": 1}')
+    assert parser.finish() == {"a": 1}
+    assert not parser.truncated
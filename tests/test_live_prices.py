@@ -0,0 +1,138 @@
+import asyncio, json, os, time
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+import live_prices
+import ws_replay
+from live_prices import LivePriceFeed, parse_quotes, renormalise
+from snapshot import MarketSnapshot
+
+RECORDING = os.path.join(os.path.dirname(__file__), "fixtures", "clob_market_replay.jsonl")
+
+TOKENS = {
+    "tok-m1-yes": ["m1", "Yes", 0.40],
+    "tok-m1-no": ["m1", "No", 0.60],
+    "tok-m2-yes": ["m2", "Yes", 0.20],
+    "tok-m2-no": ["m2", "No", 0.80],
+}
+
+RECORDS = [
+    {"event_key": "e1", "market_id": "m1", "market_question": "Q1?", "outcomes": {"Yes": 0.4, "No": 0.6}},
+    {"event_key": "e1", "market_id": "m2", "market_question": "Q2?", "outcomes": {"Yes": 0.2, "No": 0.8}},
+]
+
+class FakeCache:
+    """
+    The two EventCache lookups the feed uses, fetched a minute ago.
+    """
+
+    def __init__(self):
+        self.fetched_at = time.time() - 60
+
+    def token_index(self, keys=None):
+        return {token_id: (market[0], market[1]) for token_id, market in TOKENS.items()}
+
+    def market_prices(self, keys=None):
+        markets = {}
+        for market_id, label, price in TOKENS.values():
+            state = markets.setdefault(market_id, {"raw": {}, "fetched_at": self.fetched_at})
+            state["raw"][label] = price
+        return markets
+
+class FakeStore:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def current(self):
+        return self.snapshot
+
+    def update_outcomes(self, overlay):
+        updates = overlay(self.snapshot)
+        if updates:
+            self.snapshot = self.snapshot.with_outcomes(updates)
+        return self.snapshot
+
+def recorded_messages():
+    return [entry["msg"] for entry in ws_replay.load_recording(RECORDING)]
+
+# -------------------------------
+# PARSING
+# -------------------------------
+def test_parse_quotes_midpoints():
+    book, price_change, best_bid_ask, _, empty_book = recorded_messages()
+
+    assert parse_quotes(book[0]) == [("tok-m1-yes", pytest.approx(0.50))]
+    assert parse_quotes(price_change) == [
+        ("tok-m1-no", pytest.approx(0.45)),
+        ("tok-other", pytest.approx(0.11)),
+    ]
+    assert parse_quotes(best_bid_ask) == [("tok-m2-yes", pytest.approx(0.30))]
+    assert parse_quotes(empty_book) == []
+
+def test_renormalise():
+    assert renormalise({"Yes": 0.5, "No": 0.6}) == {"Yes": 0.4545, "No": 0.5455}
+    assert renormalise({"Yes": 0.0, "No": 0.0}) is None
+
+def test_replay_filters_unsubscribed_assets():
+    subscribed = {"tok-m1-yes", "tok-m1-no"}
+    book, price_change, best_bid_ask, other, _ = recorded_messages()
+
+    assert [m["asset_id"] for m in ws_replay.for_assets(book, subscribed)] == ["tok-m1-yes"]
+    assert [c["asset_id"] for c in ws_replay.for_assets(price_change, subscribed)["price_changes"]] == ["tok-m1-no"]
+    assert ws_replay.for_assets(best_bid_ask, subscribed) is None
+    assert ws_replay.for_assets(other, subscribed) is None
+
+# -------------------------------
+# FEED AGAINST THE REPLAY SERVER
+# -------------------------------
+async def drive_feed(feed, recording, sessions):
+    subscriptions = []
+    done = asyncio.Event()
+
+    async def handler(ws, *_):
+        subscription = json.loads(await ws.recv())
+        subscriptions.append(subscription)
+        await ws_replay.play(ws, recording, set(subscription["assets_ids"]), speed=0, loop=False)
+        if len(subscriptions) >= sessions:
+            done.set()
+        # Closing the connection sends the feed into its reconnect path
+
+    async with websockets.serve(handler, "localhost", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        feed.url = f"ws://localhost:{port}"
+        feed.start()
+        try:
+            await asyncio.wait_for(done.wait(), timeout=10)
+            # Let the last session drain its socket
+            await asyncio.sleep(0.1)
+        finally:
+            await feed.stop()
+
+    return subscriptions
+
+def test_feed_applies_replay_and_resubscribes(monkeypatch):
+    monkeypatch.setattr(live_prices, "tracked_event_keys", lambda: ["e1"])
+    store = FakeStore(MarketSnapshot(RECORDS))
+    feed = LivePriceFeed(FakeCache(), store)
+    recording = ws_replay.load_recording(RECORDING)
+
+    subscriptions = asyncio.run(drive_feed(feed, recording, sessions=2))
+
+    # Reconnected and sent the full subscription again
+    assert len(subscriptions) == 2
+    for subscription in subscriptions:
+        assert subscription["type"] == "market"
+        assert sorted(subscription["assets_ids"]) == sorted(TOKENS)
+    assert feed.reconnects >= 1
+
+    # The unsubscribed-only message never reached the feed
+    assert feed.messages == 2 * 4
+
+    snapshot = feed.publish()
+    # Yes 0.50 over the crawled No 0.60, then No 0.45
+    assert snapshot.by_market_id["m1"]["outcomes"] == {"Yes": 0.5263, "No": 0.4737}
+    # Yes 0.30 over the crawled No 0.80; the one-sided book is ignored
+    assert snapshot.by_market_id["m2"]["outcomes"] == {"Yes": 0.2727, "No": 0.7273}
+    # An overlay, so the LLM cache version is still the crawled one
+    assert snapshot.cache_version == MarketSnapshot(RECORDS).version
@@ -0,0 +1,69 @@
+import time
+from llm_cache import LLMResponseCache, cache_key
+
+def make_cache(**options):
+    options.setdefault("max_entries", 2)
+    options.setdefault("ttl", 60)
+    return LLMResponseCache(path=None, **options)
+
+# -------------------------------
+# KEYS
+# -------------------------------
+def test_cache_key_is_canonical():
+    assert cache_key(a={"x": 1, "y": [1, 2]}, b="z") == cache_key(b="z", a={"y": [1, 2], "x": 1})
+    assert cache_key(a={"x": 1}) != cache_key(a={"x": 2})
+
+# -------------------------------
+# ENTRIES
+# -------------------------------
+def test_hit_returns_a_copy():
+    cache = make_cache()
+    cache.put("k", "v1", {"top_stocks": ["NVDA"]})
+
+    hit = cache.get("k", "v1")
+    hit["top_stocks"].append("MSFT")
+    assert cache.get("k", "v1") == {"top_stocks": ["NVDA"]}
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache()
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    # Touch "a" so "b" is the oldest
+    assert cache.get("a", "v1") == 1
+    cache.put("c", "v1", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == 1
+    assert cache.get("c", "v1") == 3
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    cache = make_cache(ttl=10)
+    cache.put("k", "v1", 1)
+
+    later = time.time() + 11
+    monkeypatch.setattr("llm_cache.time.time", lambda: later)
+    assert cache.get("k", "v1") is None
+    assert len(cache) == 0
+
+# -------------------------------
+# VERSIONS
+# -------------------------------
+def test_new_version_clears_the_cache():
+    cache = make_cache()
+    cache.put("k", "v1", 1)
+
+    assert cache.get("k", "v2") is None
+    assert cache.version == "v2"
+    assert len(cache) == 0
+
+def test_retired_version_is_ignored():
+    cache = make_cache()
+    cache.put("k", "v1", "old")
+    cache.put("k", "v2", "new")
+
+    # A request still running on v1 neither reads, writes nor flips back
+    assert cache.get("k", "v1") is None
+    cache.put("k", "v1", "late")
+    assert cache.version == "v2"
+    assert cache.get("k", "v2") == "new"
@@ -0,0 +1,179 @@
+import email.utils, threading, time
+import pytest
+from config import LLM_BACKOFF_MAX
+from llm_scheduler import LLMScheduler, LLMOverloaded, parse_retry_after, start_call
+
+class ProviderError(Exception):
+    # Shaped like a Sarvam SDK error
+    def __init__(self, status_code=429, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def scheduler(**overrides):
+    # No rate limit, generous queues, short timeouts
+    options = dict(
+        max_concurrency=1,
+        rate=0,
+        burst=1,
+        lanes=("interactive", "batch"),
+        lane_max_active={},
+        queue_max={"interactive": 8, "batch": 8},
+        queue_timeout={"interactive": 2.0, "batch": 2.0},
+    )
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+def acquire_in_thread(llm, lane, order):
+    def run():
+        name = llm.acquire(lane)
+        order.append(name)
+        llm.release(name)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+# -------------------------------
+# LANES
+# -------------------------------
+def test_interactive_lane_goes_first():
+    llm = scheduler()
+    held = llm.acquire("batch")
+    order = []
+
+    batch = acquire_in_thread(llm, "batch", order)
+    wait_until(lambda: llm.queued() == 1)
+    interactive = acquire_in_thread(llm, "interactive", order)
+    wait_until(lambda: llm.queued() == 2)
+
+    llm.release(held)
+    batch.join(2)
+    interactive.join(2)
+    assert order == ["interactive", "batch"]
+
+def test_lane_cap_leaves_slots_for_other_lanes():
+    llm = scheduler(
+        max_concurrency=2,
+        lane_max_active={"batch": 1},
+        queue_timeout={"interactive": 2.0, "batch": 0.05},
+    )
+    held = llm.acquire("batch")
+
+    with pytest.raises(LLMOverloaded):
+        llm.acquire("batch")
+    assert llm.acquire("interactive") == "interactive"
+    assert llm.stats()["active"] == {"interactive": 1, "batch": 1}
+    llm.release(held)
+
+# -------------------------------
+# SHEDDING
+# -------------------------------
+def test_full_queue_sheds_immediately():
+    llm = scheduler(queue_max={"interactive": 1, "batch": 8})
+    held = llm.acquire("interactive")
+    order = []
+    waiter = acquire_in_thread(llm, "interactive", order)
+    wait_until(lambda: llm.queued() == 1)
+
+    started = time.monotonic()
+    with pytest.raises(LLMOverloaded, match="queue full") as shed:
+        llm.acquire("interactive")
+    assert time.monotonic() - started < 0.5
+    assert shed.value.retry_after == 1.0
+
+    llm.release(held)
+    waiter.join(2)
+    assert order == ["interactive"]
+
+def test_queue_timeout_sheds():
+    llm = scheduler(queue_timeout={"interactive": 0.05, "batch": 2.0})
+    held = llm.acquire("interactive")
+
+    started = time.monotonic()
+    with pytest.raises(LLMOverloaded, match="Timed out"):
+        llm.acquire("interactive")
+    assert 0.05 <= time.monotonic() - started < 1.0
+    assert llm.queued() == 0
+    llm.release(held)
+
+# -------------------------------
+# THROTTLING
+# -------------------------------
+def test_pause_holds_every_lane():
+    llm = scheduler()
+    llm.pause(0.1)
+
+    started = time.monotonic()
+    name = llm.acquire("batch")
+    assert time.monotonic() - started >= 0.1
+    llm.release(name)
+
+def test_429_pauses_the_scheduler_and_retries():
+    llm = scheduler()
+    calls = []
+
+    def call():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise ProviderError(headers={"Retry-After": "0.1"})
+        return "ok"
+
+    result, name = start_call(llm, call, kind="test")
+    llm.release(name)
+
+    assert result == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.1
+    assert llm.paused_until >= calls[0] + 0.1
+
+def test_retry_after_past_backoff_max_sheds():
+    llm = scheduler()
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ProviderError(headers={"Retry-After": str(LLM_BACKOFF_MAX + 90)})
+
+    with pytest.raises(LLMOverloaded) as shed:
+        start_call(llm, call, kind="test")
+
+    assert len(calls) == 1
+    assert shed.value.retry_after == LLM_BACKOFF_MAX + 90
+    # Later callers are held too, rather than hitting the throttle again
+    assert llm.stats()["paused_for"] > LLM_BACKOFF_MAX
+    assert llm.active() == 0
+
+def test_non_retryable_error_is_raised():
+    llm = scheduler()
+
+    def call():
+        raise ProviderError(status_code=400)
+
+    with pytest.raises(ProviderError):
+        start_call(llm, call, kind="test")
+    assert llm.active() == 0
+
+# -------------------------------
+# RETRY-AFTER
+# -------------------------------
+def test_retry_after_seconds():
+    assert parse_retry_after({"Retry-After": "5"}) == 5.0
+    assert parse_retry_after({"retry-after": " 1.5 "}) == 1.5
+    assert parse_retry_after({"Retry-After": "-3"}) == 0.0
+    assert parse_retry_after({}) is None
+
+def test_retry_after_http_date():
+    future = email.utils.formatdate(time.time() + 90, usegmt=True)
+    assert parse_retry_after({"Retry-After": future}) == pytest.approx(90, abs=2)
+
+    past = email.utils.formatdate(time.time() - 90, usegmt=True)
+    assert parse_retry_after({"Retry-After": past}) == 0.0
+
+def test_retry_after_garbage():
+    assert parse_retry_after({"Retry-After": "soon"}) is None
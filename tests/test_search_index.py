@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from search_index import SearchIndex, search_markets
+
+NOW = 1_767_225_600
+
+def market(market_id, question, event_key="fed", volume="1000", outcomes=None, title="Fed decision"):
+    return {
+        "market_id": market_id,
+        "market_question": question,
+        "event_key": event_key,
+        "event_title": title,
+        "volume": volume,
+        "outcomes": outcomes or {"Yes": 0.5, "No": 0.5},
+    }
+
+RECORDS = [
+    market("1", "Will the Fed cut rates in March?", volume="5000000"),
+    market("2", "Will the Fed hike rates in March?", volume="20000"),
+    market("3", "Will inflation exceed 3% in 2026?", event_key="inflation", title="Inflation 2026", volume="900000"),
+    market("4", "Will NVIDIA hit $200 by June?", event_key="nvidia", title="NVIDIA price", volume="300000"),
+]
+
+def index_of(records=RECORDS):
+    index = SearchIndex()
+    index.update(records, version="v1", now=NOW)
+    return index
+
+def ids(records):
+    return [record["market_id"] for record in records]
+
+# -------------------------------
+# MATCHING
+# -------------------------------
+def test_prefix_matching():
+    index = index_of()
+    assert ids(index.search("infl")) == ["3"]
+    assert ids(index.search("nvid 200")) == ["4"]
+    # Every term has to match
+    assert ids(index.search("fed hik")) == ["2"]
+    assert index.search("fed nvidia") == []
+
+def test_short_terms_only_match_whole_words():
+    index = index_of([market("1", "Will X launch a token?"), market("2", "Will Xbox sales rise?")])
+    assert ids(index.search("x")) == ["1"]
+    assert ids(index.search("xb")) == ["2"]
+
+def test_stopwords_are_ignored():
+    index = index_of()
+    assert ids(index.search("the inflation")) == ["3"]
+    assert index.search("will the") == []
+
+def test_ranked_by_volume():
+    index = index_of()
+    assert ids(index.search("march")) == ["1", "2"]
+    assert ids(index.search("march", limit=1)) == ["1"]
+
+# -------------------------------
+# UPDATES
+# -------------------------------
+def test_update_removes_missing_markets():
+    index = index_of()
+    changed = index.update(RECORDS[1:], version="v2", now=NOW)
+
+    assert changed == 1
+    assert len(index) == 3
+    assert ids(index.search("cut")) == []
+    assert ids(index.search("march")) == ["2"]
+    assert index.version == "v2"
+
+def test_partial_update_keeps_unlisted_markets():
+    index = index_of()
+    renamed = market("1", "Will the Fed pause in March?", volume="5000000")
+    index.update([renamed], version="v2", now=NOW, partial=True)
+
+    assert len(index) == 4
+    assert ids(index.search("cut")) == []
+    assert ids(index.search("pause")) == ["1"]
+    assert ids(index.search("infl")) == ["3"]
+
+def test_moved_market_is_reranked():
+    index = index_of()
+    # Prices changed a day later: the recency boost outweighs the volume gap
+    moved = market("2", "Will the Fed hike rates in March?", volume="20000", outcomes={"Yes": 0.9, "No": 0.1})
+    index.update([moved], now=NOW + 24 * 60 * 60, partial=True)
+    assert ids(index.search("march")) == ["2", "1"]
+
+def test_sync_applies_only_the_changes_of_a_derived_snapshot():
+    index = index_of()
+    derived = SimpleNamespace(
+        version="v2",
+        base_version="v1",
+        changed=[market("4", "Will NVIDIA hit $250 by June?", event_key="nvidia", title="NVIDIA price")],
+        records=None,
+    )
+    index.sync(derived)
+
+    assert index.version == "v2"
+    assert len(index) == 4
+    assert ids(index.search("250")) == ["4"]
+    assert index.search("200") == []
+
+# -------------------------------
+# API SHAPE
+# -------------------------------
+def test_search_markets_groups_events():
+    result = search_markets(index_of(), "march")
+    assert result["events"] == [{"event_key": "fed", "event_title": "Fed decision", "matches": 2}]
+    assert [m["market_id"] for m in result["markets"]] == ["1", "2"]
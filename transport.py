@@ -0,0 +1,126 @@
+import threading, time, requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from config import FETCH_CONCURRENCY, HTTP2_ENABLED
+from metrics import span, HTTP_REQUESTS
+
+# ===============================
+# SHARED HTTP TRANSPORT
+# ===============================
+# Every Gamma and CLOB call goes through SESSION. urllib3 keeps one
+# keep-alive pool per host; each pool holds up to FETCH_CONCURRENCY
+# connections and blocks (rather than opening throwaway extras) when
+# they are all busy.
+
+_stats_lock = threading.Lock()
+_POOL_STATS = {}
+
+def _record(host, requests_=0, new_connections=0, wait_seconds=0.0):
+    with _stats_lock:
+        stats = _POOL_STATS.setdefault(host, {
+            "requests": 0,
+            "new_connections": 0,
+            "wait_seconds": 0.0,
+        })
+        stats["requests"] += requests_
+        stats["new_connections"] += new_connections
+        stats["wait_seconds"] += wait_seconds
+
+class _InstrumentedPoolMixin:
+    def _get_conn(self, timeout=None):
+        start = time.perf_counter()
+        try:
+            return super()._get_conn(timeout=timeout)
+        finally:
+            _record(
+                self.host,
+                requests_=1,
+                wait_seconds=time.perf_counter() - start
+            )
+
+    def _new_conn(self):
+        _record(self.host, new_connections=1)
+        return super()._new_conn()
+
+class _InstrumentedHTTPConnectionPool(_InstrumentedPoolMixin, HTTPConnectionPool):
+    pass
+
+class _InstrumentedHTTPSConnectionPool(_InstrumentedPoolMixin, HTTPSConnectionPool):
+    pass
+
+class PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _InstrumentedHTTPConnectionPool,
+            "https": _InstrumentedHTTPSConnectionPool,
+        }
+
+def _enable_http2():
+    # urllib3 >= 2.3 ships experimental HTTP/2 support when h2 is installed
+    try:
+        import h2  # noqa: F401
+        from urllib3.http2 import inject_into_urllib3
+    except ImportError:
+        print("⚠️ HTTP/2 requested but urllib3.http2 / h2 unavailable, using HTTP/1.1")
+        return False
+
+    inject_into_urllib3()
+    return True
+
+class TracedSession(requests.Session):
+    """
+    One span and one counted request per outbound call (retries included).
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlparse(url).hostname or "unknown"
+        status = "error"
+        with span(f"http.{host}"):
+            try:
+                response = super().request(method, url, *args, **kwargs)
+                status = str(response.status_code)
+                return response
+            finally:
+                HTTP_REQUESTS.inc(host=host, status=status)
+
+def make_session(pool_size=FETCH_CONCURRENCY):
+    session = TracedSession()
+
+    retries = Retry(
+        total=5,
+        backoff_factor=1.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # POST /midpoints is a read-only batch lookup
+        allowed_methods=["GET", "POST"]
+    )
+
+    adapter = PooledAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        pool_block=True,
+        max_retries=retries
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+HTTP2_ACTIVE = HTTP2_ENABLED and _enable_http2()
+
+SESSION = make_session()
+
+def pool_stats():
+    """
+    Per-host connection reuse and pool wait time since startup.
+    """
+    with _stats_lock:
+        snapshot = {host: dict(stats) for host, stats in _POOL_STATS.items()}
+
+    for stats in snapshot.values():
+        stats["reused_connections"] = stats["requests"] - stats["new_connections"]
+        stats["wait_seconds"] = round(stats["wait_seconds"], 4)
+
+    return snapshot
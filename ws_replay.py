@@ -0,0 +1,80 @@
+import argparse, asyncio, json
+import websockets
+
+# ===============================
+# LOCAL CLOB WEBSOCKET STAND-IN
+# ===============================
+# Replays recorded market-channel messages to anyone who subscribes, so
+# the live price feed can be exercised offline:
+#
+#   python ws_replay.py recorded.jsonl --port 8765 --speed 10
+#   CLOB_WS_URL=ws://localhost:8765 LIVE_PRICES=1 uvicorn app:app
+#
+# Each line of the recording is {"t": seconds since start, "msg": <message>}.
+# --speed scales the gaps between messages (0 = as fast as possible);
+# --loop replays forever. Like the real channel, a client only gets the
+# messages for the asset ids it subscribed to.
+
+def load_recording(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def for_assets(message, subscribed):
+    """
+    `message` cut down to the subscribed asset ids, or None if nothing in
+    it is for them.
+    """
+    if isinstance(message, list):
+        kept = [m for m in (for_assets(m, subscribed) for m in message) if m is not None]
+        return kept or None
+
+    if "price_changes" in message:
+        changes = [c for c in message["price_changes"] if c.get("asset_id") in subscribed]
+        return dict(message, price_changes=changes) if changes else None
+
+    return message if message.get("asset_id") in subscribed else None
+
+async def play(ws, recording, subscribed, speed, loop):
+    while True:
+        previous_t = 0.0
+        for entry in recording:
+            gap = entry["t"] - previous_t
+            previous_t = entry["t"]
+            if speed > 0 and gap > 0:
+                await asyncio.sleep(gap / speed)
+            message = for_assets(entry["msg"], subscribed)
+            if message is not None:
+                await ws.send(json.dumps(message))
+        if not loop:
+            break
+
+async def replay(ws, recording, speed, loop):
+    # Wait for the subscription like the real server does
+    subscription = json.loads(await ws.recv())
+    subscribed = set(subscription.get("assets_ids", []))
+    print(f"🎬 Client subscribed to {len(subscribed)} tokens")
+    await play(ws, recording, subscribed, speed, loop)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay recorded CLOB market-channel messages over a local websocket.")
+    parser.add_argument("recording")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--loop", action="store_true")
+    args = parser.parse_args()
+
+    recording = load_recording(args.recording)
+
+    async def handler(ws, *_):
+        try:
+            await replay(ws, recording, args.speed, args.loop)
+        except websockets.ConnectionClosed:
+            pass
+
+    async with websockets.serve(handler, args.host, args.port):
+        print(f"🎬 Replaying {len(recording)} messages on ws://{args.host}:{args.port}")
+        await asyncio.Future()
+
+if __name__ == "__main__":
+    asyncio.run(main())